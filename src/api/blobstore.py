@@ -0,0 +1,75 @@
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+# leading bytes of the image formats the app accepts
+IMAGE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+
+
+def sniff_image_type(head):
+    """Return the MIME type of an image from its first bytes, or None."""
+    for signature, content_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+class BlobStore:
+    """
+    Content-addressed blob store on the local filesystem.
+
+    A blob is stored once under its SHA-256 hex digest at `<root>/ab/cd/<digest>`;
+    models keep only the digest. Writes go to a temporary file that is renamed into
+    place, so readers never see a partial blob.
+    Usage: digest = BlobStore().put(data); BlobStore().open(digest)
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root or settings.BLOB_STORE_ROOT)
+
+    def path(self, digest):
+        if not DIGEST_RE.match(digest):
+            raise ValueError(f"Invalid blob digest: {digest!r}")
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def exists(self, digest):
+        return self.path(digest).is_file()
+
+    def put(self, data):
+        """Store the bytes (if not already stored) and return their digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if path.is_file():
+            return digest
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return digest
+
+    def open(self, digest):
+        """Open a stored blob for binary reading (raises FileNotFoundError)."""
+        return open(self.path(digest), "rb")
+
+    def read(self, digest):
+        with self.open(digest) as blob:
+            return blob.read()
@@ -0,0 +1,330 @@
+import csv
+import io
+import json
+from time import perf_counter
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.geo import encode
+from api.models.common import Location
+from api.models.event import (
+    Category,
+    EventCategory,
+    EventDetail,
+    EventLocation,
+    EventOrganizer,
+    RecommendedEvent,
+)
+from helper.types import OPEN_EVENT_STATUSES
+
+# columns of an import row that are copied onto EventDetail
+EVENT_FIELDS = (
+    "event_name",
+    "description",
+    "capacity",
+    "duration",
+    "status",
+    "address",
+    "is_featured",
+)
+LOCATION_FIELDS = ("province", "city", "town")
+# optional venue coordinates, copied onto EventLocation
+COORDINATE_FIELDS = ("latitude", "longitude")
+
+# spellings of booleans accepted in CSV input
+BOOLEAN_VALUES = {
+    "true": True,
+    "t": True,
+    "1": True,
+    "false": False,
+    "f": False,
+    "0": False,
+}
+
+# rows are validated and sent to COPY in chunks of this size
+IMPORT_CHUNK_SIZE = 5000
+
+INPUT_FORMATS = ("csv", "ndjson")
+
+
+class BulkImportError(ValueError):
+    pass
+
+
+def input_format(name):
+    """Guess the input format from a file name, or None."""
+    extension = name.rsplit(".", 1)[-1].lower()
+    if extension == "csv":
+        return "csv"
+    if extension in ("ndjson", "jsonl"):
+        return "ndjson"
+    return None
+
+
+def read_rows(stream, fmt):
+    """
+    Yield (line number, row dict) from a text stream of CSV (with a header) or
+    NDJSON. In both, `category` may hold several names separated by "|"; NDJSON
+    may also give a list.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == "ndjson":
+        for number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise BulkImportError(f"line {number}: {e.msg}")
+            if not isinstance(row, dict):
+                raise BulkImportError(f"line {number}: expected an object")
+            yield number, row
+    else:
+        raise BulkImportError(f"Unknown format {fmt!r}")
+
+
+def copy_columns(model):
+    """
+    Columns COPY writes for a model: every concrete field except database-generated
+    ones (auto-increment keys), whose values come from their defaults.
+    """
+    return [field for field in model._meta.concrete_fields if not field.db_returning]
+
+
+def _copy_value(value):
+    # CSV format: unquoted empty is NULL, a quoted value is taken literally
+    if value is None:
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def copy_rows(cursor, model, rows):
+    """
+    Insert rows with COPY ... FROM STDIN (no signals). Each row maps field
+    attnames to values; missing columns take the field's default (or now() for
+    auto_now/auto_now_add fields), as a save() would.
+    """
+    if not rows:
+        return
+    db = cursor.db  # resolve the connection proxy once, not per value
+    fields = copy_columns(model)
+    now = timezone.now()
+    defaults = {
+        field.attname: now
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+        else None
+        for field in fields
+    }
+    buffer = io.StringIO()
+    for row in rows:
+        values = []
+        for field in fields:
+            if field.attname in row:
+                value = row[field.attname]
+            else:
+                value = defaults[field.attname] or field.get_default()
+            values.append(_copy_value(field.get_db_prep_save(value, db)))
+        buffer.write(",".join(values) + "\n")
+    buffer.seek(0)
+
+    columns = ", ".join(db.ops.quote_name(field.column) for field in fields)
+    sql = (
+        f"COPY {db.ops.quote_name(model._meta.db_table)} ({columns}) "
+        "FROM STDIN WITH (FORMAT csv)"
+    )
+    if hasattr(cursor, "copy_expert"):  # psycopg2
+        cursor.copy_expert(sql, buffer)
+    else:  # psycopg 3
+        with cursor.copy(sql) as copy:
+            copy.write(buffer.read())
+
+
+def copy_objects(cursor, model, objs):
+    """Insert unsaved model instances with COPY (see copy_rows)."""
+    fields = copy_columns(model)
+    copy_rows(
+        cursor,
+        model,
+        [
+            {field.attname: field.pre_save(obj, add=True) for field in fields}
+            for obj in objs
+        ],
+    )
+
+
+def _event_value(name, value):
+    if name == "is_featured" and isinstance(value, str):
+        return BOOLEAN_VALUES.get(value.strip().lower(), value)
+    return value
+
+
+def _split_categories(value):
+    if not value:
+        return []
+    names = value if isinstance(value, list) else str(value).split("|")
+    return [name.strip() for name in names if name and name.strip()]
+
+
+class EventImporter:
+    """
+    Bulk-load events with their location and categories through COPY.
+
+    Locations (by province/city/town) and categories (by name) are resolved
+    against the existing rows, loaded once, and new ones are interned in memory
+    so each is created once. Everything runs in one transaction; the first
+    invalid row aborts the import.
+    Usage: EventImporter(organizer=user).run(stream, "csv")
+    """
+
+    def __init__(self, organizer=None, chunk_size=IMPORT_CHUNK_SIZE):
+        self.organizer = organizer
+        self.chunk_size = chunk_size
+        self.counts = {"events": 0, "locations": 0, "categories": 0}
+
+    def run(self, stream, fmt):
+        start = perf_counter()
+        with transaction.atomic(), connection.cursor() as cursor:
+            self.locations = {
+                (location.province, location.city, location.town): location
+                for location in Location.objects.all()
+            }
+            self.categories = {
+                category.category_name: category for category in Category.objects.all()
+            }
+            self._reset()
+            for number, row in read_rows(stream, fmt):
+                self._add(number, row)
+                if len(self.events) >= self.chunk_size:
+                    self._flush(cursor)
+            self._flush(cursor)
+
+        elapsed = perf_counter() - start
+        return {
+            **self.counts,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(self.counts["events"] / elapsed, 1)
+            if elapsed
+            else None,
+        }
+
+    def _reset(self):
+        self.events = []
+        self.new_locations = []
+        self.new_categories = []
+        self.event_locations = []
+        self.event_categories = []
+        self.recommendations = []
+
+    def _add(self, number, row):
+        try:
+            event = EventDetail(
+                **{
+                    name: _event_value(name, row[name])
+                    for name in EVENT_FIELDS
+                    if row.get(name) not in (None, "")
+                }
+            )
+            event.clean_fields(exclude=["main_image_hash"])
+            location = self._location(row)
+            coordinates = self._coordinates(row, location)
+            categories = [
+                self._category(name) for name in _split_categories(row.get("category"))
+            ]
+        except ValidationError as e:
+            raise BulkImportError(f"line {number}: {_describe(e)}")
+
+        # join rows are plain values: building model instances costs more than COPY
+        self.events.append(event)
+        if location:
+            self.event_locations.append(
+                {"event_id_id": event.pk, "location_id_id": location.pk, **coordinates}
+            )
+            if event.status in OPEN_EVENT_STATUSES:
+                # COPY sends no signals: index the event like api.signals.index_event
+                self.recommendations.append(
+                    {"event_id_id": event.pk, "location_id_id": location.pk}
+                )
+        for category in categories:
+            self.event_categories.append(
+                {"event_id_id": event.pk, "category_id_id": category.pk}
+            )
+
+    def _location(self, row):
+        key = tuple(str(row.get(name) or "").strip() for name in LOCATION_FIELDS)
+        if not any(key):
+            return None
+        location = self.locations.get(key)
+        if location is None:
+            location = Location(**dict(zip(LOCATION_FIELDS, key)))
+            location.clean_fields()
+            self.locations[key] = location
+            self.new_locations.append(location)
+        return location
+
+    def _coordinates(self, row, location):
+        """Venue coordinates of a row, with their geohash (see api.geo), or {}."""
+        values = {name: row.get(name) for name in COORDINATE_FIELDS}
+        if all(value in (None, "") for value in values.values()):
+            return {}
+        if location is None:
+            raise ValidationError({"latitude": ["Coordinates need a location."]})
+        coordinates = {}
+        for name, value in values.items():
+            try:
+                coordinates[name] = EventLocation._meta.get_field(name).clean(
+                    value, None
+                )
+            except ValidationError as e:
+                raise ValidationError({name: e.messages})
+        if None in coordinates.values():
+            raise ValidationError({"longitude": ["Give both latitude and longitude."]})
+        coordinates["geohash"] = encode(
+            coordinates["latitude"], coordinates["longitude"]
+        )
+        return coordinates
+
+    def _category(self, name):
+        category = self.categories.get(name)
+        if category is None:
+            category = Category(category_name=name)
+            category.clean_fields(exclude=["main_image_hash"])
+            self.categories[name] = category
+            self.new_categories.append(category)
+        return category
+
+    def _flush(self, cursor):
+        # FKs are deferred until commit, so the order of the COPYs is free
+        copy_objects(cursor, Location, self.new_locations)
+        copy_objects(cursor, Category, self.new_categories)
+        copy_objects(cursor, EventDetail, self.events)
+        copy_rows(cursor, EventLocation, self.event_locations)
+        copy_rows(cursor, EventCategory, self.event_categories)
+        copy_rows(cursor, RecommendedEvent, self.recommendations)
+        if self.organizer is not None:
+            copy_rows(
+                cursor,
+                EventOrganizer,
+                [
+                    {"event_id_id": event.pk, "user_id_id": self.organizer.pk}
+                    for event in self.events
+                ],
+            )
+
+        self.counts["events"] += len(self.events)
+        self.counts["locations"] += len(self.new_locations)
+        self.counts["categories"] += len(self.new_categories)
+        self._reset()
+
+
+def _describe(error):
+    if hasattr(error, "message_dict"):
+        return "; ".join(
+            f"{field}: {' '.join(messages)}"
+            for field, messages in error.message_dict.items()
+        )
+    return " ".join(error.messages)
@@ -0,0 +1,220 @@
+"""
+Cache of serialized API responses, keyed by object and version.
+
+Each cached object (an event, a user) has a version number in the cache; entries
+are stored under the current version, so bumping it invalidates every variant
+of the object at once (field selections, hosts, myinfo vs profile) and the stale
+entries simply expire. Versions are bumped by api.signals after the writing
+transaction commits, so a reader can't store pre-commit data under a new version.
+
+Entries keep the conditional-GET validators next to the data, so a hit answers
+both full fetches and revalidations without touching the database:
+
+    return cached_detail(request, "event", pk, load_event, EventDetailSerializer)
+"""
+
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from rest_framework.response import Response
+
+from api.conditional import not_modified, representation, validators, with_validators
+
+CachedResponse = namedtuple("CachedResponse", ["etag", "last_modified", "data"])
+
+# cached resources, with the object whose version they follow
+RESOURCES = {
+    "event": "event",
+    "user": "user",
+    "myinfo": "user",
+}
+
+KEY_PREFIX = "response"
+
+
+def _canonical(pk):
+    # the URL may spell a UUID differently from the str(pk) signals invalidate
+    try:
+        return str(uuid.UUID(str(pk)))
+    except ValueError:
+        return str(pk)
+
+
+class ResponseCache:
+    def __init__(self, alias="default", timeout=None):
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _timeout(self):
+        if self.timeout is not None:
+            return self.timeout
+        return settings.RESPONSE_CACHE_TIMEOUT
+
+    def _version_key(self, kind, pk):
+        return f"{KEY_PREFIX}:version:{kind}:{_canonical(pk)}"
+
+    def _version(self, kind, pk):
+        key = self._version_key(kind, pk)
+        version = self.cache.get(key)
+        if version is None:
+            # a fresh number, so an evicted version never matches older entries
+            self.cache.add(key, time.time_ns(), timeout=None)
+            version = self.cache.get(key)
+        return version
+
+    def _key(self, resource, pk, request):
+        variant = hashlib.sha256(
+            "\n".join(representation(request)).encode()
+        ).hexdigest()[:16]
+        version = self._version(RESOURCES[resource], pk)
+        return f"{KEY_PREFIX}:{resource}:{_canonical(pk)}:{version}:{variant}"
+
+    def get(self, resource, pk, request):
+        """Return the CachedResponse for the request, or None (counted)."""
+        entry = self.cache.get(self._key(resource, pk, request))
+        self._count(resource, "hits" if entry is not None else "misses")
+        return CachedResponse(*entry) if entry is not None else None
+
+    def set(self, resource, pk, request, etag, last_modified, data):
+        entry = CachedResponse(etag, last_modified, data)
+        self.cache.set(
+            self._key(resource, pk, request), tuple(entry), timeout=self._timeout()
+        )
+        return entry
+
+    def invalidate(self, kind, pk):
+        """Drop every cached response that follows the object `kind`:`pk`."""
+        key = self._version_key(kind, pk)
+        try:
+            self.cache.incr(key)
+        except ValueError:  # not cached: the next read starts a fresh version
+            pass
+
+    def invalidate_on_commit(self, kind, pk):
+        transaction.on_commit(lambda: self.invalidate(kind, pk))
+
+    # hit/miss counters, shared by every process using the same backend
+
+    def _count(self, resource, outcome):
+        key = f"{KEY_PREFIX}:stats:{resource}:{outcome}"
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            if not self.cache.add(key, 1, timeout=None):
+                self.cache.incr(key)
+
+    def stats(self):
+        """{resource: {"hits": n, "misses": n}} since the last reset."""
+        keys = {
+            (resource, outcome): f"{KEY_PREFIX}:stats:{resource}:{outcome}"
+            for resource in RESOURCES
+            for outcome in ("hits", "misses")
+        }
+        values = self.cache.get_many(keys.values())
+        stats = {resource: {"hits": 0, "misses": 0} for resource in RESOURCES}
+        for (resource, outcome), key in keys.items():
+            stats[resource][outcome] = values.get(key, 0)
+        return stats
+
+    def reset_stats(self):
+        self.cache.delete_many(
+            [
+                f"{KEY_PREFIX}:stats:{resource}:{outcome}"
+                for resource in RESOURCES
+                for outcome in ("hits", "misses")
+            ]
+        )
+
+
+response_cache = ResponseCache()
+
+
+class JoinedEventsCache:
+    """
+    The ids of the events each user has joined, kept in process memory for the
+    `size` most recently used users. Entries follow the "joined" version of the
+    user in the response cache, which api.signals bumps when a join or leave
+    commits. Other processes see the bump, and drop a stale set on their next
+    lookup, only when that cache is shared (CACHE_BACKEND "file" on one host,
+    "redis" across hosts); with the per-process "locmem" default, only the
+    process that handled the write does.
+    """
+
+    def __init__(self, size=None):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _size(self):
+        if self.size is not None:
+            return self.size
+        return settings.JOINED_EVENTS_CACHE_SIZE
+
+    def get(self, user_id, load):
+        """
+        The frozenset of str event ids the user has joined, from memory or else
+        from load(). load() may return None for a set too large to keep, which
+        is returned as is.
+        """
+        key = _canonical(user_id)
+        # read before loading: a join committed meanwhile bumps past it
+        version = response_cache._version("joined", key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        events = load()
+        if events is None:
+            return None
+        events = frozenset(str(event_id) for event_id in events)
+        with self._lock:
+            self._entries[key] = (version, events)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._size():
+                self._entries.popitem(last=False)
+        return events
+
+    def invalidate_on_commit(self, user_id):
+        response_cache.invalidate_on_commit("joined", user_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+joined_events = JoinedEventsCache()
+
+
+def cached_detail(request, resource, pk, load, serializer_class):
+    """
+    Respond with the serialized object from the cache, or else load() it (which
+    raises DoesNotExist when missing), serialize it and cache the result.
+    Conditional requests are answered with a 304 either way.
+    """
+    entry = response_cache.get(resource, pk, request)
+    if entry is None:
+        instance = load()
+        etag, last_modified = validators(request, instance, instance.time_updated)
+    else:
+        etag, last_modified = entry.etag, entry.last_modified
+
+    if (response := not_modified(request, etag, last_modified)) is not None:
+        return response
+
+    if entry is None:
+        data = serializer_class(instance, context={"request": request}).data
+        entry = response_cache.set(resource, pk, request, etag, last_modified, data)
+    return with_validators(Response(entry.data), etag, last_modified)
@@ -0,0 +1,136 @@
+"""
+Nearby search in plain Postgres: geohash prefixes narrow the candidates through
+a B-tree index, and an exact great-circle distance filters and orders them.
+
+A geohash names a cell of a grid that halves longitude and latitude in turn; a
+longer hash is a smaller cell inside the cell of each of its prefixes, so the
+points in a cell are a prefix range of the index (LIKE 'wydm%'). A search area
+is covered by a few cells (covering_cells) and the candidates are then checked
+with the haversine distance (distance_expression):
+
+    cells = covering_cells(*bounding_box(lat, lon, radius))
+
+Areas crossing the antimeridian are clipped at it.
+"""
+
+import math
+
+from django.db.models import F, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# stored precision: cells of about 4.8m x 4.8m
+GEOHASH_PRECISION = 9
+
+# a search area is covered by at most this many prefixes (OR-ed index ranges)
+MAX_COVER_CELLS = 16
+
+# mean earth radius, in meters
+EARTH_RADIUS = 6_371_008.8
+
+# search radius of GET /events/nearby/, in meters
+DEFAULT_NEARBY_RADIUS = 5_000
+MAX_NEARBY_RADIUS = 50_000
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Geohash of a point, e.g. encode(37.5665, 126.978) == "wydm9qy89"."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # even bits split longitude, odd bits latitude
+    while len(chars) < precision:
+        coordinate, bounds = (longitude, lon_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = value = 0
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """(latitude, longitude) extent in degrees of a cell of `precision`."""
+    lon_bits = math.ceil(5 * precision / 2)
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2**lat_bits, 360.0 / 2**lon_bits
+
+
+def bounding_box(latitude, longitude, radius):
+    """(min_lat, min_lon, max_lat, max_lon) around a circle of `radius` meters."""
+    dlat = math.degrees(radius / EARTH_RADIUS)
+    cos_lat = math.cos(math.radians(latitude))
+    dlon = 180.0 if cos_lat < 1e-9 else math.degrees(radius / (EARTH_RADIUS * cos_lat))
+    return (
+        max(-90.0, latitude - dlat),
+        max(-180.0, longitude - dlon),
+        min(90.0, latitude + dlat),
+        min(180.0, longitude + dlon),
+    )
+
+
+def covering_cells(min_lat, min_lon, max_lat, max_lon, max_cells=MAX_COVER_CELLS):
+    """
+    Geohash prefixes whose cells together cover the box: the longest precision
+    that needs at most `max_cells` of them. [""] (everything) if none does.
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_step, lon_step = cell_size(precision)
+        rows = range(
+            math.floor((min_lat + 90) / lat_step),
+            min(math.floor((max_lat + 90) / lat_step), round(180 / lat_step) - 1) + 1,
+        )
+        columns = range(
+            math.floor((min_lon + 180) / lon_step),
+            min(math.floor((max_lon + 180) / lon_step), round(360 / lon_step) - 1) + 1,
+        )
+        if len(rows) * len(columns) > max_cells:
+            continue
+        return sorted(
+            {
+                encode(
+                    -90 + (row + 0.5) * lat_step,
+                    -180 + (column + 0.5) * lon_step,
+                    precision,
+                )
+                for row in rows
+                for column in columns
+            }
+        )
+    return [""]
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance in meters between two points."""
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = (
+        math.sin(dlat / 2) ** 2
+        + math.cos(math.radians(lat1))
+        * math.cos(math.radians(lat2))
+        * math.sin(dlon / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def distance_expression(latitude, longitude, lat, lon):
+    """
+    Haversine distance in meters from the point (lat, lon) to the point in the
+    fields `latitude` and `longitude`, as a database expression.
+    """
+    half_dlat = Radians(F(latitude) - Value(lat)) / Value(2.0)
+    half_dlon = Radians(F(longitude) - Value(lon)) / Value(2.0)
+    a = Power(Sin(half_dlat), 2) + Value(math.cos(math.radians(lat))) * Cos(
+        Radians(F(latitude))
+    ) * Power(Sin(half_dlon), 2)
+    return Value(2 * EARTH_RADIUS) * ASin(Least(Sqrt(a), Value(1.0)))
@@ -0,0 +1,116 @@
+import asyncio
+import weakref
+
+import httpx
+from django.conf import settings
+
+FORM_CONTENT_TYPE = "application/x-www-form-urlencoded;charset=utf-8"
+
+# keep-alive connections kept open to each Kakao host
+KAKAO_MAX_KEEPALIVE = 20
+
+
+class KakaoError(Exception):
+    """
+    A Kakao call failed; `status` is the HTTP status to answer with, and `code`
+    the OAuth "error" Kakao answered with (e.g. "invalid_grant"), if any.
+    """
+
+    def __init__(self, message, status, code=None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+class KakaoClient:
+    """
+    Async client for the two calls of the Kakao login callback, and for token
+    refreshes (api.tasks.refresh_provider_tokens).
+
+    Requests go through one httpx.AsyncClient with keep-alive connections and a
+    strict timeout, so a slow Kakao holds a coroutine rather than a worker.
+    An AsyncClient belongs to one event loop; use get_kakao_client() to share one
+    per loop.
+    Usage: token = await get_kakao_client().fetch_token(code, redirect_uri)
+    """
+
+    def __init__(self, auth_url=None, api_url=None, timeout=None, connect_timeout=None):
+        self.auth_url = auth_url or settings.KAKAO_AUTH_URL
+        self.api_url = api_url or settings.KAKAO_API_URL
+        self.http = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                timeout or settings.KAKAO_TIMEOUT,
+                connect=connect_timeout or settings.KAKAO_CONNECT_TIMEOUT,
+            ),
+            limits=httpx.Limits(max_keepalive_connections=KAKAO_MAX_KEEPALIVE),
+            headers={"Content-Type": FORM_CONTENT_TYPE},
+        )
+
+    async def fetch_token(self, code, redirect_uri):
+        """POST /oauth/token: exchange the authorization code for tokens."""
+        return await self._post(
+            f"{self.auth_url}/oauth/token",
+            "access token",
+            data={
+                "grant_type": "authorization_code",
+                "client_id": settings.KAKAO_REST_API_KEY,
+                "client_secret": settings.KAKAO_REST_API_SECRET,
+                "redirect_uri": redirect_uri,
+                "code": code,
+            },
+        )
+
+    async def fetch_user(self, access_token):
+        """POST /v2/user/me: the account the token belongs to."""
+        return await self._post(
+            f"{self.api_url}/v2/user/me",
+            "user info",
+            data={"property_keys": '["kakao_account.profile"]'},
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+
+    async def refresh_token(self, refresh_token):
+        """POST /oauth/token: a new access token (and maybe refresh token)."""
+        return await self._post(
+            f"{self.auth_url}/oauth/token",
+            "refreshed token",
+            data={
+                "grant_type": "refresh_token",
+                "client_id": settings.KAKAO_REST_API_KEY,
+                "client_secret": settings.KAKAO_REST_API_SECRET,
+                "refresh_token": refresh_token,
+            },
+        )
+
+    async def _post(self, url, what, **kwargs):
+        try:
+            response = await self.http.post(url, **kwargs)
+        except httpx.TimeoutException:
+            raise KakaoError(f"Timed out retrieving {what}", status=504)
+        except httpx.HTTPError:
+            raise KakaoError(f"Failed to retrieve {what}", status=502)
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {}
+        if response.is_error:
+            code = payload.get("error") if isinstance(payload, dict) else None
+            raise KakaoError(
+                f"Failed to retrieve {what}", status=response.status_code, code=code
+            )
+        return payload
+
+    async def aclose(self):
+        await self.http.aclose()
+
+
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_kakao_client():
+    """The client of the running event loop, created on first use."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = KakaoClient()
+    return client
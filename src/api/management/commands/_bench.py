@@ -0,0 +1,22 @@
+"""Shared helpers for the bench_* and loadtest management commands."""
+
+import statistics
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies):
+    """Latency summary in milliseconds for a list of durations in seconds."""
+    ms = [latency * 1000 for latency in latencies]
+    return {
+        "count": len(ms),
+        "mean": statistics.fmean(ms),
+        "p50": percentile(ms, 50),
+        "p95": percentile(ms, 95),
+        "p99": percentile(ms, 99),
+    }
@@ -0,0 +1,96 @@
+import copy
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection, transaction
+from django.test import Client
+
+from api.management.commands._bench import summarize
+from api.models.common import Location
+from api.models.event import EventDetail, EventLocation, EventView, UserEvent
+from api.models.user import UserDetail, UserLocation
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark per-request latency of the existing endpoints with a new "
+        "connection per request versus the configured DB_CONNECTION_MODE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests", type=int, default=200, help="Requests per endpoint"
+        )
+
+    def handle(self, *args, **options):
+        user, event, location = self._create_fixtures()
+        endpoints = [
+            f"/api/events/{event.event_id}/",
+            f"/api/events/{event.event_id}/spots/",
+            f"/api/users/{user.user_id}/",
+            f"/api/users/{user.user_id}/notifications/",
+            f"/api/users/{user.user_id}/unread_count/",
+            f"/api/users/{user.user_id}/recommended_events/",
+        ]
+        original = copy.deepcopy(connection.settings_dict)
+        modes = ["none", settings.DB_CONNECTION_MODE]
+
+        try:
+            self.stdout.write(
+                f"{'endpoint':<40} {'mode':<11} {'mean':>7} {'p50':>7} {'p95':>7} (ms)"
+            )
+            for endpoint in endpoints:
+                name = endpoint.replace(str(event.event_id), "{id}").replace(
+                    str(user.user_id), "{id}"
+                )
+                for mode in dict.fromkeys(modes):
+                    self._configure(mode, original)
+                    stats = summarize(self._run(endpoint, options["requests"]))
+                    self.stdout.write(
+                        f"{name:<40} {mode:<11} {stats['mean']:>7.2f} "
+                        f"{stats['p50']:>7.2f} {stats['p95']:>7.2f}"
+                    )
+        finally:
+            self._configure(settings.DB_CONNECTION_MODE, original)
+            EventView.objects.filter(event_id=event).delete()
+            event.delete()
+            user.delete()
+            location.delete()
+
+    def _configure(self, mode, original):
+        connection.close()
+        if hasattr(connection, "close_pool"):
+            connection.close_pool()
+        connection.settings_dict.clear()
+        connection.settings_dict.update(copy.deepcopy(original))
+        if mode == "none":
+            connection.settings_dict["CONN_MAX_AGE"] = 0
+            connection.settings_dict["OPTIONS"].pop("pool", None)
+
+    def _run(self, endpoint, count):
+        client = Client(HTTP_HOST="localhost")
+        latencies = []
+        for _ in range(count):
+            # what the WSGI handler does around every request (the test client
+            # skips it), so connection reuse is measured as in production
+            start = perf_counter()
+            close_old_connections()
+            response = client.get(endpoint)
+            close_old_connections()
+            latencies.append(perf_counter() - start)
+            if response.status_code >= 500:
+                raise RuntimeError(f"{endpoint} returned {response.status_code}")
+        return latencies
+
+    @transaction.atomic
+    def _create_fixtures(self):
+        location = Location.objects.create(province="Bench", city="Bench", town="Bench")
+        user = UserDetail.objects.create(name="bench-user")
+        UserLocation.objects.create(user_id=user, location_id=location)
+        event = EventDetail.objects.create(
+            event_name="Bench Event", capacity=100, duration=60, address="Bench"
+        )
+        EventLocation.objects.create(event_id=event, location_id=location)
+        UserEvent.objects.create(user_id=user, event_id=event)
+        return user, event, location
@@ -0,0 +1,123 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+
+from api.management.commands._bench import summarize
+from api.models.event import EventDetail
+
+# event names and descriptions are drawn from these words
+WORDS = [
+    "running",
+    "soccer",
+    "festival",
+    "concert",
+    "yoga",
+    "hiking",
+    "coffee",
+    "books",
+    "market",
+    "cooking",
+    "러닝",
+    "축구",
+    "축제",
+    "콘서트",
+    "요가",
+    "등산",
+    "커피",
+    "독서",
+    "플리마켓",
+    "요리",
+]
+
+# query kinds: an English word, a Korean word, two words, a typo
+QUERIES = {
+    "word": "festival",
+    "korean": "축구",
+    "two words": "yoga coffee",
+    "typo": "consert",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark GET /api/events/search/ as the events table grows. Synthetic "
+        "events are inserted in a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="10000,100000,1000000",
+            help="Comma-separated event counts to measure at",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=50, help="Requests per query and size"
+        )
+        parser.add_argument(
+            "--keep", action="store_true", help="Keep the synthetic events"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted(int(size) for size in options["sizes"].split(","))
+        except ValueError:
+            raise CommandError("--sizes must be comma-separated integers")
+
+        self.stdout.write(
+            f"{'events':>9} {'query':<10} "
+            f"{'mean':>7} {'p50':>7} {'p95':>7} {'p99':>7} (ms)"
+        )
+        with transaction.atomic():
+            total = EventDetail.objects.count()
+            for size in sizes:
+                if size > total:
+                    self._insert(total, size - total)
+                    total = size
+                for kind, q in QUERIES.items():
+                    stats = summarize(self._run(q, options["requests"]))
+                    self.stdout.write(
+                        f"{total:>9} {kind:<10} {stats['mean']:>7.2f} "
+                        f"{stats['p50']:>7.2f} {stats['p95']:>7.2f} "
+                        f"{stats['p99']:>7.2f}"
+                    )
+            if not options["keep"]:
+                transaction.set_rollback(True)
+
+    def _insert(self, start, count):
+        """Insert `count` events with random names, then refresh the statistics."""
+        table = EventDetail._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (
+                    event_id, event_name, description, main_image_hash, capacity,
+                    duration, status, address, time_created, time_updated,
+                    view_count, is_featured
+                )
+                SELECT
+                    gen_random_uuid(),
+                    w[1 + floor(random() * n)::int] || ' '
+                        || w[1 + floor(random() * n)::int] || ' ' || i,
+                    w[1 + floor(random() * n)::int] || ' '
+                        || w[1 + floor(random() * n)::int] || ' '
+                        || w[1 + floor(random() * n)::int],
+                    '', 20, 60, 'planned', i || ' Bench-ro', now(), now(), 0, false
+                FROM generate_series(%s, %s) AS i,
+                    (SELECT %s::text[] AS w, %s AS n) AS vocabulary
+                """,
+                [start, start + count - 1, WORDS, len(WORDS)],
+            )
+            cursor.execute(f"ANALYZE {table}")
+
+    def _run(self, q, count):
+        client = Client(HTTP_HOST="localhost")
+        latencies = []
+        for _ in range(count):
+            start = perf_counter()
+            response = client.get("/api/events/search/", {"q": q})
+            latencies.append(perf_counter() - start)
+            if response.status_code != 200:
+                raise RuntimeError(f"search for {q!r} returned {response.status_code}")
+        return latencies
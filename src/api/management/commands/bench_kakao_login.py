@@ -0,0 +1,97 @@
+import asyncio
+from time import perf_counter
+
+import httpx
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from api.management.commands._bench import summarize
+from api.models.user import Authentication, UserDetail
+from api.stubs import StubKakaoServer
+
+# Kakao ids of the benchmark accounts, far from real ones
+BENCH_KAKAO_ID = 9_000_000_000
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark concurrent Kakao logins: the ASGI application is served in "
+        "process against a local stub of Kakao answering after --delay seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Logins to run")
+        parser.add_argument(
+            "--concurrency", type=int, default=50, help="Logins in flight at once"
+        )
+        parser.add_argument(
+            "--delay",
+            type=float,
+            default=0.1,
+            help="Seconds the stub takes to answer each Kakao call",
+        )
+
+    def handle(self, *args, **options):
+        kakao_ids = [BENCH_KAKAO_ID + i for i in range(options["requests"])]
+        try:
+            with StubKakaoServer(delay=options["delay"]) as stub:
+                codes = [
+                    stub.authorize(kakao_id, f"bench-{kakao_id}")
+                    for kakao_id in kakao_ids
+                ]
+                with override_settings(KAKAO_AUTH_URL=stub.url, KAKAO_API_URL=stub.url):
+                    start = perf_counter()
+                    latencies, statuses = asyncio.run(
+                        self._run(codes, options["concurrency"])
+                    )
+                    elapsed = perf_counter() - start
+        finally:
+            self._cleanup(kakao_ids)
+
+        stats = summarize(latencies)
+        # each login waits on two Kakao calls
+        serial = 2 * options["delay"] * options["requests"]
+        self.stdout.write(
+            f"{stats['count']} logins, concurrency {options['concurrency']}, "
+            f"Kakao delay {options['delay'] * 1000:.0f}ms"
+        )
+        self.stdout.write(
+            f"mean {stats['mean']:.1f}  p50 {stats['p50']:.1f}  "
+            f"p95 {stats['p95']:.1f}  p99 {stats['p99']:.1f} (ms)"
+        )
+        self.stdout.write(
+            f"{elapsed:.2f}s total ({stats['count'] / elapsed:.1f} logins/s), "
+            f"{serial:.2f}s if run one at a time; statuses {statuses}"
+        )
+        self.stdout.write(f"max concurrent Kakao calls: {stub.max_in_flight}")
+
+    async def _run(self, codes, concurrency):
+        transport = httpx.ASGITransport(app=get_asgi_application())
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        statuses = {}
+
+        async def login(client, code):
+            async with semaphore:
+                start = perf_counter()
+                response = await client.get(
+                    "/api/auth/kakao/callback", params={"code": code, "state": "bench"}
+                )
+                latencies.append(perf_counter() - start)
+                statuses[response.status_code] = (
+                    statuses.get(response.status_code, 0) + 1
+                )
+
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://localhost"
+        ) as client:
+            await asyncio.gather(*(login(client, code) for code in codes))
+        return latencies, statuses
+
+    def _cleanup(self, kakao_ids):
+        auths = Authentication.objects.filter(
+            provider_user_id__in=[str(kakao_id) for kakao_id in kakao_ids]
+        )
+        UserDetail.objects.filter(userauthentication__auth_id__in=auths).delete()
+        auths.delete()
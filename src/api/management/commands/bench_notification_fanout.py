@@ -0,0 +1,68 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.models.event import EventDetail, UserEvent
+from api.models.notification import EventNotification
+from api.models.user import UserDetail
+from api.tasks import fan_out_notification
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the notification fan-out: query count and wall time "
+        "against participant count. All data is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--participants",
+            type=int,
+            nargs="+",
+            default=[1, 10, 100, 1000, 5000],
+            help="Participant counts to benchmark",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'participants':>12} {'queries':>8} {'time (ms)':>10}")
+
+        for size in options["participants"]:
+            queries, elapsed = self._run(size)
+            self.stdout.write(f"{size:>12} {queries:>8} {elapsed * 1000:>10.1f}")
+
+    def _run(self, size):
+        try:
+            with transaction.atomic():
+                event = EventDetail.objects.create(
+                    event_name="Benchmark Event",
+                    capacity=size,
+                    duration=60,
+                    address="Benchmark",
+                )
+                # users without push tokens: this measures the database side only
+                users = UserDetail.objects.bulk_create(
+                    [UserDetail(name=f"bench-{i}") for i in range(size)]
+                )
+                UserEvent.objects.bulk_create(
+                    [UserEvent(user_id=user, event_id=event) for user in users]
+                )
+                notification = EventNotification.objects.create(
+                    event_id=event, detail="Benchmark notification"
+                )
+
+                with CaptureQueriesContext(connection) as ctx:
+                    start = perf_counter()
+                    fan_out_notification(notification)
+                    elapsed = perf_counter() - start
+
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        return len(ctx.captured_queries), elapsed
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.cache import response_cache
+
+
+class Command(BaseCommand):
+    help = "Show hit/miss counters of the API response cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset", action="store_true", help="Reset the counters afterwards"
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"backend: {settings.CACHE_BACKEND}")
+        self.stdout.write(f"{'resource':<10} {'hits':>9} {'misses':>9} {'hit rate':>9}")
+        for resource, counts in response_cache.stats().items():
+            total = counts["hits"] + counts["misses"]
+            rate = f"{counts['hits'] / total:.1%}" if total else "-"
+            self.stdout.write(
+                f"{resource:<10} {counts['hits']:>9} {counts['misses']:>9} {rate:>9}"
+            )
+        if options["reset"]:
+            response_cache.reset_stats()
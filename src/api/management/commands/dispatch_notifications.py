@@ -0,0 +1,77 @@
+import logging
+import select
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from api.models.notification import NotificationOutbox
+from api.tasks import dispatch_notifications
+
+logger = logging.getLogger(__name__)
+
+
+def listen():
+    """LISTEN on the outbox channel with the current connection."""
+    connection.ensure_connection()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"LISTEN {connection.ops.quote_name(NotificationOutbox.CHANNEL)}"
+        )
+
+
+def wait_for_notify(timeout):
+    """
+    Block until a NOTIFY arrives on the listening connection or `timeout`
+    seconds pass. Returns whether one arrived; queued ones are consumed.
+    """
+    raw = connection.connection
+    if hasattr(raw, "poll"):  # psycopg2
+        raw.poll()
+        if not raw.notifies and select.select([raw], [], [], timeout)[0]:
+            raw.poll()
+        notified = bool(raw.notifies)
+        raw.notifies.clear()
+        return notified
+    # psycopg 3
+    return any(True for _ in raw.notifies(timeout=timeout, stop_after=1))
+
+
+class Command(BaseCommand):
+    help = (
+        "Fan out EventNotifications from the transactional outbox, woken by "
+        "Postgres LISTEN/NOTIFY. Several dispatchers can run side by side."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sweep-interval",
+            type=float,
+            default=30,
+            help="Seconds between checks for retries without a NOTIFY",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Dispatch what is due and exit instead of listening",
+        )
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            count = dispatch_notifications()
+            self.stdout.write(f"Dispatched {count} notifications")
+            return
+
+        self.stdout.write(f"Listening on {NotificationOutbox.CHANNEL}")
+        while True:
+            try:
+                listen()
+                # entries committed before LISTEN sent no NOTIFY we can see
+                dispatch_notifications()
+                while True:
+                    wait_for_notify(options["sweep_interval"])
+                    dispatch_notifications()
+            except DatabaseError:
+                logger.exception("Notification dispatcher lost its connection")
+                connection.close()
+                time.sleep(1)
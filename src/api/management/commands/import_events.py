@@ -0,0 +1,63 @@
+import sys
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from api.bulk_import import (
+    IMPORT_CHUNK_SIZE,
+    INPUT_FORMATS,
+    BulkImportError,
+    EventImporter,
+    input_format,
+)
+from api.models.user import UserDetail
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-import events with their location and categories from CSV or NDJSON "
+        "using COPY, in one transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help='Input file, or "-" for stdin')
+        parser.add_argument(
+            "--format",
+            dest="input_format",
+            choices=INPUT_FORMATS,
+            help="Input format (default: from the file extension)",
+        )
+        parser.add_argument("--organizer", help="user_id to set as organizer")
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["input_format"] or input_format(path)
+        if fmt is None:
+            raise CommandError("Cannot tell the input format; pass --format")
+
+        organizer = None
+        if options["organizer"]:
+            try:
+                organizer = UserDetail.objects.get(pk=options["organizer"])
+            except (UserDetail.DoesNotExist, ValidationError):
+                raise CommandError(f"User {options['organizer']} not found")
+
+        importer = EventImporter(organizer, chunk_size=options["chunk_size"])
+        try:
+            if path == "-":
+                result = importer.run(sys.stdin, fmt)
+            else:
+                with open(path, newline="", encoding="utf-8") as stream:
+                    result = importer.run(stream, fmt)
+        except (BulkImportError, OSError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result['events']} events "
+                f"({result['locations']} new locations, "
+                f"{result['categories']} new categories) in {result['seconds']}s, "
+                f"{result['rows_per_second']} rows/s"
+            )
+        )
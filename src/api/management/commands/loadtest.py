@@ -0,0 +1,190 @@
+import random
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from api.management.commands._bench import summarize
+from api.models.event import EventDetail
+from api.models.user import UserDetail
+from helper.types import OPEN_EVENT_STATUSES
+
+# endpoint name -> (method, path template); {event} and {user} are sampled ids
+ENDPOINTS = {
+    "event": ("GET", "/api/events/{event}/"),
+    "spots": ("GET", "/api/events/{event}/spots/"),
+    "join": ("POST", "/api/events/{event}/join/"),
+    "user": ("GET", "/api/users/{user}/"),
+    "notifications": ("GET", "/api/users/{user}/notifications/"),
+    "unread_count": ("GET", "/api/users/{user}/unread_count/"),
+    "recommended_events": ("GET", "/api/users/{user}/recommended_events/"),
+}
+
+# read-heavy, like the app's traffic
+DEFAULT_MIX = "event=30,spots=15,notifications=15,unread_count=15,user=10,recommended_events=10,join=5"
+
+
+def parse_mix(value):
+    """Parse "name=weight,..." into {name: weight}."""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise CommandError(
+                f"Unknown endpoint {name!r}; choose from {', '.join(ENDPOINTS)}"
+            )
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise CommandError(f"Invalid weight for {name!r}: {weight!r}")
+    if not any(mix.values()):
+        raise CommandError("--mix needs at least one positive weight")
+    return mix
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a weighted mix of API requests against a running server with "
+        "concurrent clients and report latency percentiles and throughput. "
+        "Ids are sampled from the database (see seed_dataset)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://localhost:8000")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument(
+            "--duration", type=float, default=30, help="Seconds to run for"
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            help="Stop after this many requests instead of --duration",
+        )
+        parser.add_argument("--mix", default=DEFAULT_MIX, help="name=weight,...")
+        parser.add_argument(
+            "--sample", type=int, default=1000, help="Number of ids to sample"
+        )
+        parser.add_argument("--timeout", type=float, default=10)
+        parser.add_argument("--seed", type=int)
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options["mix"])
+        event_ids = [
+            str(pk)
+            for pk in EventDetail.objects.filter(status__in=OPEN_EVENT_STATUSES)
+            .order_by("?")
+            .values_list("pk", flat=True)[: options["sample"]]
+        ]
+        user_ids = [
+            str(pk)
+            for pk in UserDetail.objects.order_by("?").values_list("pk", flat=True)[
+                : options["sample"]
+            ]
+        ]
+        if not event_ids or not user_ids:
+            raise CommandError("No events or users found; run seed_dataset first")
+
+        self.base_url = options["base_url"].rstrip("/")
+        self.timeout = options["timeout"]
+        self.event_ids = event_ids
+        self.user_ids = user_ids
+        self.names = list(mix)
+        self.weights = list(mix.values())
+        self.results = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+        self.remaining = options["requests"]
+
+        self.stdout.write(
+            f"Running {options['concurrency']} clients against {self.base_url} "
+            + (
+                f"for {options['requests']} requests"
+                if options["requests"]
+                else f"for {options['duration']}s"
+            )
+        )
+        start = perf_counter()
+        deadline = None if options["requests"] else start + options["duration"]
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            workers = [
+                executor.submit(
+                    self._worker,
+                    deadline,
+                    random.Random(
+                        None if options["seed"] is None else options["seed"] + worker
+                    ),
+                )
+                for worker in range(options["concurrency"])
+            ]
+            for worker in workers:
+                worker.result()
+        elapsed = perf_counter() - start
+
+        self._report(elapsed)
+
+    def _take(self, deadline):
+        """Whether this worker should send another request."""
+        if deadline is not None:
+            return perf_counter() < deadline
+        with self.lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+    def _worker(self, deadline, rng):
+        session = requests.Session()
+        while self._take(deadline):
+            name = rng.choices(self.names, weights=self.weights)[0]
+            method, template = ENDPOINTS[name]
+            user_id = rng.choice(self.user_ids)
+            url = self.base_url + template.format(
+                event=rng.choice(self.event_ids), user=user_id
+            )
+            body = {"user_id": user_id} if method == "POST" else None
+
+            start = perf_counter()
+            try:
+                response = session.request(method, url, json=body, timeout=self.timeout)
+            except requests.RequestException:
+                with self.lock:
+                    self.errors[name] += 1
+                continue
+            latency = perf_counter() - start
+
+            with self.lock:
+                self.results[name].append(latency)
+                self.statuses[name][response.status_code] += 1
+                if response.status_code >= 500:
+                    self.errors[name] += 1
+        session.close()
+
+    def _report(self, elapsed):
+        self.stdout.write(
+            f"{'endpoint':<20} {'count':>7} {'rps':>8} {'p50':>8} {'p95':>8} "
+            f"{'p99':>8} {'errors':>7}  statuses"
+        )
+        everything = []
+        for name in self.names:
+            latencies = self.results[name]
+            everything += latencies
+            if not latencies:
+                continue
+            self._row(name, latencies, elapsed, self.errors[name], self.statuses[name])
+        if everything:
+            self._row("total", everything, elapsed, sum(self.errors.values()), {})
+        self.stdout.write(f"elapsed {elapsed:.1f}s")
+
+    def _row(self, name, latencies, elapsed, errors, statuses):
+        stats = summarize(latencies)
+        codes = " ".join(f"{code}:{n}" for code, n in sorted(statuses.items()))
+        self.stdout.write(
+            f"{name:<20} {stats['count']:>7} {stats['count'] / elapsed:>8.1f} "
+            f"{stats['p50']:>8.2f} {stats['p95']:>8.2f} {stats['p99']:>8.2f} "
+            f"{errors:>7}  {codes}"
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.tasks import reconcile_participant_counts
+
+
+class Command(BaseCommand):
+    help = "Recount EventDetail.participant_count from UserEvent, fixing drift."
+
+    def handle(self, *args, **options):
+        result = reconcile_participant_counts()
+        self.stdout.write(f"fixed {result['fixed']} events")
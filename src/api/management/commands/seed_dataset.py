@@ -0,0 +1,302 @@
+import random
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.models.common import Location
+from api.models.event import (
+    Category,
+    EventCategory,
+    EventDetail,
+    EventLocation,
+    UserEvent,
+)
+from api.models.notification import EventNotification, UserNotification
+from api.models.user import UserDetail, UserLocation
+from api.signals import rebuild_recommendation_index
+from api.tasks import reconcile_unread_counts
+from helper.types import EventStatus
+
+# row counts at --scale 1
+BASE_COUNTS = {
+    "users": 1000,
+    "events": 200,
+    "locations": 50,
+    "categories": 10,
+}
+
+# locations are spread over this box; venues lie within ~5km of their location
+KOREA_LATITUDES = (34.5, 38.0)
+KOREA_LONGITUDES = (126.5, 129.3)
+
+# share of events per status
+STATUS_WEIGHTS = {
+    EventStatus.PLANNED: 60,
+    EventStatus.ONGOING: 15,
+    EventStatus.COMPLETED: 20,
+    EventStatus.CANCELLED: 5,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic dataset (users, events, locations, categories, "
+        "participations and notifications) for load testing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale", type=float, default=1.0, help="Multiplier for the row counts"
+        )
+        for name, count in BASE_COUNTS.items():
+            parser.add_argument(
+                f"--{name}", type=int, help=f"Number of {name} (default {count})"
+            )
+        parser.add_argument(
+            "--participants",
+            type=int,
+            default=20,
+            help="Average participants per event; popular events get more",
+        )
+        parser.add_argument(
+            "--notifications",
+            type=int,
+            default=2,
+            help="Notifications sent to the participants of each event",
+        )
+        parser.add_argument(
+            "--read-ratio",
+            type=float,
+            default=0.7,
+            help="Share of delivered notifications already read",
+        )
+        parser.add_argument(
+            "--days", type=int, default=90, help="Spread creation times over N days"
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        counts = {
+            name: options[name]
+            if options[name] is not None
+            else max(1, round(count * options["scale"]))
+            for name, count in BASE_COUNTS.items()
+        }
+        if not 0 <= options["read_ratio"] <= 1:
+            raise CommandError("--read-ratio must be between 0 and 1")
+
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+
+        with transaction.atomic():
+            locations = self._locations(counts["locations"])
+            categories = self._categories(counts["categories"])
+            users = self._users(counts["users"], locations)
+            events = self._events(counts["events"], locations, categories)
+            participants = self._participations(events, users, options["participants"])
+            delivered = self._notifications(
+                events,
+                participants,
+                options["notifications"],
+                options["read_ratio"],
+            )
+            self._backdate(events, options["days"], options["seed"])
+
+        rebuild_recommendation_index()
+        reconcile_unread_counts()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {len(locations)} locations, {len(categories)} categories, "
+                f"{len(users)} users, {len(events)} events, "
+                f"{sum(map(len, participants.values()))} participations and "
+                f"{delivered} user notifications"
+            )
+        )
+
+    def _bulk_create(self, model, rows):
+        rows = iter(rows)
+        created = []
+        while batch := list(islice(rows, self.batch_size)):
+            created += model.objects.bulk_create(batch)
+        return created
+
+    def _locations(self, count):
+        return self._bulk_create(
+            Location,
+            (
+                Location(
+                    province=f"Province {i % 10}",
+                    city=f"City {i % 50}",
+                    town=f"Town {i}",
+                    latitude=self.rng.uniform(*KOREA_LATITUDES),
+                    longitude=self.rng.uniform(*KOREA_LONGITUDES),
+                )
+                for i in range(count)
+            ),
+        )
+
+    def _categories(self, count):
+        return self._bulk_create(
+            Category,
+            (Category(category_name=f"Category {i}") for i in range(count)),
+        )
+
+    def _users(self, count, locations):
+        users = self._bulk_create(
+            UserDetail,
+            (
+                UserDetail(
+                    name=f"user{i}",
+                    invite_code=f"seed{i}",
+                    expo_push_token=f"ExponentPushToken[seed{i}]"
+                    if self.rng.random() < 0.8
+                    else None,
+                )
+                for i in range(count)
+            ),
+        )
+        self._bulk_create(
+            UserLocation,
+            (
+                UserLocation(user_id=user, location_id=self.rng.choice(locations))
+                for user in users
+            ),
+        )
+        return users
+
+    def _events(self, count, locations, categories):
+        statuses = self.rng.choices(
+            list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()), k=count
+        )
+        events = self._bulk_create(
+            EventDetail,
+            (
+                EventDetail(
+                    event_name=f"Event {i}",
+                    description=f"Synthetic event {i}",
+                    capacity=self.rng.choice([10, 20, 50, 100, 500]),
+                    duration=self.rng.choice([30, 60, 90, 120]),
+                    status=status,
+                    address=f"{i} Seed-ro",
+                    is_featured=self.rng.random() < 0.05,
+                )
+                for i, status in enumerate(statuses)
+            ),
+        )
+        self._bulk_create(
+            EventLocation,
+            (
+                EventLocation(
+                    event_id=event,
+                    location_id=location,
+                    latitude=location.latitude + self.rng.uniform(-0.05, 0.05),
+                    longitude=location.longitude + self.rng.uniform(-0.05, 0.05),
+                )
+                for event in events
+                for location in self.rng.sample(
+                    locations, min(len(locations), self.rng.randint(1, 3))
+                )
+            ),
+        )
+        self._bulk_create(
+            EventCategory,
+            (
+                EventCategory(event_id=event, category_id=self.rng.choice(categories))
+                for event in events
+            ),
+        )
+        return events
+
+    def _participations(self, events, users, average):
+        """
+        Join users to events with a long-tailed popularity (Zipf-like weights),
+        capped by capacity. Returns {event: [user, ...]}.
+        """
+        weights = [1 / (rank + 1) ** 0.8 for rank in range(len(events))]
+        total = sum(weights)
+        ranked = self.rng.sample(events, len(events))
+        participants = {}
+        for event, weight in zip(ranked, weights):
+            wanted = round(average * len(events) * weight / total)
+            size = min(wanted, event.capacity, len(users))
+            participants[event] = self.rng.sample(users, size)
+
+        self._bulk_create(
+            UserEvent,
+            (
+                UserEvent(user_id=user, event_id=event)
+                for event, joined in participants.items()
+                for user in joined
+            ),
+        )
+        return participants
+
+    def _notifications(self, events, participants, per_event, read_ratio):
+        notifications = self._bulk_create(
+            EventNotification,
+            (
+                EventNotification(
+                    event_id=event,
+                    detail=f"Update {i} for {event.event_name}",
+                    from_admin=self.rng.random() < 0.1,
+                )
+                for event in events
+                for i in range(per_event)
+            ),
+        )
+        delivered = self._bulk_create(
+            UserNotification,
+            (
+                UserNotification(
+                    user_id=user,
+                    notification_id=notification,
+                    is_read=self.rng.random() < read_ratio,
+                )
+                for notification in notifications
+                for user in participants[notification.event_id]
+            ),
+        )
+        return len(delivered)
+
+    def _backdate(self, events, days, seed):
+        """
+        Spread creation times over the past `days` days (auto_now_add fields
+        cannot be set through bulk_create); notifications stay after their event.
+        """
+        event_table = EventDetail._meta.db_table
+        notification_table = EventNotification._meta.db_table
+        inbox_table = UserNotification._meta.db_table
+        event_ids = [str(event.pk) for event in events]
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT setseed(%s)", [(seed % 1000) / 1000])
+            cursor.execute(
+                f"""
+                UPDATE {event_table}
+                SET time_created = now() - random() * %s * interval '1 day'
+                WHERE event_id = ANY(%s::uuid[])
+                """,
+                [days, event_ids],
+            )
+            cursor.execute(
+                f"""
+                UPDATE {notification_table} n
+                SET time_created = e.time_created
+                    + random() * (now() - e.time_created)
+                FROM {event_table} e
+                WHERE e.event_id = n.event_id_id AND e.event_id = ANY(%s::uuid[])
+                """,
+                [event_ids],
+            )
+            cursor.execute(
+                f"""
+                UPDATE {inbox_table} u
+                SET time_created = n.time_created
+                FROM {notification_table} n
+                WHERE n.notification_id = u.notification_id_id
+                AND n.event_id_id = ANY(%s::uuid[])
+                """,
+                [event_ids],
+            )
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-17 15:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0008_alter_userdetail_last_login"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EventView",
+            fields=[
+                (
+                    "event_view_id",
+                    models.BigAutoField(primary_key=True, serialize=False),
+                ),
+                ("time_viewed", models.DateTimeField(auto_now_add=True)),
+                (
+                    "event_id",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        to="api.eventdetail",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-17 15:34
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def remove_duplicate_participations(apps, schema_editor):
+    """Keep the earliest UserEvent for each (user, event) pair."""
+    UserEvent = apps.get_model("api", "UserEvent")
+
+    duplicates = (
+        UserEvent.objects.values("user_id", "event_id")
+        .annotate(rows=Count("pk"))
+        .filter(rows__gt=1)
+    )
+    for duplicate in duplicates:
+        rows = UserEvent.objects.filter(
+            user_id=duplicate["user_id"], event_id=duplicate["event_id"]
+        ).order_by("time_joined", "pk")
+        keep = rows.first()
+        rows.exclude(pk=keep.pk).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0009_eventview"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_participations, migrations.RunPython.noop
+        ),
+        migrations.AlterUniqueTogether(
+            name="userevent",
+            unique_together={("user_id", "event_id")},
+        ),
+    ]
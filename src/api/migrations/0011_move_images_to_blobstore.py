@@ -0,0 +1,76 @@
+# Generated by Django 5.2.8 on 2026-10-17 15:35
+
+from django.db import migrations, models
+
+from api.blobstore import BlobStore
+
+# (model, old BinaryField, new digest field)
+IMAGE_FIELDS = [
+    ("EventDetail", "main_image", "main_image_hash"),
+    ("Category", "main_image", "main_image_hash"),
+    ("UserDetail", "profile_image", "profile_image_hash"),
+]
+
+
+def move_images_to_blobstore(apps, schema_editor):
+    """Write every stored image to the blob store and keep only its digest."""
+    store = BlobStore()
+    for model_name, binary_field, hash_field in IMAGE_FIELDS:
+        Model = apps.get_model("api", model_name)
+        rows = Model.objects.only("pk", binary_field).iterator(chunk_size=100)
+        for row in rows:
+            data = getattr(row, binary_field)
+            if data:
+                digest = store.put(bytes(data))
+                Model.objects.filter(pk=row.pk).update(**{hash_field: digest})
+
+
+def restore_images_from_blobstore(apps, schema_editor):
+    store = BlobStore()
+    for model_name, binary_field, hash_field in IMAGE_FIELDS:
+        Model = apps.get_model("api", model_name)
+        rows = Model.objects.exclude(**{hash_field: ""}).values_list("pk", hash_field)
+        for pk, digest in rows.iterator(chunk_size=100):
+            Model.objects.filter(pk=pk).update(**{binary_field: store.read(digest)})
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0010_userevent_unique"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="main_image_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="eventdetail",
+            name="main_image_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="userdetail",
+            name="profile_image_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.RunPython(move_images_to_blobstore, restore_images_from_blobstore),
+        # the old columns are dropped by 0023 once every copy is verified; until
+        # then new rows leave them empty
+        migrations.AlterField(
+            model_name="category",
+            name="main_image",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="eventdetail",
+            name="main_image",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="userdetail",
+            name="profile_image",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
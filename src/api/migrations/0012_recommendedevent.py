@@ -0,0 +1,70 @@
+# Generated by Django 5.2.8 on 2026-10-17 15:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+from helper.types import OPEN_EVENT_STATUSES
+
+
+def build_recommendation_index(apps, schema_editor):
+    EventDetail = apps.get_model("api", "EventDetail")
+    EventLocation = apps.get_model("api", "EventLocation")
+    RecommendedEvent = apps.get_model("api", "RecommendedEvent")
+
+    scores = dict(
+        EventDetail.objects.filter(status__in=OPEN_EVENT_STATUSES)
+        .annotate(participants=Count("userevent"))
+        .values_list("pk", "participants")
+    )
+    rows = (
+        RecommendedEvent(
+            location_id_id=location_id, event_id_id=event_id, score=scores[event_id]
+        )
+        for location_id, event_id in EventLocation.objects.filter(
+            event_id__status__in=OPEN_EVENT_STATUSES
+        ).values_list("location_id", "event_id")
+    )
+    RecommendedEvent.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0011_move_images_to_blobstore"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecommendedEvent",
+            fields=[
+                (
+                    "recommended_event_id",
+                    models.BigAutoField(primary_key=True, serialize=False),
+                ),
+                ("score", models.IntegerField(default=0)),
+                (
+                    "event_id",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="api.eventdetail",
+                    ),
+                ),
+                (
+                    "location_id",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="api.location"
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["location_id", "-score", "-recommended_event_id"],
+                        name="recommended_event_rank_idx",
+                    )
+                ],
+                "unique_together": {("location_id", "event_id")},
+            },
+        ),
+        migrations.RunPython(build_recommendation_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-17 15:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0012_recommendedevent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="usernotification",
+            name="time_created",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        # existing rows take the time of the notification they deliver
+        migrations.RunSQL(
+            """
+            UPDATE api_usernotification AS un
+            SET time_created = en.time_created
+            FROM api_eventnotification AS en
+            WHERE un.notification_id_id = en.notification_id
+            """,
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name="usernotification",
+            index=models.Index(
+                fields=["user_id", "-time_created", "-user_notification_id"],
+                name="user_notification_inbox_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="usernotification",
+            index=models.Index(
+                fields=["user_id", "is_read", "-time_created"],
+                name="user_notification_unread_idx",
+            ),
+        ),
+    ]
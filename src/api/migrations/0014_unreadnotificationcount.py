@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-17 15:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0013_usernotification_inbox"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UnreadNotificationCount",
+            fields=[
+                (
+                    "user_id",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to="api.userdetail",
+                    ),
+                ),
+                ("unread_count", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunSQL(
+            """
+            INSERT INTO api_unreadnotificationcount (user_id_id, unread_count)
+            SELECT user_id_id, COUNT(*)
+            FROM api_usernotification
+            WHERE NOT is_read
+            GROUP BY user_id_id
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-17 15:56
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0014_unreadnotificationcount"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationOutbox",
+            fields=[
+                ("outbox_id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "time_created",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "available_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("attempts", models.IntegerField(default=0)),
+                ("last_error", models.TextField(blank=True)),
+                (
+                    "notification_id",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="api.eventnotification",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["available_at", "outbox_id"],
+                        name="notification_outbox_due_idx",
+                    )
+                ],
+            },
+        ),
+    ]
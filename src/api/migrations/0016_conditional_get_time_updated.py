@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-17 16:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0015_notificationoutbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userdetail",
+            name="time_updated",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="category",
+            name="time_updated",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 16:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0016_conditional_get_time_updated"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="authentication",
+            index=models.Index(
+                fields=["provider_access_token_expires_at", "auth_id"],
+                name="auth_access_expiry_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.8 on 2026-10-17 16:44
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.indexes import OpClass
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0017_authentication_access_expiry_idx"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="eventdetail",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        # maintained on every write, including COPY (api.bulk_import)
+        migrations.RunSQL(
+            """
+            CREATE FUNCTION api_eventdetail_search_vector() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector :=
+                    setweight(to_tsvector('simple', coalesce(NEW.event_name, '')), 'A')
+                    || setweight(to_tsvector('simple', coalesce(NEW.address, '')), 'B')
+                    || setweight(
+                        to_tsvector('simple', coalesce(NEW.description, '')), 'C'
+                    );
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+
+            CREATE TRIGGER api_eventdetail_search_vector
+            BEFORE INSERT OR UPDATE OF event_name, address, description
+            ON api_eventdetail
+            FOR EACH ROW EXECUTE FUNCTION api_eventdetail_search_vector();
+
+            UPDATE api_eventdetail SET event_name = event_name;
+            """,
+            """
+            DROP TRIGGER api_eventdetail_search_vector ON api_eventdetail;
+            DROP FUNCTION api_eventdetail_search_vector();
+            """,
+        ),
+        migrations.AddIndex(
+            model_name="eventdetail",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="event_search_vector_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="eventdetail",
+            index=django.contrib.postgres.indexes.GinIndex(
+                OpClass("event_name", name="gin_trgm_ops"), name="event_name_trgm_idx"
+            ),
+        ),
+    ]
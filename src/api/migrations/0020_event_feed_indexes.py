@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0019_location_coordinates"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="eventdetail",
+            index=models.Index(
+                fields=["-time_created", "-event_id"], name="event_feed_recent_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="eventdetail",
+            index=models.Index(
+                fields=["-view_count", "-event_id"], name="event_feed_popular_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="eventdetail",
+            index=models.Index(
+                fields=["status", "-time_created", "-event_id"],
+                name="event_feed_status_recent_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="eventdetail",
+            index=models.Index(
+                fields=["status", "-view_count", "-event_id"],
+                name="event_feed_status_popular_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="eventdetail",
+            index=models.Index(
+                condition=models.Q(("is_featured", True)),
+                fields=["-time_created", "-event_id"],
+                name="event_feed_featured_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="eventcategory",
+            index=models.Index(
+                fields=["category_id", "event_id"], name="event_category_feed_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="eventlocation",
+            index=models.Index(
+                fields=["location_id", "event_id"], name="event_location_feed_idx"
+            ),
+        ),
+    ]
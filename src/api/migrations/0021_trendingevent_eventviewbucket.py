@@ -0,0 +1,61 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0020_event_feed_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EventViewBucket",
+            fields=[
+                (
+                    "event_view_bucket_id",
+                    models.BigAutoField(primary_key=True, serialize=False),
+                ),
+                ("hour", models.DateTimeField()),
+                ("views", models.IntegerField(default=0)),
+                (
+                    "event_id",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        to="api.eventdetail",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["hour"], name="event_view_bucket_hour_idx")
+                ],
+                "unique_together": {("event_id", "hour")},
+            },
+        ),
+        migrations.CreateModel(
+            name="TrendingEvent",
+            fields=[
+                (
+                    "trending_event_id",
+                    models.BigAutoField(primary_key=True, serialize=False),
+                ),
+                ("province", models.CharField(blank=True, max_length=20)),
+                ("rank", models.IntegerField()),
+                ("score", models.FloatField()),
+                ("time_computed", models.DateTimeField()),
+                (
+                    "event_id",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="api.eventdetail",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("province", "rank")},
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0021_trendingevent_eventviewbucket"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="eventdetail",
+            name="participant_count",
+            field=models.IntegerField(db_default=0, editable=False),
+        ),
+        # maintained on every write to api_userevent, including bulk_create and
+        # COPY; time_updated moves too, as the event's representation changed.
+        # now() is the transaction start, which a join that waited on the event
+        # row lock may hold from before the last write: take the wall clock, and
+        # never move time_updated (Last-Modified) backwards
+        migrations.RunSQL(
+            """
+            CREATE FUNCTION api_userevent_participant_count() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                    UPDATE api_eventdetail
+                    SET participant_count = participant_count - 1,
+                        time_updated = GREATEST(time_updated, clock_timestamp())
+                    WHERE event_id = OLD.event_id_id;
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    UPDATE api_eventdetail
+                    SET participant_count = participant_count + 1,
+                        time_updated = GREATEST(time_updated, clock_timestamp())
+                    WHERE event_id = NEW.event_id_id;
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql;
+
+            CREATE TRIGGER api_userevent_participant_count
+            AFTER INSERT OR DELETE OR UPDATE OF event_id_id
+            ON api_userevent
+            FOR EACH ROW EXECUTE FUNCTION api_userevent_participant_count();
+
+            UPDATE api_eventdetail AS e
+            SET participant_count = c.participants
+            FROM (
+                SELECT event_id_id, COUNT(*) AS participants
+                FROM api_userevent
+                GROUP BY event_id_id
+            ) AS c
+            WHERE c.event_id_id = e.event_id;
+            """,
+            """
+            DROP TRIGGER api_userevent_participant_count ON api_userevent;
+            DROP FUNCTION api_userevent_participant_count();
+            """,
+        ),
+    ]
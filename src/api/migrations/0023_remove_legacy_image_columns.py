@@ -0,0 +1,64 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:05
+
+from django.db import migrations
+
+from api.blobstore import BlobStore
+
+# (model, old BinaryField, digest field), as in 0011
+IMAGE_FIELDS = [
+    ("EventDetail", "main_image", "main_image_hash"),
+    ("Category", "main_image", "main_image_hash"),
+    ("UserDetail", "profile_image", "profile_image_hash"),
+]
+
+
+def verify_blobstore_copies(apps, schema_editor):
+    """
+    Refuse to drop the old image columns unless every image in them is in the
+    blob store byte for byte (e.g. BLOB_STORE_ROOT pointed at a disk that has
+    since been replaced).
+    """
+    store = BlobStore()
+    missing = []
+    for model_name, binary_field, hash_field in IMAGE_FIELDS:
+        Model = apps.get_model("api", model_name)
+        rows = Model.objects.exclude(**{f"{binary_field}__isnull": True}).values_list(
+            "pk", binary_field, hash_field
+        )
+        for pk, data, digest in rows.iterator(chunk_size=100):
+            if not data:
+                continue
+            try:
+                stored = store.read(digest)
+            except (FileNotFoundError, ValueError):
+                stored = None
+            if stored != bytes(data):
+                missing.append(f"{model_name} {pk}")
+    if missing:
+        raise RuntimeError(
+            f"{len(missing)} images are missing from the blob store at {store.root} "
+            f"(first: {', '.join(missing[:5])}); the image columns are kept. "
+            "Restore the store (BLOB_STORE_ROOT) and migrate again."
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0022_eventdetail_participant_count"),
+    ]
+
+    operations = [
+        migrations.RunPython(verify_blobstore_copies, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="category",
+            name="main_image",
+        ),
+        migrations.RemoveField(
+            model_name="eventdetail",
+            name="main_image",
+        ),
+        migrations.RemoveField(
+            model_name="userdetail",
+            name="profile_image",
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:43
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0023_remove_legacy_image_columns"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PushOutbox",
+            fields=[
+                ("push_id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("messages", models.JSONField()),
+                (
+                    "available_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("attempts", models.IntegerField(default=0)),
+                ("last_error", models.TextField(blank=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["available_at", "push_id"], name="push_outbox_due_idx"
+                    )
+                ],
+            },
+        ),
+    ]
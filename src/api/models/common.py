@@ -1,5 +1,49 @@
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 import uuid
+from api.geo import GEOHASH_PRECISION, encode
+
+
+def latitude_field():
+    return models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)],
+    )
+
+
+def longitude_field():
+    return models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)],
+    )
+
+
+class GeohashField(models.CharField):
+    """
+    The geohash of the model's `latitude` and `longitude` (see api.geo), set
+    whenever the row is written through the ORM, bulk_create or
+    api.bulk_import.copy_objects; blank without coordinates. Indexed for
+    prefix (LIKE) lookups.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("max_length", GEOHASH_PRECISION)
+        kwargs.setdefault("blank", True)
+        kwargs.setdefault("editable", False)
+        kwargs.setdefault("db_index", True)
+        super().__init__(*args, **kwargs)
+
+    def pre_save(self, model_instance, add):
+        latitude, longitude = model_instance.latitude, model_instance.longitude
+        value = (
+            encode(latitude, longitude)
+            if latitude is not None and longitude is not None
+            else ""
+        )
+        setattr(model_instance, self.attname, value)
+        return value
 
 
 class Location(models.Model):
@@ -8,3 +52,6 @@ class Location(models.Model):
     city = models.CharField(max_length=20)
     town = models.CharField(max_length=20)
     description = models.TextField(blank=True, max_length=100)
+    # centre of the area; searches "near" a location start from here
+    latitude = latitude_field()
+    longitude = longitude_field()
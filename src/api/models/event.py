@@ -1,8 +1,10 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connection, models
 import uuid
 from helper.types import EventStatus
 from api.models.user import UserDetail
-from api.models.common import Location
+from api.models.common import GeohashField, Location, latitude_field, longitude_field
 from django_enum import EnumField
 
 
@@ -10,7 +12,7 @@ class EventDetail(models.Model):
     event_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     event_name = models.CharField(max_length=50)
     description = models.TextField(blank=True, max_length=200)
-    main_image = models.BinaryField(blank=True)
+    main_image_hash = models.CharField(max_length=64, blank=True)  # api.blobstore
     capacity = models.IntegerField()
     duration = models.IntegerField()  # in minutes
     status = EnumField(EventStatus, default=EventStatus.PLANNED)
@@ -19,13 +21,117 @@ class EventDetail(models.Model):
     time_updated = models.DateTimeField(auto_now=True)
     view_count = models.IntegerField(default=0)
     is_featured = models.BooleanField(default=False)
+    # number of UserEvent rows; kept by a trigger on api_userevent, so joins
+    # written with bulk_create or COPY count too (see reconcile_participant_counts)
+    participant_count = models.IntegerField(db_default=0, editable=False)
+    # name, address and description; set by a trigger on write (see api.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="event_search_vector_idx"),
+            GinIndex(
+                OpClass("event_name", name="gin_trgm_ops"), name="event_name_trgm_idx"
+            ),
+            # event feed (EventViewSet.list): one index per sort order, with and
+            # without a leading status, and a small one for featured events
+            models.Index(
+                fields=["-time_created", "-event_id"], name="event_feed_recent_idx"
+            ),
+            models.Index(
+                fields=["-view_count", "-event_id"], name="event_feed_popular_idx"
+            ),
+            models.Index(
+                fields=["status", "-time_created", "-event_id"],
+                name="event_feed_status_recent_idx",
+            ),
+            models.Index(
+                fields=["status", "-view_count", "-event_id"],
+                name="event_feed_status_popular_idx",
+            ),
+            models.Index(
+                fields=["-time_created", "-event_id"],
+                condition=models.Q(is_featured=True),
+                name="event_feed_featured_idx",
+            ),
+        ]
+
+    # counters moved only by F() updates and triggers (flush_event_views, the
+    # participant trigger); a loaded instance holds a value that may be stale
+    COUNTER_FIELDS = ("view_count", "participant_count")
+
+    def save(self, *args, **kwargs):
+        # never write back a counter read before a concurrent increment
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+
+class EventView(models.Model):
+    """
+    Append-only log of event page views.
+    Rows are folded into EventDetail.view_count and deleted by the
+    `flush_event_views` beat task, so the read path never updates the event row.
+    """
+
+    event_view_id = models.BigAutoField(primary_key=True)
+    # no FK constraint: inserts must not take a key-share lock on the event row
+    event_id = models.ForeignKey(
+        EventDetail, on_delete=models.DO_NOTHING, db_constraint=False
+    )
+    time_viewed = models.DateTimeField(auto_now_add=True)
+
+
+class EventViewBucket(models.Model):
+    """
+    Views of an event per hour, folded in from EventView by `flush_event_views`
+    and dropped by `compute_trending_events` once older than its window.
+    """
+
+    event_view_bucket_id = models.BigAutoField(primary_key=True)
+    # no FK constraint, like EventView: buckets of deleted events just age out
+    event_id = models.ForeignKey(
+        EventDetail, on_delete=models.DO_NOTHING, db_constraint=False
+    )
+    hour = models.DateTimeField()
+    views = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = [("event_id", "hour")]
+        indexes = [models.Index(fields=["hour"], name="event_view_bucket_hour_idx")]
+
+    @classmethod
+    def add(cls, counts):
+        """Add views from {(event_id, hour): views} in one upsert."""
+        if not counts:
+            return
+        table = cls._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (event_id_id, hour, views)
+                SELECT * FROM unnest(%s::uuid[], %s::timestamptz[], %s::int[])
+                ON CONFLICT (event_id_id, hour)
+                DO UPDATE SET views = {table}.views + EXCLUDED.views
+                """,
+                [
+                    [str(event_id) for event_id, _ in counts],
+                    [hour for _, hour in counts],
+                    list(counts.values()),
+                ],
+            )
 
 
 class Category(models.Model):
     category_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     category_name = models.CharField(max_length=20)
-    main_image = models.BinaryField(blank=True)
+    main_image_hash = models.CharField(max_length=64, blank=True)  # api.blobstore
     description = models.TextField(blank=True, max_length=100)
+    time_updated = models.DateTimeField(auto_now=True)  # validator for conditional GET
 
 
 class EventCategory(models.Model):
@@ -35,6 +141,14 @@ class EventCategory(models.Model):
     event_id = models.ForeignKey(EventDetail, on_delete=models.CASCADE)
     category_id = models.ForeignKey(Category, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            # feed filter: the events of a category, answered from the index
+            models.Index(
+                fields=["category_id", "event_id"], name="event_category_feed_idx"
+            )
+        ]
+
 
 class EventLocation(models.Model):
     event_location_id = models.UUIDField(
@@ -42,6 +156,18 @@ class EventLocation(models.Model):
     )
     event_id = models.ForeignKey(EventDetail, on_delete=models.CASCADE)
     location_id = models.ForeignKey(Location, on_delete=models.CASCADE)
+    # where the event takes place, for nearby search (api.geo)
+    latitude = latitude_field()
+    longitude = longitude_field()
+    geohash = GeohashField()
+
+    class Meta:
+        indexes = [
+            # feed filter: the events of a location, answered from the index
+            models.Index(
+                fields=["location_id", "event_id"], name="event_location_feed_idx"
+            )
+        ]
 
 
 class EventLog(models.Model):
@@ -78,6 +204,9 @@ class UserEvent(models.Model):
     event_id = models.ForeignKey(EventDetail, on_delete=models.CASCADE)
     time_joined = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        unique_together = [("user_id", "event_id")]
+
 
 class UserEventLog(models.Model):
     user_event_log_id = models.UUIDField(
@@ -85,3 +214,45 @@ class UserEventLog(models.Model):
     )
     user_event_id = models.ForeignKey(UserEvent, on_delete=models.CASCADE)
     has_checked_in = models.BooleanField(default=False)
+
+
+class RecommendedEvent(models.Model):
+    """
+    Per-location recommendation index: one row for every open event (planned or
+    ongoing) in a location, ranked by `score` (its number of participants).
+    Maintained incrementally by api.signals as EventLocation, UserEvent and event
+    status change, so recommendations are a single range scan per location.
+    """
+
+    recommended_event_id = models.BigAutoField(primary_key=True)
+    location_id = models.ForeignKey(Location, on_delete=models.CASCADE)
+    event_id = models.ForeignKey(EventDetail, on_delete=models.CASCADE)
+    score = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = [("location_id", "event_id")]
+        indexes = [
+            models.Index(
+                fields=["location_id", "-score", "-recommended_event_id"],
+                name="recommended_event_rank_idx",
+            )
+        ]
+
+
+class TrendingEvent(models.Model):
+    """
+    Snapshot of the trending open events, overall (province "") and per
+    province, ranked from 1. Rewritten as a whole by the
+    `compute_trending_events` beat task, so the trending endpoint is a single
+    range read of (province, rank).
+    """
+
+    trending_event_id = models.BigAutoField(primary_key=True)
+    province = models.CharField(max_length=20, blank=True)
+    rank = models.IntegerField()
+    event_id = models.ForeignKey(EventDetail, on_delete=models.CASCADE)
+    score = models.FloatField()
+    time_computed = models.DateTimeField()
+
+    class Meta:
+        unique_together = [("province", "rank")]
@@ -1,4 +1,7 @@
-from django.db import models
+from django.db import connection, models
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
 import uuid
 from api.models.user import UserDetail
 from api.models.event import EventDetail
@@ -16,6 +19,66 @@ class EventNotification(models.Model):
     )  # populated when notification is from admin
 
 
+class NotificationOutbox(models.Model):
+    """
+    Transactional outbox of EventNotifications waiting to be fanned out.
+
+    A row is written (and NOTIFY sent) in the same transaction as its
+    EventNotification, so it exists exactly when the notification committed.
+    The `dispatch_notifications` command wakes on the NOTIFY, claims rows with
+    SELECT ... FOR UPDATE SKIP LOCKED, and deletes each row in the transaction
+    that fans it out; a failed fan-out is retried after `available_at`.
+    """
+
+    CHANNEL = "notification_outbox"
+
+    outbox_id = models.BigAutoField(primary_key=True)
+    notification_id = models.OneToOneField(EventNotification, on_delete=models.CASCADE)
+    time_created = models.DateTimeField(default=timezone.now)
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["available_at", "outbox_id"], name="notification_outbox_due_idx"
+            )
+        ]
+
+    @classmethod
+    def enqueue(cls, notification):
+        """
+        Add a notification to the outbox and wake the dispatchers. NOTIFY is
+        delivered on commit, and dropped with the row on rollback.
+        """
+        cls.objects.create(notification_id=notification)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, '')", [cls.CHANNEL])
+
+
+class PushOutbox(models.Model):
+    """
+    Batches of Expo push messages (at most EXPO_BATCH_SIZE each) waiting to be sent.
+
+    Written by the fan-out in the transaction of the UserNotifications they
+    announce, and sent after it commits by `deliver_pushes`, which leases due batches
+    instead of holding a lock across the request. A failed batch is retried on
+    its own after `available_at`, so the inbox is never written twice.
+    """
+
+    push_id = models.BigAutoField(primary_key=True)
+    messages = models.JSONField()
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["available_at", "push_id"], name="push_outbox_due_idx")
+        ]
+
+
 class UserNotification(models.Model):
     user_notification_id = models.UUIDField(
         primary_key=True, default=uuid.uuid4, editable=False
@@ -23,3 +86,61 @@ class UserNotification(models.Model):
     user_id = models.ForeignKey(UserDetail, on_delete=models.CASCADE)
     notification_id = models.ForeignKey(EventNotification, on_delete=models.CASCADE)
     is_read = models.BooleanField(default=False)
+    # copied from the EventNotification so the inbox is sorted from this table alone
+    time_created = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # inbox pages: keyset over (time_created, id) per user
+            models.Index(
+                fields=["user_id", "-time_created", "-user_notification_id"],
+                name="user_notification_inbox_idx",
+            ),
+            # unread-only pages and unread counts
+            models.Index(
+                fields=["user_id", "is_read", "-time_created"],
+                name="user_notification_unread_idx",
+            ),
+        ]
+
+
+class UnreadNotificationCount(models.Model):
+    """
+    Maintained count of a user's unread UserNotifications, for the app badge.
+    Incremented in bulk by the notification fan-out, decremented when
+    notifications are marked read, and reconciled against UserNotification by
+    the `reconcile_unread_counts` beat task.
+    """
+
+    user_id = models.OneToOneField(
+        UserDetail, on_delete=models.CASCADE, primary_key=True
+    )
+    unread_count = models.IntegerField(default=0)
+
+    @classmethod
+    def increment(cls, user_ids):
+        """Add one unread notification for each user (ids must be distinct)."""
+        if not user_ids:
+            return
+        table = cls._meta.db_table
+        column = cls._meta.pk.column
+        # rows are locked in primary key order, as reconcile_unread_counts does,
+        # so the two cannot deadlock
+        user_ids = sorted(str(user_id) for user_id in user_ids)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} ({column}, unread_count)
+                SELECT unnest(%s::uuid[]), 1
+                ON CONFLICT ({column})
+                DO UPDATE SET unread_count = {table}.unread_count + 1
+                """,
+                [user_ids],
+            )
+
+    @classmethod
+    def decrement(cls, user_id, count):
+        if count:
+            cls.objects.filter(pk=user_id).update(
+                unread_count=Greatest(F("unread_count") - count, 0)
+            )
@@ -12,9 +12,10 @@ class UserDetail(models.Model):
     name = models.CharField(max_length=20)
     bio = models.TextField(blank=True, max_length=100)
     invite_code = models.CharField(max_length=20)
-    profile_image = models.BinaryField(blank=True)
+    profile_image_hash = models.CharField(max_length=64, blank=True)  # api.blobstore
     date_of_birth = models.DateField(blank=True, null=True)
     time_created = models.DateTimeField(auto_now_add=True)
+    time_updated = models.DateTimeField(auto_now=True)  # validator for conditional GET
     username = models.CharField(
         max_length=30, blank=True
     )  # TODO: should be unique when put into use
@@ -44,6 +45,13 @@ class Authentication(models.Model):
 
     class Meta:
         unique_together = [("auth_type", "provider_user_id")]
+        indexes = [
+            # tokens due for a refresh (api.tasks.refresh_provider_tokens)
+            models.Index(
+                fields=["provider_access_token_expires_at", "auth_id"],
+                name="auth_access_expiry_idx",
+            )
+        ]
 
     def set_token_expiration(self, expires_in_seconds, token_type="access"):
         """
@@ -58,6 +66,20 @@ class Authentication(models.Model):
             elif token_type == "refresh":
                 self.provider_refresh_token_expires_at = expiration_time
 
+    def set_tokens(self, token_response):
+        """
+        Store the tokens of a provider token response. A refresh response may
+        leave out the refresh token, in which case the current one stays valid.
+        Usage: auth.set_tokens({"access_token": ..., "expires_in": 21599})
+        """
+        self.provider_access_token = token_response["access_token"]
+        self.set_token_expiration(token_response.get("expires_in"), "access")
+        if token_response.get("refresh_token"):
+            self.provider_refresh_token = token_response["refresh_token"]
+            self.set_token_expiration(
+                token_response.get("refresh_token_expires_in"), "refresh"
+            )
+
     def is_access_token_expired(self):
         """Check if access token has expired."""
         if not self.provider_access_token_expires_at:
@@ -0,0 +1,91 @@
+import base64
+import json
+from datetime import datetime
+from uuid import UUID
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def page_size(request, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Read `?limit=` from the request, clamped to [1, maximum]."""
+    try:
+        limit = int(request.query_params.get("limit", default))
+    except ValueError:
+        return default
+    return max(1, min(limit, maximum))
+
+
+def _jsonable(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def encode_cursor(values):
+    """Opaque, URL-safe cursor for the sort key of the last row of a page."""
+    raw = json.dumps([_jsonable(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError for a malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _after(ordering, values):
+    """
+    Q for the rows strictly after `values` in `ordering`, e.g. for
+    ("-score", "-id"): score < s OR (score = s AND id < i).
+    """
+    condition = Q()
+    for i, field in reversed(list(enumerate(ordering))):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        step = Q(**{f"{name}__{lookup}": values[i]})
+        if i < len(ordering) - 1:
+            step |= Q(**{name: values[i]}) & condition
+        condition = step
+    return condition
+
+
+def keyset_page(queryset, ordering, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Fetch one page of `queryset` by keyset pagination.
+
+    `ordering` must be a unique sort key (end it with the primary key) made of
+    model fields or annotations. Each page is a single indexed range query, so its
+    cost does not grow with how deep the client has paged.
+    Returns (rows, next_cursor), where next_cursor is None on the last page.
+    Raises ValueError for a malformed cursor.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(ordering):
+            raise ValueError("Invalid cursor")
+        try:
+            queryset = queryset.filter(_after(ordering, values))
+        except (ValidationError, TypeError) as exc:
+            # values of the wrong type for their field, e.g. a name for a UUID
+            raise ValueError("Invalid cursor") from exc
+
+    rows = list(queryset[: limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, field.lstrip("-")) for field in ordering])
@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+# Expo accepts at most 100 messages per push request
+EXPO_BATCH_SIZE = 100
+
+
+class ExpoPushClient:
+    """
+    Delivers Expo push messages in batches of up to 100.
+
+    All batches go through one requests.Session whose connection pool is sized to
+    `max_in_flight`, and at most `max_in_flight` batches are sent concurrently.
+    Usage: ExpoPushClient().send([{"to": token, "title": ..., "body": ...}, ...])
+    """
+
+    def __init__(self, url=None, timeout=None, max_in_flight=None):
+        self.url = url or settings.EXPO_PUSH_URL
+        self.timeout = timeout or settings.EXPO_PUSH_TIMEOUT
+        self.max_in_flight = max_in_flight or settings.EXPO_PUSH_MAX_IN_FLIGHT
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_in_flight)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def send(self, messages):
+        """
+        Send all messages; returns the number of messages Expo accepted.
+        Raises requests.RequestException if a batch fails (batches sent before it
+        stay sent, so callers retrying a failure should send one batch per call).
+        """
+        batches = [
+            messages[i : i + EXPO_BATCH_SIZE]
+            for i in range(0, len(messages), EXPO_BATCH_SIZE)
+        ]
+        if not batches:
+            return 0
+        if len(batches) == 1:
+            return self._post(batches[0])
+
+        workers = min(self.max_in_flight, len(batches))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return sum(executor.map(self._post, batches))
+
+    def send_each(self, batches):
+        """
+        Send each batch (of at most EXPO_BATCH_SIZE messages) as one request, at
+        most `max_in_flight` at a time. Returns, per batch and in order, the number
+        of messages Expo accepted or the requests.RequestException it failed with.
+        """
+
+        def post(batch):
+            try:
+                return self._post(batch)
+            except requests.RequestException as exc:
+                return exc
+
+        if len(batches) <= 1:
+            return [post(batch) for batch in batches]
+
+        workers = min(self.max_in_flight, len(batches))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(post, batches))
+
+    def _post(self, batch):
+        response = self.session.post(self.url, json=batch, timeout=self.timeout)
+        response.raise_for_status()
+        return len(batch)
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+
+
+def get_push_client():
+    """Process-wide client, so connections are reused across tasks."""
+    global _client
+    if _client is None:
+        _client = ExpoPushClient()
+    return _client
@@ -0,0 +1,80 @@
+"""
+Query budgets: fail a test when a block of code issues more SQL queries (or
+spends more database time) than allowed. Viewsets declare budgets for their
+actions in a `query_budgets` mapping, so N+1 regressions show up as failures:
+
+    with QueryBudget.for_action(EventViewSet, "retrieve"):
+        client.get(f"/api/events/{event_id}/")
+"""
+
+from contextlib import ContextDecorator
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+# transaction control is not counted: tests wrap every request in a savepoint
+TRANSACTION_CONTROL = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryBudget(ContextDecorator):
+    """
+    Context manager / decorator recording the number of queries and the total
+    database time (in ms) of a block. Raises QueryBudgetExceeded on exit when
+    either exceeds its budget; `max_db_time` is optional.
+    """
+
+    def __init__(self, max_queries, max_db_time=None, label="", using="default"):
+        self.max_queries = max_queries
+        self.max_db_time = max_db_time
+        self.label = label or "block"
+        self.using = using
+        self.queries = []
+        self.db_time = 0.0
+
+    @classmethod
+    def for_action(cls, viewset, action, **kwargs):
+        """The budget a viewset declares for one of its actions."""
+        try:
+            max_queries = viewset.query_budgets[action]
+        except (AttributeError, KeyError):
+            raise KeyError(f"{viewset.__name__} declares no budget for {action!r}")
+        return cls(max_queries, label=f"{viewset.__name__}.{action}", **kwargs)
+
+    def __enter__(self):
+        self._capture = CaptureQueriesContext(connections[self.using])
+        self._capture.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._capture.__exit__(exc_type, exc_value, traceback)
+        self.queries = [
+            query
+            for query in self._capture.captured_queries
+            if not query["sql"].startswith(TRANSACTION_CONTROL)
+        ]
+        self.db_time = sum(float(query["time"]) for query in self.queries) * 1000
+        if exc_type is not None:
+            return False
+
+        if len(self.queries) > self.max_queries:
+            raise QueryBudgetExceeded(
+                f"{self.label} ran {len(self.queries)} queries "
+                f"(budget {self.max_queries}):\n" + self._listing()
+            )
+        if self.max_db_time is not None and self.db_time > self.max_db_time:
+            raise QueryBudgetExceeded(
+                f"{self.label} spent {self.db_time:.1f} ms in the database "
+                f"(budget {self.max_db_time} ms):\n" + self._listing()
+            )
+        return False
+
+    def _listing(self):
+        return "\n".join(
+            f"{i}. [{float(query['time']) * 1000:.1f} ms] {query['sql']}"
+            for i, query in enumerate(self.queries, start=1)
+        )
@@ -0,0 +1,74 @@
+"""
+Event search: full-text over the name, address and description, ranked, plus
+trigram similarity on the name so that typos still match.
+
+`EventDetail.search_vector` is kept up to date by a database trigger (see
+migration 0018), so it is also maintained for rows written by COPY or raw SQL.
+Both conditions are answered from GIN indexes:
+
+    events, next_cursor = keyset_page(
+        search_events(EventDetail.objects.all(), "축구 festivl"),
+        SEARCH_ORDERING,
+        cursor,
+    )
+"""
+
+import re
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramWordSimilarity,
+)
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast
+
+# no stemming or stop words: tokens are matched the same way in Korean and English
+SEARCH_CONFIG = "simple"
+
+# most relevant first; the primary key keeps the order unique for keyset pages
+SEARCH_ORDERING = ("-rank", "event_id")
+
+# longest query accepted, in characters
+MAX_QUERY_LENGTH = 100
+
+
+def search_terms(text):
+    """The words of a query; punctuation and tsquery operators are dropped."""
+    return re.findall(r"\w+", text[:MAX_QUERY_LENGTH])
+
+
+def search_query(terms):
+    """
+    A tsquery matching rows that contain every term as a word prefix, so that
+    "축구" also finds "축구를" (Korean attaches particles to the word).
+    """
+    raw = " & ".join(f"{term}:*" for term in terms)
+    return SearchQuery(raw, search_type="raw", config=SEARCH_CONFIG)
+
+
+def search_events(queryset, text):
+    """
+    Filter `queryset` to the events matching `text` and annotate them with
+    `rank`: the full-text rank (name weighs most, then address, then
+    description) plus the word similarity of the query to the name.
+    Returns queryset.none() for a query without words (check search_terms()
+    first: it has no `rank` to order by).
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset.none()
+
+    phrase = " ".join(terms)
+    query = search_query(terms)
+    return queryset.filter(
+        Q(search_vector=query) | Q(event_name__trigram_word_similar=phrase)
+    ).annotate(
+        # both are real (float4); as double precision the rank survives the
+        # round trip through a page cursor exactly
+        rank=Cast(
+            SearchRank(F("search_vector"), query)
+            + TrigramWordSimilarity(phrase, "event_name"),
+            FloatField(),
+        )
+    )
@@ -1,4 +1,12 @@
+import base64
+import binascii
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.urls import reverse
 from rest_framework import serializers
+from api.blobstore import BlobStore, sniff_image_type
 from api.models.user import (
     UserDetail,
     UserLocation,
@@ -19,19 +27,142 @@ from api.models.event import (
 from api.models.notification import EventNotification, UserNotification
 
 
+def _split_param(value):
+    return (
+        {name.strip() for name in value.split(",") if name.strip()} if value else set()
+    )
+
+
+class SparseFieldsMixin:
+    """
+    Lets clients choose the serialized fields with `?fields=a,b` or `?exclude=c`.
+    Only applies to the top-level serializer, which needs `request` in its context.
+    Unknown field names are ignored.
+
+    Views pass the same selection down to the database with `project()`, so the
+    columns behind unselected fields are never read:
+        events = EventDetailSerializer.project(EventDetail.objects.all(), request)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None:
+            return
+
+        selected = _split_param(request.query_params.get("fields"))
+        excluded = _split_param(request.query_params.get("exclude"))
+        for name in list(self.fields):
+            if (selected and name not in selected) or name in excluded:
+                self.fields.pop(name)
+
+    def model_columns(self):
+        """Names of the concrete model fields read by the remaining fields."""
+        opts = self.Meta.model._meta
+        columns = {opts.pk.name}
+        for field in self.fields.values():
+            try:
+                model_field = opts.get_field(field.source.split(".")[0])
+            except FieldDoesNotExist:
+                continue  # computed, or not a model attribute
+            if model_field.concrete:
+                columns.add(model_field.name)
+        return columns
+
+    @classmethod
+    def project(cls, queryset, request, also=()):
+        """
+        Restrict the queryset to the columns the requested fields need, plus
+        any the view reads itself (`also`).
+        """
+        columns = cls(context={"request": request}).model_columns()
+        return queryset.only(*columns, *also)
+
+
+class PendingImage(str):
+    """The digest of a validated image, with the bytes still to be stored."""
+
+    def __new__(cls, data):
+        image = super().__new__(cls, hashlib.sha256(data).hexdigest())
+        image.data = data
+        return image
+
+
+class BlobImagesMixin:
+    """
+    Stores the images of a serializer's BlobImageFields on save(), once the whole
+    input is valid, so a rejected request leaves no blob behind.
+    """
+
+    def save(self, **kwargs):
+        store = BlobStore()
+        for value in self.validated_data.values():
+            if isinstance(value, PendingImage):
+                store.put(value.data)
+        return super().save(**kwargs)
+
+
+class BlobImageField(serializers.Field):
+    """
+    An image kept in the blob store; the model field holds only its digest.
+    Reads as the URL of the image endpoint, and accepts an uploaded file or a
+    base64 string, which is stored when the serializer (a BlobImagesMixin) saves.
+    """
+
+    default_error_messages = {
+        "invalid": "Upload an image file or a base64-encoded image.",
+        "not_image": "Unsupported image type; use PNG, JPEG, GIF or WebP.",
+        "too_large": "Image is larger than {max_size} bytes.",
+    }
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("required", False)
+        super().__init__(**kwargs)
+
+    def to_representation(self, digest):
+        if not digest:
+            return None
+        url = reverse("image", args=[digest])
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+    def to_internal_value(self, data):
+        if hasattr(data, "read"):
+            data = data.read()
+        elif isinstance(data, str):
+            try:
+                data = base64.b64decode(data, validate=True)
+            except binascii.Error:
+                self.fail("invalid")
+        else:
+            self.fail("invalid")
+
+        max_size = settings.MAX_IMAGE_UPLOAD_SIZE
+        if len(data) > max_size:
+            self.fail("too_large", max_size=max_size)
+        if not sniff_image_type(data[:16]):
+            self.fail("not_image")
+        return PendingImage(data)
+
+
 class LocationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Location
         fields = ["province", "city", "town"]
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(BlobImagesMixin, serializers.ModelSerializer):
+    main_image = BlobImageField(source="main_image_hash")
+
     class Meta:
         model = Category
         fields = ["category_name", "main_image", "description"]
 
 
-class SimpleUserDetailSerializer(serializers.ModelSerializer):
+class SimpleUserDetailSerializer(
+    BlobImagesMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
+    profile_image = BlobImageField(source="profile_image_hash")
     location = LocationSerializer(read_only=True)
 
     class Meta:
@@ -39,7 +170,10 @@ class SimpleUserDetailSerializer(serializers.ModelSerializer):
         fields = ["name", "bio", "profile_image", "location"]
 
 
-class EventDetailSerializer(serializers.ModelSerializer):
+class EventDetailSerializer(
+    BlobImagesMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
+    main_image = BlobImageField(source="main_image_hash")
     organizer = SimpleUserDetailSerializer(read_only=True)
     location = LocationSerializer(read_only=True)
     category = CategorySerializer(read_only=True)
@@ -51,6 +185,7 @@ class EventDetailSerializer(serializers.ModelSerializer):
             "description",
             "main_image",
             "capacity",
+            "participant_count",
             "duration",
             "address",
             "organizer",
@@ -59,7 +194,10 @@ class EventDetailSerializer(serializers.ModelSerializer):
         ]
 
 
-class UserDetailSerializer(serializers.ModelSerializer):
+class UserDetailSerializer(
+    BlobImagesMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
+    profile_image = BlobImageField(source="profile_image_hash")
     location = LocationSerializer(read_only=True)
     events = EventDetailSerializer(many=True, read_only=True)
 
@@ -77,7 +215,9 @@ class UserDetailSerializer(serializers.ModelSerializer):
         ]
 
 
-class CreateUserSerializer(serializers.ModelSerializer):
+class CreateUserSerializer(BlobImagesMixin, serializers.ModelSerializer):
+    profile_image = BlobImageField(source="profile_image_hash")
+
     class Meta:
         model = UserDetail
         fields = ["name", "bio", "profile_image", "date_of_birth"]
@@ -90,8 +230,21 @@ class EventNotificationSerializer(serializers.ModelSerializer):
 
 
 class UserNotificationSerializer(serializers.ModelSerializer):
-    notification = EventNotificationSerializer(read_only=True)
+    """An inbox entry; expects notification_id to be select_related."""
+
+    notification_id = serializers.UUIDField(source="notification_id.notification_id")
+    event_id = serializers.UUIDField(source="notification_id.event_id_id")
+    detail = serializers.CharField(source="notification_id.detail")
+    from_admin = serializers.BooleanField(source="notification_id.from_admin")
 
     class Meta:
         model = UserNotification
-        fields = ["notification", "is_read"]  # TODO: check requirements
+        fields = [
+            "user_notification_id",
+            "notification_id",
+            "event_id",
+            "detail",
+            "time_created",
+            "is_read",
+            "from_admin",
+        ]
@@ -1,10 +1,140 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from api.models.notification import EventNotification
-from api.tasks import send_notification_task
+from api.cache import joined_events, response_cache
+from api.models.event import (
+    EventCategory,
+    EventDetail,
+    EventLocation,
+    EventOrganizer,
+    RecommendedEvent,
+    UserEvent,
+)
+from api.models.notification import EventNotification, NotificationOutbox
+from api.models.user import UserDetail
+from helper.types import OPEN_EVENT_STATUSES
 
 
 @receiver(post_save, sender=EventNotification)
 def trigger_event_notification(sender, instance, created, **kwargs):
     if created:
-        send_notification_task.delay(instance.notification_id)
+        # same transaction as the notification; fanned out by dispatch_notifications
+        NotificationOutbox.enqueue(instance)
+
+
+# Recommendation index (RecommendedEvent)
+
+
+def index_event(event):
+    """Add index rows for all locations of an open event, or drop them otherwise."""
+    if event.status not in OPEN_EVENT_STATUSES:
+        RecommendedEvent.objects.filter(event_id=event).delete()
+        return
+
+    score = UserEvent.objects.filter(event_id=event).count()
+    location_ids = EventLocation.objects.filter(event_id=event).values_list(
+        "location_id", flat=True
+    )
+    RecommendedEvent.objects.bulk_create(
+        [
+            RecommendedEvent(location_id_id=location_id, event_id=event, score=score)
+            for location_id in location_ids
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def rebuild_recommendation_index():
+    """
+    Rebuild the whole index from EventLocation and UserEvent, for data written
+    without signals (bulk_create, COPY).
+    """
+    scores = dict(
+        EventDetail.objects.filter(status__in=OPEN_EVENT_STATUSES).values_list(
+            "pk", "participant_count"
+        )
+    )
+    rows = (
+        RecommendedEvent(
+            location_id_id=location_id, event_id_id=event_id, score=scores[event_id]
+        )
+        for location_id, event_id in EventLocation.objects.filter(
+            event_id__status__in=OPEN_EVENT_STATUSES
+        )
+        .values_list("location_id", "event_id")
+        .iterator()
+    )
+    with transaction.atomic():
+        RecommendedEvent.objects.all().delete()
+        RecommendedEvent.objects.bulk_create(rows, batch_size=1000)
+
+
+@receiver(post_save, sender=EventDetail)
+def reindex_event_on_status_change(sender, instance, created, update_fields, **kwargs):
+    # a new event has no locations yet; it is indexed as they are added
+    if created or (update_fields is not None and "status" not in update_fields):
+        return
+    index_event(instance)
+
+
+@receiver(post_save, sender=EventLocation)
+def index_event_location(sender, instance, created, **kwargs):
+    if created:
+        index_event(instance.event_id)
+
+
+@receiver(post_delete, sender=EventLocation)
+def unindex_event_location(sender, instance, **kwargs):
+    RecommendedEvent.objects.filter(
+        location_id=instance.location_id_id, event_id=instance.event_id_id
+    ).delete()
+
+
+@receiver(post_save, sender=UserEvent)
+def score_event_join(sender, instance, created, **kwargs):
+    if created:
+        RecommendedEvent.objects.filter(event_id=instance.event_id_id).update(
+            score=F("score") + 1
+        )
+
+
+@receiver(post_delete, sender=UserEvent)
+def score_event_leave(sender, instance, **kwargs):
+    RecommendedEvent.objects.filter(event_id=instance.event_id_id).update(
+        score=F("score") - 1
+    )
+
+
+# Response cache (api.cache)
+
+
+@receiver([post_save, post_delete], sender=EventDetail)
+def invalidate_cached_event(sender, instance, **kwargs):
+    response_cache.invalidate_on_commit("event", instance.pk)
+
+
+@receiver([post_save, post_delete], sender=EventOrganizer)
+@receiver([post_save, post_delete], sender=EventLocation)
+@receiver([post_save, post_delete], sender=UserEvent)  # participant_count
+@receiver([post_save, post_delete], sender=EventCategory)
+def invalidate_cached_event_relation(sender, instance, **kwargs):
+    response_cache.invalidate_on_commit("event", instance.event_id_id)
+
+
+@receiver([post_save, post_delete], sender=UserEvent)
+def invalidate_joined_events(sender, instance, **kwargs):
+    joined_events.invalidate_on_commit(instance.user_id_id)
+
+
+@receiver([post_save, post_delete], sender=UserDetail)
+def invalidate_cached_user(sender, instance, created=False, **kwargs):
+    response_cache.invalidate_on_commit("user", instance.pk)
+    if created:
+        return
+    # events embed their organizer
+    organized = EventOrganizer.objects.filter(user_id=instance.pk).values_list(
+        "event_id", flat=True
+    )
+    for event_id in organized:
+        response_cache.invalidate_on_commit("event", event_id)
@@ -0,0 +1,167 @@
+"""
+Local stand-ins for external HTTP services, used by the tests and benchmarks.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class StubServer:
+    """
+    A threaded HTTP server on 127.0.0.1 with a random port.
+    Subclasses set `handler_class`; use as a context manager.
+    """
+
+    handler_class = None
+
+    def __init__(self, delay=0.0):
+        self.delay = delay  # seconds to wait before each response
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self.handler_class)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def track(self, path, body):
+        with self._lock:
+            self.requests.append((path, body))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def untrack(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real services
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length)
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ExpoPushHandler(StubHandler):
+    def do_POST(self):
+        stub = self.server.stub
+        messages = json.loads(self.read_body())
+        stub.track(self.path, messages)
+        try:
+            time.sleep(stub.delay)
+        finally:
+            stub.untrack()
+        self.send_json({"data": [{"status": "ok"} for _ in messages]})
+
+
+class StubExpoServer(StubServer):
+    """Accepts Expo push batches and records them in `requests`."""
+
+    handler_class = ExpoPushHandler
+
+    @property
+    def push_url(self):
+        return f"{self.url}/--/api/v2/push/send"
+
+
+class KakaoHandler(StubHandler):
+    def do_POST(self):
+        stub = self.server.stub
+        form = parse_qs(self.read_body().decode())
+        stub.track(self.path, form)
+        try:
+            time.sleep(stub.delay)
+        finally:
+            stub.untrack()
+
+        if self.path == "/oauth/token" and form.get("grant_type") == ["refresh_token"]:
+            refresh_token = form.get("refresh_token", [""])[0]
+            code = refresh_token.removeprefix("refresh-")
+            if stub.refresh_error:
+                self.send_json({"error": stub.refresh_error}, status=401)
+                return
+            if not refresh_token.startswith("refresh-") or code not in stub.codes:
+                self.send_json({"error": "invalid_grant"}, status=400)
+                return
+            stub.refreshed += 1
+            self.send_json(
+                {
+                    "token_type": "bearer",
+                    "access_token": f"access-{code}",
+                    "expires_in": 21599,
+                }
+            )
+        elif self.path == "/oauth/token":
+            code = form.get("code", [""])[0]
+            if code not in stub.codes:
+                self.send_json({"error": "invalid_grant"}, status=400)
+                return
+            self.send_json(
+                {
+                    "token_type": "bearer",
+                    "access_token": f"access-{code}",
+                    "refresh_token": f"refresh-{code}",
+                    "expires_in": 21599,
+                    "refresh_token_expires_in": 5183999,
+                }
+            )
+        elif self.path == "/v2/user/me":
+            token = self.headers.get("Authorization", "").removeprefix("Bearer ")
+            code = token.removeprefix("access-")
+            if not token.startswith("access-") or code not in stub.codes:
+                self.send_json({"msg": "this access token does not exist"}, status=401)
+                return
+            kakao_id, nickname = stub.codes[code]
+            self.send_json(
+                {"id": kakao_id, "kakao_account": {"profile": {"nickname": nickname}}}
+            )
+        else:
+            self.send_json({"msg": "not found"}, status=404)
+
+
+class StubKakaoServer(StubServer):
+    """
+    Serves the Kakao token and user-info endpoints (set KAKAO_AUTH_URL and
+    KAKAO_API_URL to `url`). Authorization codes are issued with `authorize`;
+    the refresh token of a code is "refresh-<code>", as returned on login.
+    """
+
+    handler_class = KakaoHandler
+
+    def __init__(self, delay=0.0):
+        super().__init__(delay)
+        self.codes = {}  # code -> (kakao id, nickname)
+        self.refreshed = 0  # access tokens issued for a refresh token
+        self.refresh_error = None  # if set, every refresh fails with this error
+
+    def authorize(self, kakao_id, nickname):
+        """Issue an authorization code for a Kakao account."""
+        code = f"code-{kakao_id}-{len(self.codes)}"
+        self.codes[code] = (kakao_id, nickname)
+        return code
@@ -1,56 +1,605 @@
+import asyncio
+import math
+from collections import Counter
+from datetime import timedelta
+from itertools import islice
+import logging
 from celery import shared_task
-from src.api.models.user import UserDetail
-from src.api.models.event import UserEvent
-from src.api.models.notification import UserNotification, EventNotification
+from django.conf import settings
+from api.models.common import Location
+from api.models.event import (
+    EventDetail,
+    EventLocation,
+    EventView,
+    EventViewBucket,
+    TrendingEvent,
+    UserEvent,
+)
+from api.models.notification import (
+    EventNotification,
+    NotificationOutbox,
+    PushOutbox,
+    UnreadNotificationCount,
+    UserNotification,
+)
+from api.models.user import Authentication
+from django.db import connection, transaction
+from django.db.models import F, Q
 from django.utils import timezone
-import requests
 import json
+from api.cache import response_cache
+from api.kakao import KakaoClient, KakaoError
+from api.pagination import keyset_page
+from api.push import EXPO_BATCH_SIZE, get_push_client
+from helper.types import OPEN_EVENT_STATUSES, AuthType
 
-EXPO_URL = "https://exp.host/--/api/v2/push/send"  ## TODO: placeholder
+logger = logging.getLogger(__name__)
 
+# participants are streamed from a server-side cursor and written in chunks of this size
+NOTIFICATION_CHUNK_SIZE = 1000
 
-def send_push_notification(token, title, message):
-    body = {
-        "to": token,
-        "title": title,
-        "body": message,
-    }
+# a failed outbox entry is retried after this delay, doubled per attempt up to the cap
+OUTBOX_RETRY_DELAY = timedelta(seconds=30)
+OUTBOX_MAX_RETRY_DELAY = timedelta(hours=1)
+
+# a push batch being sent is hidden from other deliver_pushes runs for this long
+PUSH_LEASE = timedelta(minutes=5)
+# a push batch still failing after this many attempts is dropped (~2 hours of
+# retries with the outbox delays): a notification that late is no news
+PUSH_MAX_ATTEMPTS = 8
+
+# trending score: views and joins count less the older they are, halving every
+# TRENDING_HALF_LIFE; activity older than TRENDING_WINDOW is ignored
+TRENDING_HALF_LIFE = timedelta(hours=24)
+TRENDING_WINDOW = timedelta(days=7)
+TRENDING_VIEW_WEIGHT = 1.0
+TRENDING_JOIN_WEIGHT = 10.0
+# a full event scores up to (1 + TRENDING_FILL_WEIGHT) times its activity
+TRENDING_FILL_WEIGHT = 1.0
+# events kept per scope (overall, and each province)
+TRENDING_SIZE = 100
+
+# events locked and recounted per transaction by reconcile_participant_counts
+RECONCILE_BATCH_SIZE = 1000
+
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def fan_out_notification(event_notif, chunk_size=NOTIFICATION_CHUNK_SIZE):
+    """
+    Create a UserNotification for every participant of the notification's event
+    and queue a push (PushOutbox) to those with an Expo token.
+
+    Participants are read together with their push token through a server-side
+    cursor, and each chunk is written with a single bulk_create (plus one upsert of
+    the unread counts and one insert of its push batches), so the number of
+    queries grows with the number of chunks rather than the number of participants.
+    Nothing is sent here: see deliver_pushes. Returns (recipients, queued pushes).
+    """
+    event = event_notif.event_id
+    title = f"New update for event {event.event_name}"
+    message = json.dumps(
+        {
+            "event_notification_id": str(event_notif.notification_id),
+            "event_id": str(event.event_id),
+            "detail": event_notif.detail,
+            "time_created": event_notif.time_created.isoformat(),
+            "from_admin": event_notif.from_admin,
+        }
+    )
+
+    participants = (
+        UserEvent.objects.filter(event_id=event)
+        .values_list("user_id", "user_id__expo_push_token")
+        .iterator(chunk_size=chunk_size)
+    )
+
+    recipients = queued = 0
+    for chunk in _chunked(participants, chunk_size):
+        user_ids = [user_id for user_id, _ in chunk]
+        messages = [
+            {"to": token, "title": title, "body": message}
+            for _, token in chunk
+            if token
+        ]
+        # rows, badge counts and pushes commit together, so a concurrent read
+        # can't skew them and a push never announces a rolled back row
+        with transaction.atomic(savepoint=False):
+            UserNotification.objects.bulk_create(
+                [
+                    UserNotification(
+                        user_id_id=user_id,
+                        notification_id=event_notif,
+                        time_created=event_notif.time_created,
+                    )
+                    for user_id in user_ids
+                ]
+            )
+            UnreadNotificationCount.increment(user_ids)
+            PushOutbox.objects.bulk_create(
+                PushOutbox(messages=batch)
+                for batch in _chunked(messages, EXPO_BATCH_SIZE)
+            )
+        recipients += len(chunk)
+        queued += len(messages)
+
+    return recipients, queued
+
+
+def _retry_delay(attempts):
+    return min(OUTBOX_RETRY_DELAY * 2**attempts, OUTBOX_MAX_RETRY_DELAY)
+
+
+def deliver_push_round(push_client=None):
+    """
+    Lease the oldest due PushOutbox batches, up to the client's `max_in_flight`,
+    send them concurrently, and delete those Expo accepted. The leases are
+    committed before the requests, so no transaction or lock is held while
+    sending; a failed batch is scheduled for a retry on its own.
+    Returns None when nothing is due, else {"pushed": n, "failed": n}.
+    """
+    push_client = push_client or get_push_client()
+    with transaction.atomic():
+        batches = list(
+            PushOutbox.objects.select_for_update(skip_locked=True)
+            .filter(available_at__lte=timezone.now())
+            .order_by("available_at", "push_id")[: push_client.max_in_flight]
+        )
+        if not batches:
+            return None
+        PushOutbox.objects.filter(pk__in=[batch.pk for batch in batches]).update(
+            available_at=timezone.now() + PUSH_LEASE
+        )
+
+    results = push_client.send_each([batch.messages for batch in batches])
 
-    requests.post(EXPO_URL, json=body)
+    pushed = failed = 0
+    done = []
+    for batch, result in zip(batches, results):
+        if not isinstance(result, Exception):
+            pushed += result
+            done.append(batch.pk)
+            continue
+        failed += 1
+        batch.attempts += 1
+        if batch.attempts >= PUSH_MAX_ATTEMPTS:
+            logger.error(
+                "Dropping push batch %s after %d attempts: %r",
+                batch.pk,
+                batch.attempts,
+                result,
+            )
+            done.append(batch.pk)
+            continue
+        logger.warning("Push batch %s failed: %r", batch.pk, result)
+        batch.available_at = timezone.now() + _retry_delay(batch.attempts - 1)
+        batch.last_error = repr(result)
+        batch.save(update_fields=["attempts", "available_at", "last_error"])
+    PushOutbox.objects.filter(pk__in=done).delete()
+
+    return {"pushed": pushed, "failed": failed}
+
+
+@shared_task
+def deliver_pushes(push_client=None):
+    """
+    Send every due push batch, `max_in_flight` at a time; returns the number of
+    messages accepted. Runs on beat, apart from the notification dispatcher, so
+    a slow or failing Expo never holds up fan-out.
+    """
+    pushed = 0
+    while (result := deliver_push_round(push_client)) is not None:
+        pushed += result["pushed"]
+    return pushed
 
 
 @shared_task
 def send_notification_task(event_notification):
+    """
+    Send an EventNotification to all users enrolled in its event.
+    The result is a compact summary, since it is stored in the django-db result backend.
+    """
     try:
-        # send notif to all users enrolled in the event
-        event_notif = EventNotification.objects.get(pk=event_notification)
-        participants = UserEvent.objects.filter(event_id=event_notif.event_id)
-        for participant in participants:
-            user = UserDetail.objects.get(pk=participant.user_id)
-
-            UserNotification.objects.create(
-                user_id=user.user_id,
-                notification_id=event_notif,
+        event_notif = EventNotification.objects.select_related("event_id").get(
+            pk=event_notification
+        )
+    except EventNotification.DoesNotExist:
+        return {"notification_id": str(event_notification), "error": "does not exist"}
+
+    recipients, _ = fan_out_notification(event_notif)
+    pushed = deliver_pushes()
+
+    return {
+        "notification_id": str(event_notification),
+        "recipients": recipients,
+        "pushed": pushed,
+    }
+
+
+def dispatch_next_notification():
+    """
+    Claim the oldest due NotificationOutbox entry and fan it out.
+
+    The entry is locked with FOR UPDATE SKIP LOCKED, so concurrent dispatchers
+    never take the same one, and deleted in the transaction that writes the
+    UserNotifications and queues their pushes: either all commit or the entry
+    stays for a retry. Pushes are sent afterwards by the deliver_pushes task.
+    Returns None when nothing is due, else {"notification_id", "recipients",
+    "queued"} or {"notification_id", "error"}.
+    """
+    with transaction.atomic():
+        entry = (
+            NotificationOutbox.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("notification_id__event_id")
+            .filter(available_at__lte=timezone.now())
+            .order_by("available_at", "outbox_id")
+            .first()
+        )
+        if entry is None:
+            return None
+
+        notification_id = str(entry.notification_id_id)
+        try:
+            with transaction.atomic():
+                recipients, queued = fan_out_notification(entry.notification_id)
+        except Exception as exc:
+            logger.exception("Fan-out of notification %s failed", notification_id)
+            entry.available_at = timezone.now() + _retry_delay(entry.attempts)
+            entry.attempts += 1
+            entry.last_error = repr(exc)
+            entry.save(update_fields=["attempts", "available_at", "last_error"])
+            return {"notification_id": notification_id, "error": repr(exc)}
+
+        entry.delete()
+
+    return {
+        "notification_id": notification_id,
+        "recipients": recipients,
+        "queued": queued,
+    }
+
+
+def dispatch_notifications():
+    """
+    Fan out every due outbox entry; returns the number of notifications
+    dispatched. Their pushes are left queued for the deliver_pushes task.
+    """
+    dispatched = 0
+    while (result := dispatch_next_notification()) is not None:
+        dispatched += "error" not in result
+    return dispatched
+
+
+@shared_task
+def flush_event_views():
+    """
+    Fold the buffered EventView rows into EventDetail.view_count.
+
+    The rows are removed with a single DELETE ... RETURNING, so every view that is
+    deleted is also counted (no view can slip in between a read and a delete),
+    and the increments are applied as F() updates in the same transaction,
+    together with the hourly EventViewBucket counts that trending is scored on.
+    """
+    table = EventView._meta.db_table
+    column = EventView._meta.get_field("event_id").column
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {table} "
+                f"RETURNING {column}, date_trunc('hour', time_viewed)"
+            )
+            buckets = Counter(map(tuple, cursor.fetchall()))
+
+        views = Counter()
+        for (event_id, _), count in buckets.items():
+            views[event_id] += count
+        for event_id, count in views.items():
+            EventDetail.objects.filter(pk=event_id).update(
+                view_count=F("view_count") + count
             )
+        EventViewBucket.add(buckets)
+
+    return {"events": len(views), "views": sum(views.values())}
+
+
+@shared_task
+def reconcile_unread_counts(batch_size=RECONCILE_BATCH_SIZE):
+    """
+    Repair drift between UnreadNotificationCount and the unread UserNotification
+    rows. Only rows whose count is wrong are written.
+
+    Users with unread notifications but no counter get one first. Counters are
+    then locked (FOR UPDATE, in primary key order) a batch at a time before they
+    are recounted, as the fan-out and the read actions update the counter in the
+    transaction that writes the notifications: a write either committed before
+    the count and is in it, or waits and applies itself after.
+    """
+    counts = UnreadNotificationCount._meta.db_table
+    notifications = UserNotification._meta.db_table
 
-            token = user.expo_push_token
-            if token:
-                message = json.dumps(
-                    {
-                        "event_notification_id": str(event_notif.notification_id),
-                        "event_id": str(event_notif.event_id.event_id),
-                        "detail": event_notif.detail,
-                        "time_created": event_notif.time_created.isoformat(),
-                        "from_admin": event_notif.from_admin,
-                    }
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {counts} (user_id_id, unread_count)
+            SELECT DISTINCT user_id_id, 0
+            FROM {notifications}
+            WHERE NOT is_read
+            ORDER BY user_id_id
+            ON CONFLICT (user_id_id) DO NOTHING
+            """
+        )
+
+    fixed = 0
+    batch = UnreadNotificationCount.objects.select_for_update().order_by("pk")
+    last = None
+    while True:
+        with transaction.atomic():
+            page = batch if last is None else batch.filter(pk__gt=last)
+            user_ids = list(page.values_list("pk", flat=True)[:batch_size])
+            if not user_ids:
+                break
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    UPDATE {counts} AS c
+                    SET unread_count = n.unread
+                    FROM (
+                        SELECT c.user_id_id, COUNT(n.user_id_id) AS unread
+                        FROM {counts} c
+                        LEFT JOIN {notifications} n
+                        ON n.user_id_id = c.user_id_id AND NOT n.is_read
+                        WHERE c.user_id_id = ANY(%s)
+                        GROUP BY c.user_id_id
+                    ) AS n
+                    WHERE n.user_id_id = c.user_id_id
+                    AND c.unread_count <> n.unread
+                    """,
+                    [user_ids],
                 )
-                send_push_notification(
-                    token,
-                    f"New update for event {event_notif.event_id.event_name}",
-                    message,
+                fixed += cursor.rowcount
+        last = user_ids[-1]
+
+    return {"fixed": fixed}
+
+
+@shared_task
+def reconcile_participant_counts(batch_size=RECONCILE_BATCH_SIZE):
+    """
+    Repair drift between EventDetail.participant_count and the UserEvent rows
+    (e.g. after a TRUNCATE or a trigger disabled for a restore). Only events
+    whose count is wrong are written, and their cached responses invalidated.
+
+    Events are locked (FOR UPDATE, in primary key order) a batch at a time
+    before they are counted, like `join` locks its event: a join either
+    committed before the count and is in it, or waits and adds itself after.
+    """
+    events = EventDetail._meta.db_table
+    user_events = UserEvent._meta.db_table
+
+    fixed = 0
+    batch = EventDetail.objects.select_for_update().order_by("pk")
+    last = None
+    while True:
+        with transaction.atomic():
+            page = batch if last is None else batch.filter(pk__gt=last)
+            event_ids = list(page.values_list("pk", flat=True)[:batch_size])
+            if not event_ids:
+                break
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    UPDATE {events} AS e
+                    SET participant_count = c.participants,
+                        time_updated = GREATEST(e.time_updated, clock_timestamp())
+                    FROM (
+                        SELECT e.event_id, COUNT(u.event_id_id) AS participants
+                        FROM {events} e
+                        LEFT JOIN {user_events} u ON u.event_id_id = e.event_id
+                        WHERE e.event_id = ANY(%s)
+                        GROUP BY e.event_id
+                    ) AS c
+                    WHERE c.event_id = e.event_id
+                    AND e.participant_count <> c.participants
+                    RETURNING e.event_id
+                    """,
+                    [event_ids],
                 )
+                repaired = [event_id for (event_id,) in cursor.fetchall()]
+            # raw SQL sends no signals: drop the responses cached with the drift
+            for event_id in repaired:
+                response_cache.invalidate_on_commit("event", event_id)
+            fixed += len(repaired)
+        last = event_ids[-1]
+
+    return {"fixed": fixed}
+
 
-        return f"EventNotification {event_notification} sent to users {[p.user_id for p in participants]} successfully"
+async def _refresh_tokens(refresh_tokens, max_in_flight, client=None):
+    """
+    Refresh every token concurrently, at most `max_in_flight` at a time.
+    Returns one token response or KakaoError per refresh token, in order.
+    """
+    owned = client is None
+    client = client or KakaoClient()
+    semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def refresh(refresh_token):
+        async with semaphore:
+            try:
+                return await client.refresh_token(refresh_token)
+            except KakaoError as exc:
+                return exc
+
+    try:
+        return await asyncio.gather(*(refresh(token) for token in refresh_tokens))
+    finally:
+        if owned:
+            await client.aclose()
+
+
+@shared_task
+def refresh_provider_tokens(ahead=None, batch_size=None, max_in_flight=None):
+    """
+    Refresh the Kakao access tokens that expire within `ahead` seconds, so no
+    request has to pay for a refresh inline.
+
+    Due tokens are read in pages of `batch_size` through the expiry index; each
+    page is refreshed concurrently against Kakao and written back with a single
+    bulk_update. A token whose refresh token Kakao rejects as "invalid_grant"
+    (revoked, or expired) is cleared so it is not retried; the user has to log
+    in again. Any other failure, including other 4xx errors (e.g. a rotated
+    client secret), is treated as transient and left for the next run.
+    """
+    ahead = timedelta(seconds=ahead or settings.TOKEN_REFRESH_AHEAD)
+    batch_size = batch_size or settings.TOKEN_REFRESH_BATCH_SIZE
+    max_in_flight = max_in_flight or settings.TOKEN_REFRESH_MAX_IN_FLIGHT
+
+    now = timezone.now()
+    due = (
+        Authentication.objects.filter(
+            auth_type=AuthType.KAKAO,
+            provider_access_token_expires_at__lte=now + ahead,
+        )
+        .filter(
+            Q(provider_refresh_token_expires_at__isnull=True)
+            | Q(provider_refresh_token_expires_at__gt=now)
+        )
+        .exclude(provider_refresh_token="")
+    )
+    ordering = ("provider_access_token_expires_at", "auth_id")
+
+    refreshed = revoked = failed = 0
+    cursor = None
+    while True:
+        # keyset pages, so tokens that failed transiently are not read again
+        auths, cursor = keyset_page(due, ordering, cursor, limit=batch_size)
+        if not auths:
+            break
+
+        refresh_tokens = [auth.provider_refresh_token for auth in auths]
+        results = asyncio.run(_refresh_tokens(refresh_tokens, max_in_flight))
+        updated = []
+        for auth, result in zip(auths, results):
+            if not isinstance(result, KakaoError) and result.get("access_token"):
+                auth.set_tokens(result)
+                refreshed += 1
+            elif isinstance(result, KakaoError) and result.code == "invalid_grant":
+                auth.provider_access_token = ""
+                auth.provider_access_token_expires_at = None
+                revoked += 1
+            else:
+                failed += 1
+                continue
+            updated.append(auth)
+
+        Authentication.objects.bulk_update(
+            updated,
+            [
+                "provider_access_token",
+                "provider_access_token_expires_at",
+                "provider_refresh_token",
+                "provider_refresh_token_expires_at",
+            ],
+        )
+        if cursor is None:
+            break
+
+    return {"refreshed": refreshed, "revoked": revoked, "failed": failed}
+
+
+@shared_task
+def compute_trending_events():
+    """
+    Rewrite the TrendingEvent snapshot from recent activity.
+
+    An open event scores its views (from EventViewBucket) and joins within
+    TRENDING_WINDOW, each decayed exponentially with its age, weighted, and
+    boosted by how full the event is:
+        (Wv * sum(views * d) + Wj * sum(joins * d)) * (1 + Wf * fill rate)
+    with d = 0.5 ** (age / TRENDING_HALF_LIFE). The top TRENDING_SIZE are
+    ranked overall and per province of the event's locations, in one statement.
+    The old snapshot is replaced in the same transaction, so readers always see
+    a complete one. Expired view buckets are dropped.
+    """
+    now = timezone.now()
+    since = now - TRENDING_WINDOW
+    params = {
+        "now": now,
+        "since": since,
+        "decay": math.log(2) / TRENDING_HALF_LIFE.total_seconds(),
+        "view_weight": TRENDING_VIEW_WEIGHT,
+        "join_weight": TRENDING_JOIN_WEIGHT,
+        "fill_weight": TRENDING_FILL_WEIGHT,
+        "statuses": [str(status) for status in OPEN_EVENT_STATUSES],
+        "size": TRENDING_SIZE,
+    }
+    buckets = EventViewBucket._meta.db_table
+    user_events = UserEvent._meta.db_table
+    events = EventDetail._meta.db_table
+    event_locations = EventLocation._meta.db_table
+    locations = Location._meta.db_table
+    trending = TrendingEvent._meta.db_table
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {trending}")
+        cursor.execute(
+            f"""
+            WITH views AS (
+                SELECT event_id_id AS event_id,
+                    SUM(views * exp(-%(decay)s
+                        * extract(epoch FROM %(now)s - hour))) AS score
+                FROM {buckets}
+                WHERE hour >= %(since)s
+                GROUP BY event_id_id
+            ), joins AS (
+                SELECT event_id_id AS event_id,
+                    SUM(exp(-%(decay)s * extract(epoch FROM %(now)s - time_joined)))
+                        AS score
+                FROM {user_events}
+                WHERE time_joined >= %(since)s
+                GROUP BY event_id_id
+            ), scored AS (
+                SELECT e.event_id,
+                    (%(view_weight)s * COALESCE(v.score, 0)
+                        + %(join_weight)s * COALESCE(j.score, 0))
+                    * (1 + %(fill_weight)s * LEAST(
+                        1.0,
+                        e.participant_count::float / GREATEST(e.capacity, 1)
+                    )) AS score
+                FROM {events} e
+                LEFT JOIN views v ON v.event_id = e.event_id
+                LEFT JOIN joins j ON j.event_id = e.event_id
+                WHERE e.status = ANY(%(statuses)s)
+                AND (v.score > 0 OR j.score > 0)
+            ), provinces AS (
+                SELECT DISTINCT el.event_id_id AS event_id, l.province
+                FROM {event_locations} el
+                JOIN {locations} l ON l.location_id = el.location_id_id
+            ), ranked AS (
+                SELECT '' AS province, event_id, score,
+                    row_number() OVER (ORDER BY score DESC, event_id) AS rank
+                FROM scored
+                UNION ALL
+                SELECT p.province, s.event_id, s.score,
+                    row_number() OVER (
+                        PARTITION BY p.province ORDER BY s.score DESC, s.event_id
+                    )
+                FROM scored s
+                JOIN provinces p ON p.event_id = s.event_id
+            )
+            INSERT INTO {trending} (province, rank, event_id_id, score, time_computed)
+            SELECT province, rank, event_id, score, %(now)s
+            FROM ranked
+            WHERE rank <= %(size)s
+            """,
+            params,
+        )
+        ranked = cursor.rowcount
+        expired, _ = EventViewBucket.objects.filter(hour__lt=since).delete()
 
-    except event_notification.DoesNotExist:
-        return f"EventNotification {event_notification} does not exist"
+    return {"ranked": ranked, "expired_buckets": expired}
@@ -1,13 +1,36 @@
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+from pathlib import Path
+import base64
+import hashlib
+import json
+import requests
+import tempfile
+import threading
+import time
+from unittest import mock
+from io import StringIO
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.contrib.auth.models import User
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
+from django.utils import timezone
 import uuid
 
 from api.models.user import UserDetail, UserLocation, Authentication, UserAuthentication
 from api.models.event import (
     EventDetail,
+    EventView,
+    EventViewBucket,
+    RecommendedEvent,
+    TrendingEvent,
     Category,
     EventCategory,
     EventLocation,
@@ -16,8 +39,39 @@ from api.models.event import (
     UserEvent,
     UserEventLog,
 )
-from api.models.notification import EventNotification, UserNotification
+from api.models.notification import (
+    EventNotification,
+    NotificationOutbox,
+    PushOutbox,
+    UnreadNotificationCount,
+    UserNotification,
+)
 from api.models.common import Location
+from api.blobstore import BlobStore
+from api.geo import bounding_box, covering_cells, encode, haversine
+from api.pagination import encode_cursor
+from api.cache import joined_events, response_cache
+from api.push import ExpoPushClient
+from api.querybudget import QueryBudget, QueryBudgetExceeded
+from api.stubs import StubExpoServer, StubKakaoServer
+from api.management.commands.dispatch_notifications import listen, wait_for_notify
+from api.tasks import (
+    compute_trending_events,
+    deliver_push_round,
+    deliver_pushes,
+    dispatch_next_notification,
+    dispatch_notifications,
+    fan_out_notification,
+    flush_event_views,
+    reconcile_participant_counts,
+    reconcile_unread_counts,
+    refresh_provider_tokens,
+    send_notification_task,
+)
+from api.serializers import EventDetailSerializer
+from api.views.category_views import CategoryViewSet
+from api.views.event_views import EventViewSet
+from api.views.user_views import UserDetailViewSet
 from helper.types import EventStatus, AuthType
 
 
@@ -150,6 +204,14 @@ class UserAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
         self.assertIn("error", response.data)
 
+    def test_retrieve_user_sparse_fields(self):
+        """Test GET /api/users/{user_id}/?fields=name"""
+        url = f"/api/users/{self.user.user_id}/?fields=name"
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"name": "Test User"})
+
     def test_get_user_myinfo(self):
         """Test GET /api/users/{user_id}/myinfo/"""
         url = f"/api/users/{self.user.user_id}/myinfo/"
@@ -225,6 +287,619 @@ class UserAPITestCase(APITestCase):
         )
 
 
+class RecommendationTestCase(APITestCase):
+    """Test cases for the location-based recommendation index"""
+
+    def setUp(self):
+        self.seoul = Location.objects.create(
+            province="Seoul", city="Gangnam", town="Yeoksam"
+        )
+        self.busan = Location.objects.create(
+            province="Busan", city="Haeundae", town="U-dong"
+        )
+        self.user = UserDetail.objects.create(name="Local User")
+        UserLocation.objects.create(user_id=self.user, location_id=self.seoul)
+        self.others = UserDetail.objects.bulk_create(
+            [UserDetail(name=f"other-{i}") for i in range(3)]
+        )
+
+        self.quiet = self._event("Quiet", self.seoul)
+        self.popular = self._event("Popular", self.seoul)
+        self.far = self._event("Far", self.busan)
+        for other in self.others[:2]:
+            UserEvent.objects.create(user_id=other, event_id=self.popular)
+        UserEvent.objects.create(user_id=self.others[2], event_id=self.quiet)
+
+        self.url = f"/api/users/{self.user.user_id}/recommended_events/"
+
+    def _event(self, name, location):
+        event = EventDetail.objects.create(
+            event_name=name, capacity=10, duration=60, address="Test"
+        )
+        EventLocation.objects.create(event_id=event, location_id=location)
+        return event
+
+    def _names(self, response):
+        return [event["event_name"] for event in response.data["results"]]
+
+    def test_index_tracks_locations_and_participants(self):
+        """Test that index rows follow EventLocation and UserEvent changes"""
+        scores = dict(
+            RecommendedEvent.objects.filter(location_id=self.seoul).values_list(
+                "event_id", "score"
+            )
+        )
+        self.assertEqual(scores, {self.quiet.event_id: 1, self.popular.event_id: 2})
+
+        UserEvent.objects.filter(event_id=self.popular).delete()
+        EventLocation.objects.filter(event_id=self.quiet).delete()
+
+        scores = dict(
+            RecommendedEvent.objects.filter(location_id=self.seoul).values_list(
+                "event_id", "score"
+            )
+        )
+        self.assertEqual(scores, {self.popular.event_id: 0})
+
+    def test_index_drops_closed_events(self):
+        """Test that cancelling an event removes it and reopening restores it"""
+        self.popular.status = EventStatus.CANCELLED
+        self.popular.save()
+        self.assertFalse(
+            RecommendedEvent.objects.filter(event_id=self.popular).exists()
+        )
+
+        self.popular.status = EventStatus.PLANNED
+        self.popular.save()
+        self.assertEqual(RecommendedEvent.objects.get(event_id=self.popular).score, 2)
+
+    def test_recommended_events_ranked_by_popularity(self):
+        """Test GET /api/users/{user_id}/recommended_events/"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._names(response), ["Popular", "Quiet"])
+        self.assertIsNone(response.data["next_cursor"])
+
+    def test_recommended_events_exclude_joined(self):
+        """Test that events the user joined are not recommended"""
+        UserEvent.objects.create(user_id=self.user, event_id=self.popular)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(self._names(response), ["Quiet"])
+
+    def test_recommended_events_paginated(self):
+        """Test that the cursor walks the ranked list one page at a time"""
+        first = self.client.get(self.url, {"limit": 1})
+        self.assertEqual(self._names(first), ["Popular"])
+
+        second = self.client.get(
+            self.url, {"limit": 1, "cursor": first.data["next_cursor"]}
+        )
+        self.assertEqual(self._names(second), ["Quiet"])
+        self.assertIsNone(second.data["next_cursor"])
+
+    def test_recommended_events_listed_once_across_locations(self):
+        """Test that an event in several of the user's locations is listed once"""
+        UserLocation.objects.create(user_id=self.user, location_id=self.busan)
+        EventLocation.objects.create(event_id=self.popular, location_id=self.busan)
+
+        response = self.client.get(self.url)
+        self.assertEqual(self._names(response), ["Popular", "Quiet", "Far"])
+
+        first = self.client.get(self.url, {"limit": 1})
+        second = self.client.get(
+            self.url, {"limit": 2, "cursor": first.data["next_cursor"]}
+        )
+        self.assertEqual(
+            self._names(first) + self._names(second), self._names(response)
+        )
+
+    def test_recommended_events_malformed_user(self):
+        """Test that a malformed user id is a 404"""
+        response = self.client.get("/api/users/not-a-uuid/recommended_events/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_recommended_events_query_count(self):
+        """Test that a page costs the location lookup plus one indexed query"""
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+
+class EventSearchTestCase(APITestCase):
+    """Test cases for full-text and fuzzy event search"""
+
+    url = "/api/events/search/"
+
+    def setUp(self):
+        self.festival = self._event("Jazz Festival", "Outdoor music", "Olympic Park")
+        self.soccer = self._event("주말 축구 모임", "축구를 좋아하는 사람들", "마포구")
+        self.market = self._event("Night Market", "Food and jazz", "Hongdae")
+
+    def _event(self, name, description, address):
+        return EventDetail.objects.create(
+            event_name=name,
+            description=description,
+            address=address,
+            capacity=10,
+            duration=60,
+        )
+
+    def _search(self, q, **params):
+        return self.client.get(self.url, {"q": q, **params})
+
+    def _names(self, response):
+        return [event["event_name"] for event in response.data["results"]]
+
+    def test_search_vector_maintained_on_write(self):
+        """Test that the trigger fills and updates the search vector"""
+        self.assertEqual(self._names(self._search("olympic")), ["Jazz Festival"])
+
+        self.festival.address = "Seoul Forest"
+        self.festival.save()
+
+        self.assertEqual(self._names(self._search("olympic")), [])
+        self.assertEqual(self._names(self._search("forest")), ["Jazz Festival"])
+
+    def test_name_ranks_above_description(self):
+        """Test that a match in the name outranks one in the description"""
+        response = self._search("jazz")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._names(response), ["Jazz Festival", "Night Market"])
+
+    def test_korean_word_prefix(self):
+        """Test that Korean words match with particles attached"""
+        response = self._search("축구")
+        self.assertEqual(self._names(response), ["주말 축구 모임"])
+
+        response = self._search("좋아")
+        self.assertEqual(self._names(response), ["주말 축구 모임"])
+
+    def test_typo_tolerant(self):
+        """Test that a misspelled name still matches by trigram similarity"""
+        self.assertEqual(self._names(self._search("festivl")), ["Jazz Festival"])
+
+    def test_search_paginated(self):
+        """Test that the cursor walks the ranked results"""
+        first = self._search("jazz", limit=1)
+        self.assertEqual(self._names(first), ["Jazz Festival"])
+
+        second = self._search("jazz", limit=1, cursor=first.data["next_cursor"])
+        self.assertEqual(self._names(second), ["Night Market"])
+        self.assertIsNone(second.data["next_cursor"])
+
+    def test_search_requires_words(self):
+        """Test that an empty query or one without words is handled"""
+        self.assertEqual(self._search("").status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self._names(self._search("&!:*")), [])
+
+    def test_search_query_count(self):
+        """Test that a page of results is a single query"""
+        with self.assertNumQueries(1):
+            self._search("jazz")
+
+
+class NearbyEventTestCase(APITestCase):
+    """Test cases for geohash-indexed nearby event search"""
+
+    url = "/api/events/nearby/"
+    CITY_HALL = (37.5665, 126.9780)
+
+    def setUp(self):
+        self.location = Location.objects.create(
+            province="Seoul",
+            city="Jung",
+            town="Taepyeong",
+            latitude=self.CITY_HALL[0],
+            longitude=self.CITY_HALL[1],
+        )
+        self.near = self._event("Near", 37.5700, 126.9830)  # ~600m
+        self.namsan = self._event("Namsan", 37.5512, 126.9882)  # ~1.9km
+        # inside the 2km bounding box, but ~2.5km away
+        self.corner = self._event("Corner", 37.5825, 126.9980)
+        self.gangnam = self._event("Gangnam", 37.4979, 127.0276)  # ~8.9km
+        closed = self._event("Closed", 37.5666, 126.9781)
+        closed.status = EventStatus.CANCELLED
+        closed.save()
+        self._event("Nowhere", None, None)
+
+    def _event(self, name, latitude, longitude):
+        event = EventDetail.objects.create(
+            event_name=name, capacity=10, duration=60, address="Test"
+        )
+        EventLocation.objects.create(
+            event_id=event,
+            location_id=self.location,
+            latitude=latitude,
+            longitude=longitude,
+        )
+        return event
+
+    def _nearby(self, **params):
+        return self.client.get(self.url, params)
+
+    def _names(self, response):
+        return [event["event_name"] for event in response.data["results"]]
+
+    def test_geohash_follows_coordinates(self):
+        """Test that the geohash is set on save and blank without coordinates"""
+        venue = EventLocation.objects.get(event_id=self.near)
+        self.assertEqual(venue.geohash, encode(37.5700, 126.9830))
+
+        venue.latitude, venue.longitude = 37.4979, 127.0276
+        venue.save()
+        venue.refresh_from_db()
+        self.assertEqual(venue.geohash, encode(37.4979, 127.0276))
+        self.assertEqual(
+            EventLocation.objects.get(event_id__event_name="Nowhere").geohash, ""
+        )
+
+    def test_covering_cells_cover_circle(self):
+        """Test that every point within the radius falls in a covering cell"""
+        for radius in (50, 2_000, 50_000):
+            box = bounding_box(*self.CITY_HALL, radius)
+            cells = covering_cells(*box)
+            self.assertLessEqual(len(cells), 16)
+            for i in range(21):
+                for j in range(21):
+                    lat = box[0] + (box[2] - box[0]) * i / 20
+                    lon = box[1] + (box[3] - box[1]) * j / 20
+                    if haversine(*self.CITY_HALL, lat, lon) <= radius:
+                        geohash = encode(lat, lon)
+                        self.assertTrue(any(map(geohash.startswith, cells)))
+
+    def test_nearby_within_radius(self):
+        """Test exact-distance filtering and nearest-first order"""
+        lat, lon = self.CITY_HALL
+        response = self._nearby(lat=lat, lon=lon, radius=2000)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._names(response), ["Near", "Namsan"])
+        self.assertAlmostEqual(
+            response.data["results"][0]["distance"],
+            haversine(lat, lon, 37.5700, 126.9830),
+            delta=1,
+        )
+
+    def test_nearby_default_radius(self):
+        """Test that the default radius is 5km and closed events are left out"""
+        lat, lon = self.CITY_HALL
+        response = self._nearby(lat=lat, lon=lon)
+
+        self.assertEqual(self._names(response), ["Near", "Namsan", "Corner"])
+
+    def test_nearby_location(self):
+        """Test that a location's centre can be the starting point"""
+        response = self._nearby(location_id=str(self.location.location_id))
+
+        self.assertEqual(self._names(response), ["Near", "Namsan", "Corner"])
+
+    def test_nearby_bbox(self):
+        """Test a bounding-box search, nearest to the given point first"""
+        lat, lon = self.CITY_HALL
+        response = self._nearby(bbox="37.49,126.98,37.58,127.03", lat=lat, lon=lon)
+
+        self.assertEqual(self._names(response), ["Near", "Namsan", "Gangnam"])
+
+    def test_nearby_paginated(self):
+        """Test that the cursor walks the results by distance"""
+        lat, lon = self.CITY_HALL
+        first = self._nearby(lat=lat, lon=lon, limit=2)
+        self.assertEqual(self._names(first), ["Near", "Namsan"])
+
+        second = self._nearby(
+            lat=lat, lon=lon, limit=2, cursor=first.data["next_cursor"]
+        )
+        self.assertEqual(self._names(second), ["Corner"])
+        self.assertIsNone(second.data["next_cursor"])
+
+    def test_nearby_invalid_parameters(self):
+        """Test that bad coordinates, radii and boxes are rejected"""
+        for params in (
+            {},
+            {"lat": "north", "lon": 126.9},
+            {"lat": 91, "lon": 126.9},
+            {"lat": 37.5, "lon": 126.9, "radius": -1},
+            {"bbox": "37.6,126.9,37.5,127.0"},
+        ):
+            with self.subTest(params=params):
+                response = self._nearby(**params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self._nearby(location_id=str(uuid.uuid4()))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_nearby_query_count(self):
+        """Test that a page is one query over the geohash index"""
+        lat, lon = self.CITY_HALL
+        with self.assertNumQueries(1):
+            self._nearby(lat=lat, lon=lon)
+
+
+class EventFeedTestCase(APITestCase):
+    """Test cases for the filterable, keyset-paginated event feed"""
+
+    url = "/api/events/"
+
+    def setUp(self):
+        self.sports = Category.objects.create(category_name="Sports")
+        self.music = Category.objects.create(category_name="Music")
+        self.seoul = Location.objects.create(
+            province="Seoul", city="Gangnam", town="Yeoksam"
+        )
+        self.busan = Location.objects.create(
+            province="Busan", city="Haeundae", town="U-dong"
+        )
+        now = timezone.now()
+        self.events = {}
+        for age, (name, category, location, views, featured, event_status) in enumerate(
+            [
+                ("Run", self.sports, self.seoul, 5, False, EventStatus.PLANNED),
+                ("Gig", self.music, self.seoul, 50, True, EventStatus.PLANNED),
+                ("Swim", self.sports, self.busan, 20, False, EventStatus.ONGOING),
+                ("Jam", self.music, self.busan, 30, False, EventStatus.COMPLETED),
+            ]
+        ):
+            event = EventDetail.objects.create(
+                event_name=name,
+                capacity=10,
+                duration=60,
+                address="Test",
+                view_count=views,
+                is_featured=featured,
+                status=event_status,
+            )
+            EventDetail.objects.filter(pk=event.pk).update(
+                time_created=now - timedelta(hours=age)
+            )
+            EventCategory.objects.create(event_id=event, category_id=category)
+            EventLocation.objects.create(event_id=event, location_id=location)
+            self.events[name] = event
+
+    def _feed(self, **params):
+        return self.client.get(self.url, params)
+
+    def _names(self, response):
+        return [event["event_name"] for event in response.data["results"]]
+
+    def test_feed_recent_first(self):
+        """Test GET /api/events/ orders by recency by default"""
+        response = self._feed()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._names(response), ["Run", "Gig", "Swim", "Jam"])
+        self.assertIsNone(response.data["next_cursor"])
+
+    def test_feed_popular_first(self):
+        """Test that sort=popular orders by view count"""
+        response = self._feed(sort="popular")
+
+        self.assertEqual(self._names(response), ["Gig", "Jam", "Swim", "Run"])
+
+    def test_feed_filters(self):
+        """Test the category, location, status and is_featured filters"""
+        cases = [
+            ({"category": str(self.sports.category_id)}, ["Run", "Swim"]),
+            ({"location": str(self.busan.location_id)}, ["Swim", "Jam"]),
+            ({"status": "planned,ongoing"}, ["Run", "Gig", "Swim"]),
+            ({"is_featured": "true"}, ["Gig"]),
+            (
+                {
+                    "category": str(self.music.category_id),
+                    "location": str(self.busan.location_id),
+                    "sort": "popular",
+                },
+                ["Jam"],
+            ),
+        ]
+        for params, expected in cases:
+            with self.subTest(params=params):
+                self.assertEqual(self._names(self._feed(**params)), expected)
+
+    def test_feed_event_listed_once(self):
+        """Test that an event in two categories of the filter appears once"""
+        EventCategory.objects.create(
+            event_id=self.events["Run"], category_id=self.music
+        )
+
+        response = self._feed(category=str(self.music.category_id))
+
+        self.assertEqual(self._names(response), ["Run", "Gig", "Jam"])
+
+    def test_feed_paginated(self):
+        """Test that the cursor walks the feed in both sort orders"""
+        for sort, expected in (
+            ("recent", ["Run", "Gig", "Swim", "Jam"]),
+            ("popular", ["Gig", "Jam", "Swim", "Run"]),
+        ):
+            with self.subTest(sort=sort):
+                names, cursor = [], None
+                while True:
+                    params = {"sort": sort, "limit": 3}
+                    if cursor:
+                        params["cursor"] = cursor
+                    response = self._feed(**params)
+                    names += self._names(response)
+                    cursor = response.data["next_cursor"]
+                    if cursor is None:
+                        break
+                self.assertEqual(names, expected)
+
+    def test_feed_invalid_parameters(self):
+        """Test that unknown filter values are rejected"""
+        for params in (
+            {"sort": "random"},
+            {"status": "planned,unknown"},
+            {"is_featured": "yes"},
+            {"category": "not-a-uuid"},
+            {"cursor": "???"},
+            {"cursor": encode_cursor(["yesterday", "not-a-uuid"])},
+            {"cursor": encode_cursor([[1], {"a": 1}])},
+        ):
+            with self.subTest(params=params):
+                response = self._feed(**params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_feed_query_count(self):
+        """Test that a page is one query whatever the filters"""
+        with self.assertNumQueries(1):
+            self._feed(
+                category=str(self.sports.category_id),
+                location=str(self.seoul.location_id),
+                status="planned",
+                is_featured="false",
+                sort="popular",
+            )
+
+
+class TrendingTestCase(APITestCase):
+    """Test cases for the time-decayed trending snapshot"""
+
+    url = "/api/events/trending/"
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.seoul = Location.objects.create(
+            province="Seoul", city="Gangnam", town="Yeoksam"
+        )
+        self.busan = Location.objects.create(
+            province="Busan", city="Haeundae", town="U-dong"
+        )
+        self.hot = self._event("Hot", self.seoul)
+        self.old = self._event("Old", self.seoul)
+        self.beach = self._event("Beach", self.busan)
+        self.users = UserDetail.objects.bulk_create(
+            [UserDetail(name=f"fan-{i}") for i in range(10)]
+        )
+
+    def _event(self, name, location, capacity=10):
+        event = EventDetail.objects.create(
+            event_name=name, capacity=capacity, duration=60, address="Test"
+        )
+        EventLocation.objects.create(event_id=event, location_id=location)
+        return event
+
+    def _views(self, event, views, hours_ago):
+        EventViewBucket.objects.create(
+            event_id=event, hour=self.now - timedelta(hours=hours_ago), views=views
+        )
+
+    def _scores(self, province=""):
+        return dict(
+            TrendingEvent.objects.filter(province=province)
+            .order_by("rank")
+            .values_list("event_id__event_name", "score")
+        )
+
+    def _names(self, response):
+        return [event["event_name"] for event in response.data["results"]]
+
+    def test_flush_fills_hourly_buckets(self):
+        """Test that flushed views are added to their hour's bucket"""
+        hour = self.now.replace(minute=0, second=0, microsecond=0)
+        for count in (3, 2):
+            EventView.objects.bulk_create(
+                [EventView(event_id=self.hot) for _ in range(count)]
+            )
+            EventView.objects.update(time_viewed=hour + timedelta(minutes=30))
+            flush_event_views()
+
+        bucket = EventViewBucket.objects.get(event_id=self.hot)
+        self.assertEqual((bucket.hour, bucket.views), (hour, 5))
+
+    def test_recent_activity_outranks_older(self):
+        """Test that the same views count less as they age"""
+        self._views(self.hot, 10, hours_ago=0)
+        self._views(self.old, 10, hours_ago=72)
+
+        compute_trending_events()
+
+        scores = self._scores()
+        self.assertEqual(list(scores), ["Hot", "Old"])
+        # three half-lives apart
+        self.assertAlmostEqual(scores["Hot"] / scores["Old"], 2**3, delta=0.1)
+
+    def test_joins_and_fill_rate_count(self):
+        """Test that recent joins add to the score and fuller events rank higher"""
+        self._views(self.hot, 10, hours_ago=1)
+        self._views(self.beach, 10, hours_ago=1)
+        for user in self.users:
+            UserEvent.objects.create(user_id=user, event_id=self.beach)
+        # joined before the window: only the fill rate counts
+        UserEvent.objects.filter(event_id=self.beach).update(
+            time_joined=self.now - timedelta(days=30)
+        )
+
+        compute_trending_events()
+        scores = self._scores()
+        self.assertAlmostEqual(scores["Beach"] / scores["Hot"], 2, places=3)
+
+        UserEvent.objects.create(user_id=self.users[0], event_id=self.hot)
+        compute_trending_events()
+        self.assertGreater(self._scores()["Hot"], scores["Hot"] + 9)
+
+    def test_per_province_and_open_events_only(self):
+        """Test the province rankings and that closed events are left out"""
+        self._views(self.hot, 10, hours_ago=1)
+        self._views(self.old, 5, hours_ago=1)
+        self._views(self.beach, 20, hours_ago=1)
+        self.old.status = EventStatus.COMPLETED
+        self.old.save()
+
+        compute_trending_events()
+
+        self.assertEqual(list(self._scores()), ["Beach", "Hot"])
+        self.assertEqual(list(self._scores("Seoul")), ["Hot"])
+        self.assertEqual(
+            list(
+                TrendingEvent.objects.filter(province="Busan").values_list(
+                    "rank", flat=True
+                )
+            ),
+            [1],
+        )
+
+    def test_snapshot_replaced_and_buckets_expire(self):
+        """Test that each run replaces the snapshot and drops expired buckets"""
+        self._views(self.hot, 10, hours_ago=1)
+        self._views(self.old, 10, hours_ago=24 * 8)
+        compute_trending_events()
+        self._views(self.beach, 5, hours_ago=1)
+
+        result = compute_trending_events()
+
+        self.assertEqual(list(self._scores()), ["Hot", "Beach"])
+        self.assertEqual(result["ranked"], 4)  # overall, Seoul and Busan
+        self.assertFalse(EventViewBucket.objects.filter(event_id=self.old).exists())
+
+    def test_trending_endpoint(self):
+        """Test GET /api/events/trending/, overall, per province and paged"""
+        self._views(self.hot, 10, hours_ago=1)
+        self._views(self.old, 5, hours_ago=1)
+        self._views(self.beach, 20, hours_ago=1)
+        compute_trending_events()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._names(response), ["Beach", "Hot", "Old"])
+        self.assertIsNotNone(response.data["time_computed"])
+
+        response = self.client.get(self.url, {"province": "Seoul", "limit": 1})
+        self.assertEqual(self._names(response), ["Hot"])
+        response = self.client.get(
+            self.url,
+            {"province": "Seoul", "limit": 1, "cursor": response.data["next_cursor"]},
+        )
+        self.assertEqual(self._names(response), ["Old"])
+        self.assertIsNone(response.data["next_cursor"])
+
+        response = self.client.get(self.url, {"province": "Jeju"})
+        self.assertEqual(response.data["results"], [])
+
+
 class EventAPITestCase(APITestCase):
     """Test cases for Event API endpoints"""
 
@@ -279,9 +954,73 @@ class EventAPITestCase(APITestCase):
         response = self.client.get(url)
 
         if response.status_code == status.HTTP_200_OK:
+            # views are buffered until the beat task flushes them
+            flush_event_views()
             self.event.refresh_from_db()
             self.assertEqual(self.event.view_count, initial_count + 1)
 
+    def test_flush_event_views_aggregates_buffered_views(self):
+        """Test that buffered views are folded into view_count exactly once"""
+        other = EventDetail.objects.create(
+            event_name="Other Event", capacity=10, duration=60, address="Test"
+        )
+        EventView.objects.bulk_create(
+            [EventView(event_id=self.event) for _ in range(5)]
+            + [EventView(event_id=other) for _ in range(2)]
+        )
+
+        result = flush_event_views()
+
+        self.assertEqual(result, {"events": 2, "views": 7})
+        self.event.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.event.view_count, 5)
+        self.assertEqual(other.view_count, 2)
+        self.assertFalse(EventView.objects.exists())
+
+        # a second flush has nothing left to apply
+        flush_event_views()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.view_count, 5)
+
+    def test_stale_save_keeps_flushed_views(self):
+        """Test that saving an instance loaded before a flush keeps its views"""
+        stale = EventDetail.objects.get(pk=self.event.pk)
+        EventView.objects.bulk_create(
+            [EventView(event_id=self.event) for _ in range(3)]
+        )
+        flush_event_views()
+
+        stale.event_name = "Renamed"
+        stale.save()
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.view_count, 3)
+        self.assertEqual(self.event.event_name, "Renamed")
+
+    def test_retrieve_event_sparse_fields(self):
+        """Test that ?fields= limits both the payload and the columns read"""
+        url = f"/api/events/{self.event.event_id}/?fields=event_name,capacity,address"
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {"event_name", "capacity", "address"})
+        select = next(q["sql"] for q in ctx.captured_queries if "SELECT" in q["sql"])
+        self.assertNotIn('"description"', select)
+        self.assertNotIn('"main_image_hash"', select)
+
+    def test_retrieve_event_exclude_fields(self):
+        """Test that ?exclude= drops fields from the payload"""
+        url = f"/api/events/{self.event.event_id}/?exclude=description,main_image"
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("description", response.data)
+        self.assertNotIn("main_image", response.data)
+        self.assertIn("event_name", response.data)
+
     def test_get_available_spots(self):
         """Test GET /events/{event_id}/spots/"""
         url = f"/api/events/{self.event.event_id}/spots/"
@@ -389,6 +1128,357 @@ class EventAPITestCase(APITestCase):
             self.assertIn("organizer", response.data.get("error", "").lower())
 
 
+class ParticipantCountTestCase(APITestCase):
+    """Test cases for the trigger-maintained EventDetail.participant_count"""
+
+    def setUp(self):
+        self.event = EventDetail.objects.create(
+            event_name="Counted", capacity=3, duration=60, address="Test"
+        )
+        self.users = UserDetail.objects.bulk_create(
+            [UserDetail(name=f"user-{i}") for i in range(3)]
+        )
+
+    def _count(self):
+        return EventDetail.objects.get(pk=self.event.pk).participant_count
+
+    def test_follows_inserts_and_deletes(self):
+        """Test that save, bulk_create and delete all move the count"""
+        self.assertEqual(self._count(), 0)
+        UserEvent.objects.create(user_id=self.users[0], event_id=self.event)
+        UserEvent.objects.bulk_create(
+            [UserEvent(user_id=user, event_id=self.event) for user in self.users[1:]]
+        )
+        self.assertEqual(self._count(), 3)
+
+        UserEvent.objects.filter(user_id=self.users[0]).delete()
+        self.assertEqual(self._count(), 2)
+
+    def test_stale_save_keeps_count(self):
+        """Test that saving an instance loaded before a join keeps the join"""
+        stale = EventDetail.objects.get(pk=self.event.pk)
+        UserEvent.objects.create(user_id=self.users[0], event_id=self.event)
+
+        stale.event_name = "Renamed"
+        stale.save()
+
+        self.assertEqual(self._count(), 1)
+        self.assertEqual(
+            EventDetail.objects.get(pk=self.event.pk).event_name, "Renamed"
+        )
+
+    def test_join_never_moves_time_updated_back(self):
+        """Test that a join in a transaction older than the last write moves on"""
+        # the test transaction started before setUp saved the event
+        before = EventDetail.objects.get(pk=self.event.pk).time_updated
+        UserEvent.objects.create(user_id=self.users[0], event_id=self.event)
+
+        self.assertGreater(
+            EventDetail.objects.get(pk=self.event.pk).time_updated, before
+        )
+
+    def test_spots_and_full_event(self):
+        """Test that spots and join read the count"""
+        UserEvent.objects.bulk_create(
+            [UserEvent(user_id=user, event_id=self.event) for user in self.users]
+        )
+        url = f"/api/events/{self.event.event_id}"
+
+        with self.assertNumQueries(1):
+            response = self.client.get(f"{url}/spots/")
+        self.assertEqual(response.data["available_spots"], 0)
+
+        newcomer = UserDetail.objects.create(name="Late")
+        response = self.client.post(
+            f"{url}/join/", {"user_id": str(newcomer.user_id)}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(f"{url}/").data["participant_count"], 3)
+
+    def test_reconcile_participant_counts(self):
+        """Test that reconciliation repairs a drifted count"""
+        UserEvent.objects.create(user_id=self.users[0], event_id=self.event)
+        EventDetail.objects.filter(pk=self.event.pk).update(participant_count=42)
+
+        self.assertEqual(reconcile_participant_counts(), {"fixed": 1})
+        self.assertEqual(self._count(), 1)
+        self.assertEqual(reconcile_participant_counts(), {"fixed": 0})
+
+    def test_reconcile_in_batches(self):
+        """Test that every batch of events is recounted"""
+        others = EventDetail.objects.bulk_create(
+            [
+                EventDetail(event_name=f"E{i}", capacity=3, duration=60, address="T")
+                for i in range(4)
+            ]
+        )
+        EventDetail.objects.update(participant_count=7)
+
+        self.assertEqual(reconcile_participant_counts(batch_size=2), {"fixed": 5})
+        self.assertEqual(
+            set(
+                EventDetail.objects.filter(
+                    pk__in=[self.event.pk, *(event.pk for event in others)]
+                ).values_list("participant_count", flat=True)
+            ),
+            {0},
+        )
+
+
+class JoinedBatchTestCase(APITestCase):
+    """Test cases for the batch membership lookup (GET /events/joined/)"""
+
+    url = "/api/events/joined/"
+
+    def setUp(self):
+        caches["default"].clear()
+        joined_events.clear()
+        self.user = UserDetail.objects.create(name="Member")
+        self.events = EventDetail.objects.bulk_create(
+            [
+                EventDetail(
+                    event_name=f"Event {i}", capacity=10, duration=60, address="Test"
+                )
+                for i in range(3)
+            ]
+        )
+        UserEvent.objects.create(user_id=self.user, event_id=self.events[0])
+
+    def _lookup(self, events=None):
+        events = self.events if events is None else events
+        return self.client.get(
+            self.url,
+            {
+                "user_id": str(self.user.user_id),
+                "event_ids": ",".join(str(event.event_id) for event in events),
+            },
+        )
+
+    def test_batch_lookup(self):
+        """Test that every requested event is answered in one query"""
+        with self.assertNumQueries(1):
+            response = self._lookup()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["is_in_event"],
+            {
+                str(self.events[0].event_id): True,
+                str(self.events[1].event_id): False,
+                str(self.events[2].event_id): False,
+            },
+        )
+
+    def test_cached_set_skips_database(self):
+        """Test that a repeated lookup is answered from the cached set"""
+        self._lookup()
+
+        with self.assertNumQueries(0):
+            response = self._lookup(self.events[1:])
+        self.assertEqual(
+            response.data["is_in_event"],
+            {str(self.events[1].event_id): False, str(self.events[2].event_id): False},
+        )
+
+    def test_join_and_leave_invalidate(self):
+        """Test that the cached set follows joins and leaves on commit"""
+        self._lookup()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f"/api/events/{self.events[1].event_id}/join/",
+                {"user_id": str(self.user.user_id)},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        joined = self._lookup().data["is_in_event"]
+        self.assertTrue(joined[str(self.events[1].event_id)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserEvent.objects.filter(
+                user_id=self.user, event_id=self.events[0]
+            ).delete()
+        joined = self._lookup().data["is_in_event"]
+        self.assertFalse(joined[str(self.events[0].event_id)])
+
+    @override_settings(JOINED_EVENTS_CACHE_MAX_EVENTS=0)
+    def test_large_set_falls_back_to_query(self):
+        """Test that a user with too many joins is answered by an IN query"""
+        self._lookup()
+
+        with self.assertNumQueries(2):
+            response = self._lookup()
+        self.assertTrue(response.data["is_in_event"][str(self.events[0].event_id)])
+
+    def test_invalid_parameters(self):
+        """Test that missing, malformed and oversized id lists are rejected"""
+        for params in (
+            {"event_ids": str(self.events[0].event_id)},
+            {"user_id": str(self.user.user_id)},
+            {"user_id": str(self.user.user_id), "event_ids": "not-a-uuid"},
+            {
+                "user_id": str(self.user.user_id),
+                "event_ids": ",".join(str(uuid.uuid4()) for _ in range(501)),
+            },
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SpotsBatchTestCase(APITestCase):
+    """Test cases for the batch available-spots lookup (GET /events/spots/)"""
+
+    url = "/api/events/spots/"
+
+    def setUp(self):
+        self.events = EventDetail.objects.bulk_create(
+            [
+                EventDetail(
+                    event_name=f"Event {i}",
+                    capacity=capacity,
+                    duration=60,
+                    address="Test",
+                )
+                for i, capacity in enumerate((5, 2, 3))
+            ]
+        )
+        users = UserDetail.objects.bulk_create(
+            [UserDetail(name=f"user-{i}") for i in range(2)]
+        )
+        UserEvent.objects.bulk_create(
+            [UserEvent(user_id=user, event_id=self.events[1]) for user in users]
+            + [UserEvent(user_id=users[0], event_id=self.events[0])]
+        )
+
+    def test_batch_spots(self):
+        """Test that every known event is answered in one grouped query"""
+        event_ids = [event.event_id for event in self.events] + [uuid.uuid4()]
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.url, {"event_ids": ",".join(map(str, event_ids))}
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["available_spots"],
+            {
+                str(self.events[0].event_id): 4,
+                str(self.events[1].event_id): 0,
+                str(self.events[2].event_id): 3,
+            },
+        )
+
+    def test_matches_single_event_spots(self):
+        """Test that the batch agrees with GET /events/{id}/spots/"""
+        response = self.client.get(
+            self.url,
+            {"event_ids": ",".join(str(event.event_id) for event in self.events)},
+        )
+        for event in self.events:
+            single = self.client.get(f"/api/events/{event.event_id}/spots/")
+            self.assertEqual(
+                response.data["available_spots"][str(event.event_id)],
+                single.data["available_spots"],
+            )
+
+    def test_invalid_event_ids(self):
+        """Test that missing and malformed id lists are rejected"""
+        for params in ({}, {"event_ids": "1,2"}):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class JoinConcurrencyTestCase(TransactionTestCase):
+    """Stress tests for concurrent joins (each request on its own connection)"""
+
+    def setUp(self):
+        self.event = EventDetail.objects.create(
+            event_name="Popular Event", capacity=50, duration=60, address="Test"
+        )
+        self.url = f"/api/events/{self.event.event_id}/join/"
+
+    def _join(self, user_id):
+        try:
+            response = APIClient().post(
+                self.url, {"user_id": str(user_id)}, format="json"
+            )
+            return response.status_code, response.data
+        finally:
+            connection.close()
+
+    def _join_concurrently(self, user_ids):
+        with ThreadPoolExecutor(max_workers=40) as executor:
+            return list(executor.map(self._join, user_ids))
+
+    def test_concurrent_joins_never_exceed_capacity(self):
+        """Test that 200 concurrent joins admit exactly `capacity` users"""
+        users = UserDetail.objects.bulk_create(
+            [UserDetail(name=f"user-{i}") for i in range(200)]
+        )
+
+        results = self._join_concurrently([user.user_id for user in users])
+
+        statuses = [code for code, _ in results]
+        self.assertEqual(statuses.count(status.HTTP_201_CREATED), 50)
+        self.assertEqual(statuses.count(status.HTTP_400_BAD_REQUEST), 150)
+        self.assertTrue(
+            all(
+                "full" in data["error"].lower() for code, data in results if code == 400
+            )
+        )
+        self.assertEqual(UserEvent.objects.filter(event_id=self.event).count(), 50)
+
+    def test_concurrent_duplicate_joins_admit_once(self):
+        """Test that the same user joining concurrently gets a single row"""
+        user = UserDetail.objects.create(name="Eager User")
+
+        results = self._join_concurrently([user.user_id] * 100)
+
+        statuses = [code for code, _ in results]
+        self.assertEqual(statuses.count(status.HTTP_201_CREATED), 1)
+        self.assertEqual(statuses.count(status.HTTP_200_OK), 99)
+        self.assertEqual(
+            UserEvent.objects.filter(user_id=user, event_id=self.event).count(), 1
+        )
+
+    def test_reconcile_keeps_concurrent_join(self):
+        """Test that a join committing during reconciliation is counted"""
+        user = UserDetail.objects.create(name="Joiner")
+        EventDetail.objects.filter(pk=self.event.pk).update(participant_count=42)
+        joined = threading.Event()
+        commit = threading.Event()
+
+        def join():
+            try:
+                with transaction.atomic():
+                    # the trigger locks the event row until this commits
+                    UserEvent.objects.create(user_id=user, event_id=self.event)
+                    joined.set()
+                    commit.wait(5)
+            finally:
+                connection.close()
+
+        def reconcile():
+            try:
+                return reconcile_participant_counts()
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            joining = executor.submit(join)
+            self.assertTrue(joined.wait(5))
+            reconciling = executor.submit(reconcile)
+            time.sleep(0.2)  # let it block on the event row
+            commit.set()
+            joining.result()
+            reconciling.result()
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participant_count, 1)
+
+
 class NotificationTestCase(TestCase):
     """Test cases for notification system"""
 
@@ -429,6 +1519,122 @@ class NotificationTestCase(TestCase):
         self.assertEqual(user_notif.notification_id, event_notif)
         self.assertFalse(user_notif.is_read)
 
+    def test_send_notification_task_fans_out_in_bulk(self):
+        """Test that the fan-out writes one row per participant in bulk"""
+        users = UserDetail.objects.bulk_create(
+            [UserDetail(name=f"participant-{i}") for i in range(25)]
+        )
+        UserEvent.objects.bulk_create(
+            [UserEvent(user_id=user, event_id=self.event) for user in users]
+        )
+        event_notif = EventNotification.objects.create(
+            event_id=self.event, detail="Event update"
+        )
+
+        # participant cursor + one bulk insert and one count upsert per chunk
+        with self.assertNumQueries(1 + 3 * 2):
+            recipients, pushed = fan_out_notification(event_notif, chunk_size=10)
+
+        self.assertEqual((recipients, pushed), (25, 0))
+        self.assertEqual(
+            UserNotification.objects.filter(notification_id=event_notif).count(), 25
+        )
+
+    def test_send_notification_task_returns_summary(self):
+        """Test that the task result is a compact summary"""
+        event_notif = EventNotification.objects.create(
+            event_id=self.event, detail="Event update"
+        )
+        UserEvent.objects.create(user_id=self.user, event_id=self.event)
+
+        result = send_notification_task(event_notif.notification_id)
+
+        self.assertEqual(
+            result,
+            {
+                "notification_id": str(event_notif.notification_id),
+                "recipients": 1,
+                "pushed": 0,
+            },
+        )
+
+    def test_notification_enqueued_in_outbox(self):
+        """Test that a new notification gets an outbox entry to dispatch"""
+        event_notif = EventNotification.objects.create(
+            event_id=self.event, detail="Event update"
+        )
+
+        self.assertTrue(
+            NotificationOutbox.objects.filter(notification_id=event_notif).exists()
+        )
+
+    def test_dispatch_fans_out_and_deletes_entry(self):
+        """Test that a dispatched entry is fanned out once and removed"""
+        UserEvent.objects.create(user_id=self.user, event_id=self.event)
+        event_notif = EventNotification.objects.create(
+            event_id=self.event, detail="Event update"
+        )
+
+        self.assertEqual(dispatch_notifications(), 1)
+        self.assertEqual(dispatch_notifications(), 0)
+
+        self.assertFalse(NotificationOutbox.objects.exists())
+        self.assertEqual(
+            UserNotification.objects.filter(notification_id=event_notif).count(), 1
+        )
+
+    def test_failed_dispatch_is_retried_later(self):
+        """Test that a failed fan-out rolls back and keeps the entry for later"""
+        self.user.expo_push_token = "ExponentPushToken[test]"
+        self.user.save()
+        UserEvent.objects.create(user_id=self.user, event_id=self.event)
+        EventNotification.objects.create(event_id=self.event, detail="Event update")
+
+        with mock.patch.object(
+            UnreadNotificationCount, "increment", side_effect=RuntimeError("db down")
+        ):
+            result = dispatch_next_notification()
+
+        self.assertIn("db down", result["error"])
+        entry = NotificationOutbox.objects.get()
+        self.assertEqual(entry.attempts, 1)
+        self.assertGreater(entry.available_at, timezone.now())
+        self.assertFalse(UserNotification.objects.exists())
+        self.assertFalse(PushOutbox.objects.exists())
+        # not due again until the retry delay has passed
+        self.assertIsNone(dispatch_next_notification())
+
+    def test_failed_push_is_retried_alone(self):
+        """Test that a push outage keeps the inbox rows and retries only the push"""
+        self.user.expo_push_token = "ExponentPushToken[test]"
+        self.user.save()
+        UserEvent.objects.create(user_id=self.user, event_id=self.event)
+        EventNotification.objects.create(event_id=self.event, detail="Event update")
+
+        self.assertEqual(dispatch_notifications(), 1)
+        with StubExpoServer() as stub:
+            down_url = stub.push_url
+        self.assertEqual(
+            deliver_pushes(push_client=ExpoPushClient(url=down_url, timeout=1)), 0
+        )
+
+        self.assertFalse(NotificationOutbox.objects.exists())
+        self.assertEqual(UserNotification.objects.count(), 1)
+        batch = PushOutbox.objects.get()
+        self.assertEqual(batch.attempts, 1)
+        self.assertGreater(batch.available_at, timezone.now())
+        self.assertIn("ConnectionError", batch.last_error)
+
+        PushOutbox.objects.update(available_at=timezone.now())
+        with StubExpoServer() as stub:
+            client = ExpoPushClient(url=stub.push_url)
+            self.assertEqual(deliver_pushes(push_client=client), 1)
+            client.close()
+
+        self.assertEqual(len(stub.requests), 1)
+        self.assertFalse(PushOutbox.objects.exists())
+        self.assertEqual(UserNotification.objects.count(), 1)
+
     def test_notification_cascade_delete(self):
         """Test that deleting event deletes related notifications"""
         event_notif = EventNotification.objects.create(
@@ -450,6 +1656,1203 @@ class NotificationTestCase(TestCase):
         )
 
 
+class NotificationDispatchTestCase(TransactionTestCase):
+    """Test cases for waking the dispatcher with LISTEN/NOTIFY"""
+
+    def setUp(self):
+        self.event = EventDetail.objects.create(
+            event_name="Test Event", capacity=50, duration=60, address="Test"
+        )
+        listen()
+
+    def tearDown(self):
+        connection.close()
+
+    def _notify_from_other_connection(self, fail=False):
+        def create():
+            try:
+                with transaction.atomic():
+                    EventNotification.objects.create(
+                        event_id=self.event, detail="Event update"
+                    )
+                    if fail:
+                        raise RuntimeError("rolled back")
+            except RuntimeError:
+                pass
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(create).result()
+
+    def test_commit_wakes_dispatcher(self):
+        """Test that a committed notification wakes the listener"""
+        self._notify_from_other_connection()
+
+        self.assertTrue(wait_for_notify(timeout=5))
+        self.assertEqual(dispatch_notifications(), 1)
+
+    def test_rollback_sends_nothing(self):
+        """Test that a rolled back notification leaves no entry and no NOTIFY"""
+        self._notify_from_other_connection(fail=True)
+
+        self.assertFalse(wait_for_notify(timeout=0.2))
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+
+class KakaoLoginTestCase(TestCase):
+    """Test cases for the async Kakao OAuth callback against a stub provider"""
+
+    url = "/api/auth/kakao/callback"
+
+    def _login(self, stub, code, **settings):
+        with override_settings(
+            KAKAO_AUTH_URL=stub.url, KAKAO_API_URL=stub.url, **settings
+        ):
+            return self.client.get(self.url, {"code": code, "state": "app://login"})
+
+    def test_new_user(self):
+        """Test that a first login creates the user and its authentication"""
+        with StubKakaoServer() as stub:
+            response = self._login(stub, stub.authorize(1001, "kakaouser"))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response["Location"].startswith("app://login?status=new"))
+        auth = Authentication.objects.get(provider_user_id="1001")
+        self.assertTrue(auth.provider_access_token.startswith("access-"))
+        self.assertFalse(auth.is_access_token_expired())
+        user = UserAuthentication.objects.get(auth_id=auth).user_id
+        self.assertEqual(user.username, "kakaouser")
+        self.assertIn(f"userId={user.user_id}", response["Location"])
+
+    def test_existing_user(self):
+        """Test that logging in again finds the same user"""
+        with StubKakaoServer() as stub:
+            self._login(stub, stub.authorize(1002, "returning"))
+            response = self._login(stub, stub.authorize(1002, "returning"))
+
+        self.assertIn("status=existing", response["Location"])
+        self.assertEqual(UserDetail.objects.filter(username="returning").count(), 1)
+
+    def test_rejected_code(self):
+        """Test that a code Kakao rejects is reported with Kakao's status"""
+        with StubKakaoServer() as stub:
+            response = self._login(stub, "unknown-code")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Failed to retrieve access token"})
+        self.assertFalse(Authentication.objects.exists())
+
+    def test_timeout(self):
+        """Test that a slow Kakao fails fast with a 504"""
+        with StubKakaoServer(delay=1) as stub:
+            start = time.perf_counter()
+            response = self._login(
+                stub, stub.authorize(1003, "slow"), KAKAO_TIMEOUT=0.1
+            )
+
+        self.assertEqual(response.status_code, 504)
+        self.assertLess(time.perf_counter() - start, 1)
+
+    async def test_concurrent_logins_overlap(self):
+        """Test that logins wait on Kakao concurrently, not one after another"""
+        with StubKakaoServer(delay=0.2) as stub:
+            codes = [stub.authorize(2000 + i, f"user{i}") for i in range(10)]
+            with override_settings(KAKAO_AUTH_URL=stub.url, KAKAO_API_URL=stub.url):
+                start = time.perf_counter()
+                responses = await asyncio.gather(
+                    *(
+                        self.async_client.get(
+                            self.url, {"code": code, "state": "app://login"}
+                        )
+                        for code in codes
+                    )
+                )
+                elapsed = time.perf_counter() - start
+
+        self.assertEqual([r.status_code for r in responses], [302] * 10)
+        self.assertGreater(stub.max_in_flight, 1)
+        # serially: 10 logins x 2 calls x 0.2s
+        self.assertLess(elapsed, 2)
+        self.assertEqual(await Authentication.objects.acount(), 10)
+
+
+class TokenRefreshTestCase(TestCase):
+    """Test cases for the background refresh of provider access tokens"""
+
+    def _auth(self, stub, kakao_id, expires_in, refresh_token=None):
+        code = stub.authorize(kakao_id, f"user{kakao_id}")
+        return Authentication.objects.create(
+            auth_type=AuthType.KAKAO,
+            provider_user_id=str(kakao_id),
+            provider_access_token="stale",
+            provider_access_token_expires_at=timezone.now()
+            + timedelta(seconds=expires_in),
+            provider_refresh_token=refresh_token or f"refresh-{code}",
+        )
+
+    def _refresh(self, stub, **kwargs):
+        with override_settings(KAKAO_AUTH_URL=stub.url):
+            return refresh_provider_tokens(ahead=3600, **kwargs)
+
+    def test_refreshes_expiring_tokens(self):
+        """Test that only tokens expiring within the window are refreshed"""
+        with StubKakaoServer() as stub:
+            expiring = self._auth(stub, 3001, 60)
+            expired = self._auth(stub, 3002, -60)
+            fresh = self._auth(stub, 3003, 6 * 3600)
+            result = self._refresh(stub)
+
+        self.assertEqual(result, {"refreshed": 2, "revoked": 0, "failed": 0})
+        self.assertEqual(stub.refreshed, 2)
+        for auth in (expiring, expired):
+            auth.refresh_from_db()
+            self.assertTrue(auth.provider_access_token.startswith("access-"))
+            self.assertFalse(auth.is_access_token_expired())
+        fresh.refresh_from_db()
+        self.assertEqual(fresh.provider_access_token, "stale")
+
+    def test_rejected_refresh_clears_token(self):
+        """Test that a token Kakao won't refresh is cleared and not retried"""
+        with StubKakaoServer() as stub:
+            auth = self._auth(stub, 3004, 60, refresh_token="revoked")
+            self.assertEqual(self._refresh(stub)["revoked"], 1)
+            self.assertEqual(self._refresh(stub)["revoked"], 0)
+
+        auth.refresh_from_db()
+        self.assertEqual(auth.provider_access_token, "")
+        self.assertTrue(auth.is_access_token_expired())
+
+    def test_client_error_leaves_tokens(self):
+        """Test that a rejection other than invalid_grant does not clear tokens"""
+        with StubKakaoServer() as stub:
+            auth = self._auth(stub, 3006, 60)
+            stub.refresh_error = "invalid_client"
+            result = self._refresh(stub)
+
+        self.assertEqual(result, {"refreshed": 0, "revoked": 0, "failed": 1})
+        auth.refresh_from_db()
+        self.assertEqual(auth.provider_access_token, "stale")
+
+    def test_unreachable_provider_leaves_tokens(self):
+        """Test that transient failures are left for the next run"""
+        with StubKakaoServer() as stub:
+            auth = self._auth(stub, 3005, 60)
+        result = self._refresh(stub)
+
+        self.assertEqual(result, {"refreshed": 0, "revoked": 0, "failed": 1})
+        auth.refresh_from_db()
+        self.assertEqual(auth.provider_access_token, "stale")
+
+    def test_refreshes_in_concurrent_batches(self):
+        """Test that each batch is refreshed concurrently, one UPDATE per batch"""
+        with StubKakaoServer(delay=0.05) as stub:
+            for i in range(25):
+                self._auth(stub, 4000 + i, 60)
+            with CaptureQueriesContext(connection) as queries:
+                result = self._refresh(stub, batch_size=10, max_in_flight=5)
+
+        self.assertEqual(result["refreshed"], 25)
+        self.assertLessEqual(stub.max_in_flight, 5)
+        self.assertGreater(stub.max_in_flight, 1)
+        # 3 pages, each a SELECT and a bulk UPDATE
+        self.assertEqual(len(queries), 6)
+
+
+class PushClientTestCase(TestCase):
+    """Test cases for the batched Expo push client"""
+
+    def test_send_batches_messages(self):
+        """Test that 10k messages cost 100 requests of at most 100 messages"""
+        messages = [{"to": f"ExponentPushToken[{i}]"} for i in range(10_000)]
+
+        with StubExpoServer() as stub:
+            client = ExpoPushClient(url=stub.push_url, max_in_flight=4)
+            accepted = client.send(messages)
+            client.close()
+
+        self.assertEqual(accepted, 10_000)
+        self.assertEqual(len(stub.requests), 100)
+        self.assertTrue(all(len(body) <= 100 for _, body in stub.requests))
+
+    def test_send_bounds_in_flight_requests(self):
+        """Test that concurrent batches never exceed max_in_flight"""
+        messages = [{"to": f"ExponentPushToken[{i}]"} for i in range(1_000)]
+
+        with StubExpoServer(delay=0.02) as stub:
+            client = ExpoPushClient(url=stub.push_url, max_in_flight=3)
+            client.send(messages)
+            client.close()
+
+        self.assertEqual(len(stub.requests), 10)
+        self.assertLessEqual(stub.max_in_flight, 3)
+        self.assertGreater(stub.max_in_flight, 1)
+
+    def test_send_raises_on_failure(self):
+        """Test that an unreachable server raises, so the batch can be retried"""
+        with StubExpoServer() as stub:
+            url = stub.push_url
+        client = ExpoPushClient(url=url, timeout=1)
+
+        with self.assertRaises(requests.RequestException):
+            client.send([{"to": "ExponentPushToken[x]"}])
+
+    def test_fan_out_pushes_to_token_holders(self):
+        """Test that the fan-out queues batches of pushes to token holders"""
+        event = EventDetail.objects.create(
+            event_name="Test Event", capacity=300, duration=60, address="Test"
+        )
+        users = UserDetail.objects.bulk_create(
+            [
+                UserDetail(name=f"user-{i}", expo_push_token=f"ExponentPushToken[{i}]")
+                for i in range(150)
+            ]
+            + [UserDetail(name="no-token")]
+        )
+        UserEvent.objects.bulk_create(
+            [UserEvent(user_id=user, event_id=event) for user in users]
+        )
+        event_notif = EventNotification.objects.create(event_id=event, detail="Hi")
+
+        self.assertEqual(fan_out_notification(event_notif), (151, 150))
+        with StubExpoServer() as stub:
+            client = ExpoPushClient(url=stub.push_url)
+            pushed = deliver_pushes(push_client=client)
+            client.close()
+
+        self.assertEqual(pushed, 150)
+        self.assertEqual(sorted(len(body) for _, body in stub.requests), [50, 100])
+
+    def test_deliver_sends_batches_concurrently(self):
+        """Test that due batches are leased and sent max_in_flight at a time"""
+        PushOutbox.objects.bulk_create(
+            [
+                PushOutbox(messages=[{"to": f"ExponentPushToken[{i}]"}])
+                for i in range(10)
+            ]
+        )
+
+        with StubExpoServer(delay=0.05) as stub:
+            client = ExpoPushClient(url=stub.push_url, max_in_flight=4)
+            self.assertEqual(deliver_push_round(client), {"pushed": 4, "failed": 0})
+            self.assertEqual(PushOutbox.objects.count(), 6)
+            self.assertEqual(deliver_pushes(push_client=client), 6)
+            client.close()
+
+        self.assertEqual(len(stub.requests), 10)
+        self.assertLessEqual(stub.max_in_flight, 4)
+        self.assertGreater(stub.max_in_flight, 1)
+        self.assertFalse(PushOutbox.objects.exists())
+
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+
+
+class ImageTestCase(APITestCase):
+    """Test cases for the blob store and the image endpoint"""
+
+    def setUp(self):
+        self.blob_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.blob_root.cleanup)
+        override = override_settings(BLOB_STORE_ROOT=self.blob_root.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.digest = BlobStore().put(PNG_BYTES)
+        self.url = f"/api/images/{self.digest}/"
+
+    def test_blob_store_is_content_addressed(self):
+        """Test that identical bytes are stored once under their digest"""
+        store = BlobStore()
+
+        self.assertEqual(store.put(PNG_BYTES), self.digest)
+        self.assertEqual(store.read(self.digest), PNG_BYTES)
+        self.assertEqual(len(list(Path(self.blob_root.name).rglob("*"))), 3)
+
+    def test_get_image(self):
+        """Test GET /api/images/{digest}/"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(response.streaming_content), PNG_BYTES)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response["ETag"], f'"{self.digest}"')
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+    def test_get_image_not_modified(self):
+        """Test that a matching If-None-Match returns 304"""
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"{self.digest}"')
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], f'"{self.digest}"')
+
+    def test_get_image_range(self):
+        """Test single byte ranges, suffix ranges and unsatisfiable ranges"""
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-7")
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response.content, PNG_BYTES[:8])
+        self.assertEqual(response["Content-Range"], f"bytes 0-7/{len(PNG_BYTES)}")
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=-10")
+        self.assertEqual(response.content, PNG_BYTES[-10:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f"bytes={len(PNG_BYTES)}-")
+        self.assertEqual(
+            response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+
+    def test_get_missing_image(self):
+        """Test that an unknown digest returns 404"""
+        response = self.client.get(f"/api/images/{'0' * 64}/")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_serializer_stores_uploaded_image(self):
+        """Test that a base64 upload is stored and read back as a URL"""
+        from api.serializers import CreateUserSerializer, SimpleUserDetailSerializer
+
+        other = b"\xff\xd8\xff\xe0" + b"jpeg" * 10
+        serializer = CreateUserSerializer(
+            data={
+                "name": "Pictured",
+                "profile_image": base64.b64encode(other).decode(),
+            }
+        )
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        user = serializer.save()
+
+        digest = hashlib.sha256(other).hexdigest()
+        self.assertEqual(user.profile_image_hash, digest)
+        self.assertTrue(BlobStore().exists(digest))
+        self.assertEqual(
+            SimpleUserDetailSerializer(user).data["profile_image"],
+            f"/api/images/{digest}/",
+        )
+
+    def test_rejected_upload_stores_nothing(self):
+        """Test that the image of an invalid request is not stored"""
+        from api.serializers import CreateUserSerializer
+
+        other = b"\xff\xd8\xff\xe0" + b"rejected" * 10
+        serializer = CreateUserSerializer(
+            data={
+                "name": "Pictured",
+                "profile_image": base64.b64encode(other).decode(),
+                "date_of_birth": "not a date",
+            }
+        )
+
+        self.assertFalse(serializer.is_valid())
+        self.assertFalse(BlobStore().exists(hashlib.sha256(other).hexdigest()))
+
+    def test_serializer_rejects_non_image(self):
+        """Test that arbitrary bytes are rejected"""
+        from api.serializers import CreateUserSerializer
+
+        serializer = CreateUserSerializer(
+            data={"name": "x", "profile_image": base64.b64encode(b"text").decode()}
+        )
+
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("profile_image", serializer.errors)
+
+
+class NotificationInboxTestCase(APITestCase):
+    """Test cases for the keyset-paginated notification inbox"""
+
+    def setUp(self):
+        self.user = UserDetail.objects.create(name="Reader")
+        event = EventDetail.objects.create(
+            event_name="Test Event", capacity=10, duration=60, address="Test"
+        )
+        start = timezone.now()
+        self.notifications = []
+        for i in range(25):
+            event_notif = EventNotification.objects.create(
+                event_id=event, detail=f"update {i}"
+            )
+            self.notifications.append(
+                UserNotification.objects.create(
+                    user_id=self.user,
+                    notification_id=event_notif,
+                    is_read=i % 2 == 0,
+                    time_created=start + timedelta(minutes=i),
+                )
+            )
+        self.url = f"/api/users/{self.user.user_id}/notifications/"
+
+    def test_inbox_pages_newest_first(self):
+        """Test that the cursor walks the whole inbox without gaps or repeats"""
+        details, cursor, pages = [], None, 0
+        while True:
+            params = {"limit": 10, **({"cursor": cursor} if cursor else {})}
+            with self.assertNumQueries(1):
+                response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            details += [n["detail"] for n in response.data["results"]]
+            cursor, pages = response.data["next_cursor"], pages + 1
+            if not cursor:
+                break
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(details, [f"update {i}" for i in reversed(range(25))])
+
+    def test_inbox_unread_only(self):
+        """Test ?unread=true"""
+        response = self.client.get(self.url, {"unread": "true", "limit": 100})
+
+        self.assertEqual(len(response.data["results"]), 12)
+        self.assertFalse(any(n["is_read"] for n in response.data["results"]))
+
+    def test_inbox_ties_on_time_created(self):
+        """Test that rows with the same timestamp are split across pages"""
+        UserNotification.objects.filter(user_id=self.user).update(
+            time_created=timezone.now()
+        )
+
+        first = self.client.get(self.url, {"limit": 20})
+        second = self.client.get(
+            self.url, {"limit": 20, "cursor": first.data["next_cursor"]}
+        )
+
+        ids = [n["user_notification_id"] for n in first.data["results"]]
+        ids += [n["user_notification_id"] for n in second.data["results"]]
+        self.assertEqual(len(set(ids)), 25)
+
+    def test_inbox_invalid_cursor(self):
+        """Test that a malformed cursor, or one of the wrong types, is rejected"""
+        for cursor in ("not-a-cursor", encode_cursor(["yesterday", "not-a-uuid"])):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(self.url, {"cursor": cursor})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_inbox_unknown_user(self):
+        """Test that an unknown or malformed user id returns 404"""
+        for user_id in (uuid.uuid4(), "not-a-uuid"):
+            with self.subTest(user_id=user_id):
+                response = self.client.get(f"/api/users/{user_id}/notifications/")
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class UnreadBadgeTestCase(APITestCase):
+    """Test cases for the maintained unread notification count"""
+
+    def setUp(self):
+        self.event = EventDetail.objects.create(
+            event_name="Test Event", capacity=10, duration=60, address="Test"
+        )
+        self.user = UserDetail.objects.create(name="Reader")
+        self.other = UserDetail.objects.create(name="Other Reader")
+        for user in (self.user, self.other):
+            UserEvent.objects.create(user_id=user, event_id=self.event)
+        for i in range(3):
+            fan_out_notification(
+                EventNotification.objects.create(event_id=self.event, detail=f"{i}")
+            )
+        self.base = f"/api/users/{self.user.user_id}"
+
+    def _badge(self, user=None):
+        user = user or self.user
+        return self.client.get(f"/api/users/{user.user_id}/unread_count/").data[
+            "unread_count"
+        ]
+
+    def test_fan_out_increments_counts(self):
+        """Test that every recipient's count follows the fan-out"""
+        with self.assertNumQueries(1):
+            self.assertEqual(self._badge(), 3)
+        self.assertEqual(self._badge(self.other), 3)
+
+    def test_unread_count_without_notifications(self):
+        """Test that users without a counter row read as zero"""
+        self.assertEqual(self._badge(UserDetail.objects.create(name="New")), 0)
+
+    def test_read_notifications_decrements(self):
+        """Test that marking read (twice) decrements only once"""
+        first = UserNotification.objects.filter(user_id=self.user).first()
+        body = {"user_notification_ids": [str(first.pk)]}
+
+        response = self.client.post(
+            f"{self.base}/read_notifications/", body, format="json"
+        )
+        self.assertEqual(response.data, {"marked_read": 1})
+        self.client.post(f"{self.base}/read_notifications/", body, format="json")
+
+        self.assertEqual(self._badge(), 2)
+        self.assertEqual(self._badge(self.other), 3)
+
+    def test_read_notifications_invalid_ids(self):
+        """Test that malformed ids are rejected"""
+        response = self.client.post(
+            f"{self.base}/read_notifications/",
+            {"user_notification_ids": ["nope"]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_read_all_notifications(self):
+        """Test that mark-all-read clears the badge"""
+        response = self.client.post(f"{self.base}/read_all_notifications/")
+
+        self.assertEqual(response.data, {"marked_read": 3})
+        self.assertEqual(self._badge(), 0)
+
+    def test_malformed_user_id(self):
+        """Test that a malformed user id is a 404, not a server error"""
+        response = self.client.get("/api/users/not-a-uuid/unread_count/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.post("/api/users/not-a-uuid/read_all_notifications/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_reconcile_unread_counts(self):
+        """Test that reconciliation repairs drifted and missing counts"""
+        UnreadNotificationCount.objects.filter(pk=self.user).update(unread_count=42)
+        UnreadNotificationCount.objects.filter(pk=self.other).delete()
+
+        self.assertEqual(reconcile_unread_counts(), {"fixed": 2})
+        self.assertEqual(self._badge(), 3)
+        self.assertEqual(self._badge(self.other), 3)
+        self.assertEqual(reconcile_unread_counts(), {"fixed": 0})
+
+
+class UnreadCountConcurrencyTestCase(TransactionTestCase):
+    """Test that reconciliation keeps counter writes that commit while it waits"""
+
+    def setUp(self):
+        self.event = EventDetail.objects.create(
+            event_name="Test Event", capacity=10, duration=60, address="Test"
+        )
+        self.user = UserDetail.objects.create(name="Reader")
+        UserEvent.objects.create(user_id=self.user, event_id=self.event)
+        for i in range(2):
+            fan_out_notification(
+                EventNotification.objects.create(event_id=self.event, detail=f"{i}")
+            )
+        UnreadNotificationCount.objects.filter(pk=self.user).update(unread_count=42)
+
+    def _reconcile_during(self, write):
+        """Run reconciliation while `write` holds the counter row uncommitted"""
+        written = threading.Event()
+        commit = threading.Event()
+
+        def writer():
+            try:
+                with transaction.atomic():
+                    write()
+                    written.set()
+                    commit.wait(5)
+            finally:
+                connection.close()
+
+        def reconcile():
+            try:
+                return reconcile_unread_counts()
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            writing = executor.submit(writer)
+            self.assertTrue(written.wait(5))
+            reconciling = executor.submit(reconcile)
+            time.sleep(0.2)  # let it block on the counter row
+            commit.set()
+            writing.result()
+            reconciling.result()
+
+        return UnreadNotificationCount.objects.get(pk=self.user).unread_count
+
+    def test_reconcile_keeps_concurrent_fan_out(self):
+        """Test that a fan-out committing during reconciliation is counted"""
+        notification = EventNotification.objects.create(
+            event_id=self.event, detail="new"
+        )
+
+        count = self._reconcile_during(lambda: fan_out_notification(notification))
+
+        self.assertEqual(count, 3)
+
+    def test_reconcile_keeps_concurrent_read(self):
+        """Test that a read committing during reconciliation is not recounted"""
+
+        first = UserNotification.objects.filter(user_id=self.user).first()
+
+        def read_one():
+            marked = UserNotification.objects.filter(pk=first.pk, is_read=False).update(
+                is_read=True
+            )
+            UnreadNotificationCount.decrement(self.user.pk, marked)
+
+        self.assertEqual(self._reconcile_during(read_one), 1)
+
+
+class QueryBudgetTestCase(APITestCase):
+    """Per-action query budgets, checked at several data sizes to catch N+1s"""
+
+    SIZES = (1, 10, 1000)
+
+    def _populate(self, size):
+        """
+        An event with `size` participants, each with a push token; the first has
+        `size` notifications
+        """
+        location = Location.objects.create(province="Seoul", city="Jung", town="Myeong")
+        event = EventDetail.objects.create(
+            event_name="Budget Event", capacity=size + 1, duration=60, address="Test"
+        )
+        EventLocation.objects.create(event_id=event, location_id=location)
+        users = UserDetail.objects.bulk_create(
+            [
+                UserDetail(name=f"user-{i}", expo_push_token=f"ExponentPushToken[{i}]")
+                for i in range(size)
+            ]
+        )
+        UserEvent.objects.bulk_create(
+            [UserEvent(user_id=user, event_id=event) for user in users]
+        )
+        UserLocation.objects.create(user_id=users[0], location_id=location)
+        notifications = EventNotification.objects.bulk_create(
+            [EventNotification(event_id=event, detail=f"{i}") for i in range(size)]
+        )
+        UserNotification.objects.bulk_create(
+            [
+                UserNotification(user_id=users[0], notification_id=notification)
+                for notification in notifications
+            ]
+        )
+        return event, users[0]
+
+    def _assert_budget(self, viewset, action, method, url, data=None):
+        with QueryBudget.for_action(viewset, action):
+            response = getattr(self.client, method)(url, data, format="json")
+        self.assertLess(response.status_code, 400, response.data)
+
+    def test_event_actions_within_budget(self):
+        """Test EventViewSet actions against their declared budgets"""
+        for size in self.SIZES:
+            with self.subTest(participants=size):
+                event, user = self._populate(size)
+                base = f"/api/events/{event.event_id}"
+                newcomer = UserDetail.objects.create(name="Newcomer")
+
+                self._assert_budget(EventViewSet, "list", "get", "/api/events/")
+                self._assert_budget(
+                    EventViewSet, "trending", "get", "/api/events/trending/"
+                )
+                self._assert_budget(EventViewSet, "retrieve", "get", f"{base}/")
+                self._assert_budget(EventViewSet, "spots", "get", f"{base}/spots/")
+                self._assert_budget(
+                    EventViewSet,
+                    "spots_many",
+                    "get",
+                    f"/api/events/spots/?event_ids={event.event_id}",
+                )
+                self._assert_budget(
+                    EventViewSet,
+                    "is_user_in",
+                    "get",
+                    f"{base}/is_user_in/?user_id={user.user_id}",
+                )
+                self._assert_budget(
+                    EventViewSet,
+                    "joined",
+                    "get",
+                    f"/api/events/joined/?user_id={user.user_id}"
+                    f"&event_ids={event.event_id}",
+                )
+                self._assert_budget(
+                    EventViewSet,
+                    "join",
+                    "post",
+                    f"{base}/join/",
+                    {"user_id": str(newcomer.user_id)},
+                )
+                self._assert_budget(
+                    EventViewSet, "search", "get", "/api/events/search/?q=Budget"
+                )
+                self._assert_budget(
+                    EventViewSet,
+                    "nearby",
+                    "get",
+                    "/api/events/nearby/?lat=37.5&lon=127",
+                )
+
+    def test_user_actions_within_budget(self):
+        """Test UserDetailViewSet actions against their declared budgets"""
+        for size in self.SIZES:
+            with self.subTest(notifications=size):
+                _, user = self._populate(size)
+                base = f"/api/users/{user.user_id}"
+
+                for action in (
+                    "myinfo",
+                    "recommended_events",
+                    "notifications",
+                    "unread_count",
+                ):
+                    self._assert_budget(
+                        UserDetailViewSet, action, "get", f"{base}/{action}/"
+                    )
+                self._assert_budget(UserDetailViewSet, "retrieve", "get", f"{base}/")
+                self._assert_budget(
+                    UserDetailViewSet,
+                    "read_all_notifications",
+                    "post",
+                    f"{base}/read_all_notifications/",
+                )
+
+    def test_fan_out_within_budget(self):
+        """Test that the fan-out costs a fixed number of queries per chunk"""
+        chunk_size = 100  # the largest size spans several chunks
+        for size in self.SIZES:
+            with self.subTest(participants=size):
+                event, _ = self._populate(size)
+                notification = EventNotification.objects.create(
+                    event_id=event, detail="Budget"
+                )
+                chunks = -(-size // chunk_size)
+
+                # participant cursor, then per chunk: the inbox rows, the count
+                # upsert and the queued push batches
+                with QueryBudget(1 + 3 * chunks, label="fan_out_notification"):
+                    recipients, queued = fan_out_notification(notification, chunk_size)
+                self.assertEqual((recipients, queued), (size, size))
+
+    def test_budget_exceeded_fails(self):
+        """Test that going over budget raises with the offending queries"""
+        with self.assertRaises(QueryBudgetExceeded) as ctx:
+            with QueryBudget(1, label="two lookups"):
+                list(UserDetail.objects.all())
+                list(EventDetail.objects.all())
+
+        self.assertIn("two lookups ran 2 queries (budget 1)", str(ctx.exception))
+
+
+class ConditionalGetTestCase(APITestCase):
+    """Test cases for ETag / Last-Modified revalidation"""
+
+    def setUp(self):
+        self.event = EventDetail.objects.create(
+            event_name="Cached Event", capacity=10, duration=60, address="Test"
+        )
+        self.user = UserDetail.objects.create(name="Cached User")
+        self.category = Category.objects.create(category_name="Sports")
+
+    def _revalidate(self, viewset, action, url, **headers):
+        with QueryBudget.for_action(viewset, action):
+            return self.client.get(url, **headers)
+
+    def test_event_not_modified(self):
+        """Test that a matching If-None-Match gets a 304 without serializing"""
+        url = f"/api/events/{self.event.event_id}/"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+
+        with mock.patch.object(EventDetailSerializer, "to_representation") as serialize:
+            response = self._revalidate(
+                EventViewSet, "retrieve", url, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+        serialize.assert_not_called()
+        # a revalidated page is still a view
+        self.assertEqual(EventView.objects.filter(event_id=self.event).count(), 2)
+
+    def test_event_modified(self):
+        """Test that saving the event changes its ETag"""
+        url = f"/api/events/{self.event.event_id}/"
+        etag = self.client.get(url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.event_name = "Renamed"
+            self.event.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["event_name"], "Renamed")
+
+    def test_etag_depends_on_field_selection(self):
+        """Test that sparse field selections are validated separately"""
+        url = f"/api/events/{self.event.event_id}/"
+        full = self.client.get(url)["ETag"]
+
+        response = self.client.get(
+            url, {"fields": "event_name"}, HTTP_IF_NONE_MATCH=full
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], full)
+
+    def test_if_modified_since(self):
+        """Test that If-Modified-Since at Last-Modified gets a 304"""
+        url = f"/api/events/{self.event.event_id}/"
+        last_modified = self.client.get(url)["Last-Modified"]
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_user_not_modified(self):
+        """Test revalidating the user profile and myinfo"""
+        for action, url in (
+            ("retrieve", f"/api/users/{self.user.user_id}/"),
+            ("myinfo", f"/api/users/{self.user.user_id}/myinfo/"),
+        ):
+            with self.subTest(action=action):
+                etag = self.client.get(url)["ETag"]
+                response = self._revalidate(
+                    UserDetailViewSet, action, url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.bio = "Updated"
+            self.user.save()
+        response = self.client.get(
+            f"/api/users/{self.user.user_id}/", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_category(self):
+        """Test GET /api/categories/{category_id}/ with revalidation"""
+        url = f"/api/categories/{self.category.category_id}/"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["category_name"], "Sports")
+
+        response = self._revalidate(
+            CategoryViewSet, "retrieve", url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        for category_id in (uuid.uuid4(), "not-a-uuid"):
+            response = self.client.get(f"/api/categories/{category_id}/")
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "response-cache-tests",
+        }
+    }
+)
+class ResponseCacheTestCase(APITestCase):
+    """Test cases for the cache of serialized responses"""
+
+    def setUp(self):
+        caches["default"].clear()
+        self.user = UserDetail.objects.create(name="Organizer")
+        self.event = EventDetail.objects.create(
+            event_name="Cached Event", capacity=10, duration=60, address="Test"
+        )
+        self.event_url = f"/api/events/{self.event.event_id}/"
+        self.user_url = f"/api/users/{self.user.user_id}/"
+
+    def test_hit_skips_database_and_serializer(self):
+        """Test that a repeated GET is served from the cache"""
+        first = self.client.get(self.event_url)
+
+        with mock.patch.object(EventDetailSerializer, "to_representation") as serialize:
+            # only the buffered view is written
+            with self.assertNumQueries(1):
+                second = self.client.get(self.event_url)
+        serialize.assert_not_called()
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(response_cache.stats()["event"], {"hits": 1, "misses": 1})
+
+        self.client.get(self.user_url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.user_url)
+        self.assertEqual(response.data["name"], "Organizer")
+        self.assertEqual(response_cache.stats()["user"], {"hits": 1, "misses": 1})
+
+    def test_cached_revalidation(self):
+        """Test that a hit answers If-None-Match with a 304"""
+        etag = self.client.get(self.user_url)["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.user_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_field_selections_cached_separately(self):
+        """Test that ?fields variants don't share an entry"""
+        self.client.get(self.event_url)
+        response = self.client.get(self.event_url, {"fields": "event_name"})
+
+        self.assertEqual(response.data, {"event_name": "Cached Event"})
+
+    def test_save_invalidates(self):
+        """Test that saving the object drops its cached responses on commit"""
+        self.client.get(self.event_url)
+        self.client.get(self.user_url)
+        self.client.get(f"{self.user_url}myinfo/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.event_name = "Renamed"
+            self.event.save()
+            self.user.name = "Renamed User"
+            self.user.save()
+
+        self.assertEqual(self.client.get(self.event_url).data["event_name"], "Renamed")
+        self.assertEqual(self.client.get(self.user_url).data["name"], "Renamed User")
+        self.assertEqual(
+            self.client.get(f"{self.user_url}myinfo/").data["name"], "Renamed User"
+        )
+
+    def test_reconcile_invalidates_repaired_events(self):
+        """Test that a participant count repaired in raw SQL is not served stale"""
+        EventDetail.objects.filter(pk=self.event.pk).update(participant_count=42)
+        self.assertEqual(self.client.get(self.event_url).data["participant_count"], 42)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reconcile_participant_counts()
+
+        self.assertEqual(self.client.get(self.event_url).data["participant_count"], 0)
+
+    def test_uncommitted_write_does_not_invalidate(self):
+        """Test that invalidation waits for the commit"""
+        self.client.get(self.event_url)
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            EventLocation.objects.create(
+                event_id=self.event,
+                location_id=Location.objects.create(
+                    province="Seoul", city="Gangnam", town="Yeoksam"
+                ),
+            )
+        self.assertEqual(response_cache.stats()["event"]["misses"], 1)
+        self.client.get(self.event_url)
+        self.assertEqual(response_cache.stats()["event"]["hits"], 1)
+
+        for callback in callbacks:
+            callback()
+        self.client.get(self.event_url)
+        self.assertEqual(response_cache.stats()["event"]["misses"], 2)
+
+    def test_delete_invalidates(self):
+        """Test that a deleted event is no longer served"""
+        self.client.get(self.event_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.delete()
+
+        response = self.client.get(self.event_url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_uuid_spelling_shares_entry(self):
+        """Test that an upper-case id is invalidated like the canonical one"""
+        url = f"/api/events/{str(self.event.event_id).upper()}/"
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.event_name = "Renamed"
+            self.event.save()
+
+        self.assertEqual(self.client.get(url).data["event_name"], "Renamed")
+
+
+class SeedDatasetTestCase(TestCase):
+    """Test cases for the seed_dataset command"""
+
+    def test_seed_dataset(self):
+        """Test that seeding creates consistent derived tables"""
+        call_command(
+            "seed_dataset",
+            users=40,
+            events=10,
+            locations=4,
+            categories=2,
+            participants=5,
+            notifications=1,
+            seed=7,
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(UserDetail.objects.count(), 40)
+        self.assertEqual(EventDetail.objects.count(), 10)
+        self.assertTrue(UserEvent.objects.exists())
+        self.assertEqual(
+            UserNotification.objects.count(),
+            UserEvent.objects.count(),
+        )
+        # derived tables are rebuilt although bulk_create sends no signals
+        self.assertEqual(
+            RecommendedEvent.objects.count(),
+            EventLocation.objects.filter(
+                event_id__status__in=[EventStatus.PLANNED, EventStatus.ONGOING]
+            ).count(),
+        )
+        self.assertEqual(
+            sum(UnreadNotificationCount.objects.values_list("unread_count", flat=True)),
+            UserNotification.objects.filter(is_read=False).count(),
+        )
+        self.assertFalse(
+            EventDetail.objects.filter(time_created__gt=timezone.now()).exists()
+        )
+
+
+class BulkImportTestCase(APITestCase):
+    """Test cases for the COPY bulk import of events"""
+
+    CSV = (
+        "event_name,description,capacity,duration,status,address,is_featured,"
+        "province,city,town,category\n"
+        'Run,"Morning, ""easy"" run",20,60,planned,1 Road,true,'
+        "Seoul,Gangnam,Yeoksam,Sports|Outdoor\n"
+        "Talk,,50,90,completed,2 Road,false,Seoul,Gangnam,Yeoksam,Sports\n"
+        "Walk,,10,30,,3 Road,,Busan,Haeundae,U-dong,\n"
+    )
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", password="adminpass123", is_staff=True
+        )
+        self.location = Location.objects.create(
+            province="Seoul", city="Gangnam", town="Yeoksam"
+        )
+        self.organizer = UserDetail.objects.create(name="Partner")
+
+    def _upload(self, content, name="events.csv", **data):
+        return self.client.post(
+            "/api/events/import/",
+            {"file": SimpleUploadedFile(name, content.encode()), **data},
+            format="multipart",
+        )
+
+    def test_import_csv(self):
+        """Test that events, join rows and index rows are loaded"""
+        self.client.force_authenticate(self.admin)
+        response = self._upload(self.CSV, organizer_id=str(self.organizer.user_id))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["events"], 3)
+        # Seoul/Gangnam/Yeoksam already exists; Sports is created once
+        self.assertEqual(response.data["locations"], 1)
+        self.assertEqual(response.data["categories"], 2)
+
+        run = EventDetail.objects.get(event_name="Run")
+        self.assertEqual(run.description, 'Morning, "easy" run')
+        self.assertTrue(run.is_featured)
+        self.assertIsNotNone(run.time_created)
+        self.assertEqual(
+            EventLocation.objects.get(event_id=run).location_id, self.location
+        )
+        self.assertEqual(
+            set(
+                EventCategory.objects.filter(event_id=run).values_list(
+                    "category_id__category_name", flat=True
+                )
+            ),
+            {"Sports", "Outdoor"},
+        )
+        self.assertEqual(Category.objects.filter(category_name="Sports").count(), 1)
+        self.assertEqual(EventDetail.objects.get(event_name="Walk").status, "planned")
+        self.assertEqual(
+            EventOrganizer.objects.filter(user_id=self.organizer).count(), 3
+        )
+        # completed events are not recommended
+        self.assertEqual(
+            set(
+                RecommendedEvent.objects.values_list("event_id__event_name", flat=True)
+            ),
+            {"Run", "Walk"},
+        )
+
+    def test_import_coordinates(self):
+        """Test that venue coordinates are imported with their geohash"""
+        self.client.force_authenticate(self.admin)
+        content = (
+            "event_name,capacity,duration,address,province,city,town,"
+            "latitude,longitude\n"
+            "Run,20,60,1 Road,Seoul,Gangnam,Yeoksam,37.5006,127.0364\n"
+            "Walk,10,30,2 Road,Seoul,Gangnam,Yeoksam,,\n"
+        )
+        response = self._upload(content)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        venue = EventLocation.objects.get(event_id__event_name="Run")
+        self.assertEqual((venue.latitude, venue.longitude), (37.5006, 127.0364))
+        self.assertEqual(venue.geohash, encode(37.5006, 127.0364))
+        self.assertEqual(
+            EventLocation.objects.get(event_id__event_name="Walk").geohash, ""
+        )
+
+        response = self._upload(content.replace("37.5006", "137.5006"))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_invalid_row_rolls_back(self):
+        """Test that one bad row aborts the whole import"""
+        self.client.force_authenticate(self.admin)
+        content = self.CSV + "Bad,,lots,30,planned,4 Road,,,,,\n"
+        response = self._upload(content)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("line 5", response.data["error"])
+        self.assertIn("capacity", response.data["error"])
+        self.assertFalse(EventDetail.objects.exists())
+        self.assertFalse(Category.objects.exists())
+
+    def test_import_unknown_organizer(self):
+        """Test that a missing or malformed organizer_id is a 404"""
+        self.client.force_authenticate(self.admin)
+        for organizer_id in (str(uuid.uuid4()), "not-a-uuid"):
+            response = self._upload(self.CSV, organizer_id=organizer_id)
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(EventDetail.objects.exists())
+
+        with self.assertRaisesMessage(CommandError, "User not-a-uuid not found"):
+            call_command(
+                "import_events", "-", input_format="csv", organizer="not-a-uuid"
+            )
+
+    def test_import_requires_admin(self):
+        """Test that only staff users can import"""
+        response = self._upload(self.CSV)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.force_authenticate(
+            User.objects.create_user(username="member", password="memberpass123")
+        )
+        response = self._upload(self.CSV)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(EventDetail.objects.exists())
+
+    def test_import_events_command(self):
+        """Test importing NDJSON from the command line"""
+        rows = [
+            {
+                "event_name": f"Event {i}",
+                "capacity": 10,
+                "duration": 30,
+                "address": "Road",
+                "province": "Seoul",
+                "city": "Gangnam",
+                "town": "Yeoksam",
+                "category": ["Sports"],
+            }
+            for i in range(5)
+        ]
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson") as f:
+            f.write("\n".join(json.dumps(row) for row in rows))
+            f.flush()
+            call_command("import_events", f.name, chunk_size=2, stdout=StringIO())
+
+        self.assertEqual(EventDetail.objects.count(), 5)
+        self.assertEqual(
+            EventLocation.objects.filter(location_id=self.location).count(), 5
+        )
+        self.assertEqual(Category.objects.count(), 1)
+
+
 class SerializerTestCase(TestCase):
     """Test cases for serializers"""
 
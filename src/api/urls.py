@@ -1,15 +1,19 @@
 from rest_framework.routers import DefaultRouter
-from django.urls import path, include
+from django.urls import path, re_path, include
 from api.views.user_views import UserDetailViewSet
 from api.views.event_views import EventViewSet
+from api.views.category_views import CategoryViewSet
 from api.views.auth_views import kakao_redirect
+from api.views.image_views import image
 
 router = DefaultRouter()
 router.register(r"users", UserDetailViewSet, basename="users")
 router.register(r"events", EventViewSet, basename="events")
+router.register(r"categories", CategoryViewSet, basename="categories")
 
 urlpatterns = [
     path("", include(router.urls)),
     path("auth/kakao/callback", kakao_redirect),
+    re_path(r"^images/(?P<digest>[0-9a-f]{64})/$", image, name="image"),
     # path("api-auth/", include("rest_framework.urls", namespace="rest_framework")),
 ]
@@ -1,15 +1,15 @@
 # Function-based views for authentication using Kakao & Naver APIs
 from datetime import date
+from asgiref.sync import sync_to_async
 from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
 from django.http import HttpRequest, HttpResponse, JsonResponse
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 from urllib.parse import unquote, urlencode
-import requests
 
+from api.kakao import KakaoError, get_kakao_client
 from api.models.user import Authentication, UserAuthentication, UserDetail
-from backend import settings
 from helper.types import AuthType
 
 
@@ -24,7 +24,7 @@ def redirect_to_frontend(redirect_uri: str, query_params):
 
 
 # Kakao
-def kakao_redirect(request: HttpRequest) -> HttpResponse:
+async def kakao_redirect(request: HttpRequest) -> HttpResponse:
     """
     Once receiving the authorization code from Kakao, this function will:
     - extract request parameters (state, a.k.a. frontend redirect uri, (authorization) code, error)
@@ -37,12 +37,15 @@ def kakao_redirect(request: HttpRequest) -> HttpResponse:
     - otherwise, it will redirect to status="new"
     - in case of error, it will throw an exception
 
+    The view is async: while Kakao is answering, the worker keeps serving other
+    requests. Both calls share the event loop's keep-alive client (api.kakao) and
+    fail with 504 after KAKAO_TIMEOUT seconds.
     """
     # Step 1: Parse request parameters
     state = request.GET.get(
         "state"
     )  # for the frontend redirect uri + CSRF check (need to be same as the one we sent from FO to kakao api)
-    frontend_redirect_uri = unquote(state)
+    frontend_redirect_uri = unquote(state or "")
     authorization_code = request.GET.get("code")  # from kakao GET api response
     auth_error_code = request.GET.get("error")  # error code from Kakao GET api
     auth_error_description = request.GET.get(
@@ -59,53 +62,35 @@ def kakao_redirect(request: HttpRequest) -> HttpResponse:
     base_url = f"{request.scheme}://{request.get_host()}"
     redirect_uri = f"{base_url}/api/auth/kakao/callback"  # need to be the current uri (to be matched with the first api)
 
-    token_request_url = "https://kauth.kakao.com/oauth/token"
-    token_request_body = {
-        "grant_type": "authorization_code",
-        "client_id": settings.KAKAO_REST_API_KEY,
-        "client_secret": settings.KAKAO_REST_API_SECRET,
-        "redirect_uri": redirect_uri,
-        "code": authorization_code,
-    }
-    token_request_header = {
-        "Content-Type": "application/x-www-form-urlencoded;charset=utf-8"
-    }
-
-    token_response = requests.post(
-        token_request_url, data=token_request_body, headers=token_request_header
+    kakao = get_kakao_client()
+    try:
+        token_response_json = await kakao.fetch_token(authorization_code, redirect_uri)
+        access_token = token_response_json.get("access_token")
+
+        # Step 3. Handle the POST api response
+        if not access_token:
+            raise KakaoError("Failed to retrieve access token", status=502)
+
+        # Step 3.1: Retrieve current user info
+        user_info_response_json = await kakao.fetch_user(access_token)
+        if not user_info_response_json.get("id"):
+            raise KakaoError("Failed to retrieve user info", status=502)
+    except KakaoError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
+
+    return await sync_to_async(_login_kakao_user)(
+        state, frontend_redirect_uri, token_response_json, user_info_response_json
     )
-    token_response_json = token_response.json()
-    access_token = token_response_json.get("access_token")
-
-    # Step 3. Handle the POST api response
-    if not token_response.ok or not access_token:
-        return JsonResponse(
-            {"error": "Failed to retrieve access token"},
-            status=token_response.status_code,
-        )
 
-    # Step 3.1: Retrieve current user info
-    kakao_user_info_url = "https://kapi.kakao.com/v2/user/me"
-    kakao_user_info_headers = {
-        "Authorization": f"Bearer ${access_token}",
-        "Content-Type": "application/x-www-form-urlencoded;charset=utf-8",
-    }
-    kakao_user_info_data = {"property_keys": '["kakao_account.profile"]'}
-
-    user_info_response = requests.post(
-        kakao_user_info_url, data=kakao_user_info_data, headers=kakao_user_info_headers
-    )
-    user_info_response_json = user_info_response.json()
 
+def _login_kakao_user(
+    state, frontend_redirect_uri, token_response_json, user_info_response_json
+):
+    """Find or create the user of a Kakao account and redirect to the frontend."""
+    access_token = token_response_json.get("access_token")
     user_kakao_id = user_info_response_json.get("id")
     user_kakao_info = user_info_response_json.get("kakao_account")
 
-    if not user_info_response.ok or not user_kakao_id:
-        return JsonResponse(
-            {"error": "Failed to retrieve user info"},
-            status=user_info_response.status_code,
-        )
-
     # Step 3.2: Check if the current user already exists
     # (Django model lookup will raise DoesNotExist or MultipleObjectsReturned)
     try:
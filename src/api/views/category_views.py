@@ -0,0 +1,29 @@
+from django.core.exceptions import ValidationError
+from rest_framework import viewsets
+from rest_framework.response import Response
+from api.conditional import not_modified, validators, with_validators
+from api.models.event import Category
+from api.serializers import CategorySerializer
+
+
+class CategoryViewSet(viewsets.ViewSet):
+    permission_classes = []
+
+    # max SQL queries per call, independent of data size (see api.querybudget)
+    query_budgets = {
+        "retrieve": 1,
+    }
+
+    def retrieve(self, request, pk=None):
+        """GET /categories/{category_id}/"""
+        try:
+            category = Category.objects.get(pk=pk)
+        except (Category.DoesNotExist, ValidationError):
+            return Response({"error": "Category not found"}, status=404)
+
+        etag, last_modified = validators(request, category, category.time_updated)
+        if (response := not_modified(request, etag, last_modified)) is not None:
+            return response
+
+        serializer = CategorySerializer(category, context={"request": request})
+        return with_validators(Response(serializer.data), etag, last_modified)
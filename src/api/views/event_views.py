@@ -1,48 +1,429 @@
+import io
+import uuid
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef, Q
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from api.models.event import (
     UserDetail,
+    EventCategory,
     EventDetail,
+    EventLocation,
+    EventView,
     UserEvent,
     EventOrganizer,
 )
-from api.models.notification import UserNotification
 from rest_framework.response import Response
+from api.bulk_import import BulkImportError, EventImporter, input_format
+from api.cache import cached_detail, joined_events
+from api.geo import (
+    DEFAULT_NEARBY_RADIUS,
+    MAX_NEARBY_RADIUS,
+    bounding_box,
+    covering_cells,
+    distance_expression,
+)
+from api.pagination import keyset_page, page_size
+from api.search import SEARCH_ORDERING, search_events, search_terms
 from api.serializers import EventDetailSerializer, EventNotificationSerializer
+from api.models.common import Location
 from api.models.notification import EventNotification
+from helper.types import OPEN_EVENT_STATUSES, EventStatus
+
+# sort orders of the event feed; each has a matching index on EventDetail
+FEED_ORDERINGS = {
+    "recent": ("-time_created", "-event_id"),
+    "popular": ("-view_count", "-event_id"),
+}
+
+BOOLEAN_PARAMS = {"true": True, "false": False}
+
+# max event ids per batch lookup
+MAX_BATCH_EVENT_IDS = 500
+
+
+def _feed_filters(params):
+    """
+    Parse the filters of GET /events/ into a list of Q objects.
+    Raises ValueError for an invalid value.
+    """
+    filters = []
+    if statuses := params.get("status"):
+        try:
+            statuses = [EventStatus(value) for value in statuses.split(",")]
+        except ValueError:
+            raise ValueError(f"status must be one of {', '.join(EventStatus)}")
+        filters.append(Q(status__in=statuses))
+    if "is_featured" in params:
+        if params["is_featured"] not in BOOLEAN_PARAMS:
+            raise ValueError("is_featured must be true or false")
+        filters.append(Q(is_featured=BOOLEAN_PARAMS[params["is_featured"]]))
+    # EXISTS rather than a join: an event is listed once however it is linked
+    if category := params.get("category"):
+        filters.append(
+            Exists(
+                EventCategory.objects.filter(
+                    event_id=OuterRef("pk"), category_id=category
+                )
+            )
+        )
+    if location := params.get("location"):
+        filters.append(
+            Exists(
+                EventLocation.objects.filter(
+                    event_id=OuterRef("pk"), location_id=location
+                )
+            )
+        )
+    return filters
+
+
+def _event_ids_param(params):
+    """
+    Parse ?event_ids=UUID,UUID,... into a list of distinct canonical ids, in
+    order. Raises ValueError for a missing, invalid or too long list.
+    """
+    if not params.get("event_ids"):
+        raise ValueError("event_ids required")
+    try:
+        event_ids = [str(uuid.UUID(part)) for part in params["event_ids"].split(",")]
+    except ValueError:
+        raise ValueError("event_ids must be comma-separated UUIDs")
+    event_ids = list(dict.fromkeys(event_ids))
+    if len(event_ids) > MAX_BATCH_EVENT_IDS:
+        raise ValueError(f"At most {MAX_BATCH_EVENT_IDS} event_ids")
+    return event_ids
+
+
+def _joined_event_ids(user_id, event_ids):
+    """
+    The subset of event_ids the user has joined: from the user's cached set, or
+    one IN query for a user with too many joins to cache.
+    """
+    limit = settings.JOINED_EVENTS_CACHE_MAX_EVENTS
+
+    def load():
+        joined = list(
+            UserEvent.objects.filter(user_id=user_id).values_list(
+                "event_id", flat=True
+            )[: limit + 1]
+        )
+        return joined if len(joined) <= limit else None
+
+    joined = joined_events.get(user_id, load)
+    if joined is None:
+        joined = {
+            str(event_id)
+            for event_id in UserEvent.objects.filter(
+                user_id=user_id, event_id__in=event_ids
+            ).values_list("event_id", flat=True)
+        }
+    return joined.intersection(event_ids)
+
+
+def _float_param(params, name):
+    try:
+        return float(params[name])
+    except (KeyError, ValueError):
+        raise ValueError(f"{name} must be a number")
+
+
+def _nearby_area(params):
+    """
+    Parse the area of GET /events/nearby/: returns ((lat, lon), bbox, radius),
+    where `radius` is None for a bbox search. Raises ValueError for invalid
+    parameters, and Location.DoesNotExist for an unknown location_id.
+    """
+    if "bbox" in params:
+        try:
+            box = tuple(float(part) for part in params["bbox"].split(","))
+        except ValueError:
+            box = ()
+        if len(box) != 4 or not (
+            -90 <= box[0] <= box[2] <= 90 and -180 <= box[1] <= box[3] <= 180
+        ):
+            raise ValueError("bbox must be min_lat,min_lon,max_lat,max_lon")
+        if "lat" in params or "lon" in params:
+            center = (_float_param(params, "lat"), _float_param(params, "lon"))
+        else:
+            center = ((box[0] + box[2]) / 2, (box[1] + box[3]) / 2)
+        return center, box, None
+
+    if location_id := params.get("location_id"):
+        try:
+            location = Location.objects.only("latitude", "longitude").get(
+                pk=location_id
+            )
+        except ValidationError:
+            raise Location.DoesNotExist
+        if location.latitude is None or location.longitude is None:
+            raise ValueError("Location has no coordinates")
+        center = (location.latitude, location.longitude)
+    else:
+        center = (_float_param(params, "lat"), _float_param(params, "lon"))
+    if not (-90 <= center[0] <= 90 and -180 <= center[1] <= 180):
+        raise ValueError("lat or lon out of range")
+
+    radius = DEFAULT_NEARBY_RADIUS
+    if "radius" in params:
+        radius = min(_float_param(params, "radius"), MAX_NEARBY_RADIUS)
+        if radius <= 0:
+            raise ValueError("radius must be positive")
+    return center, bounding_box(*center, radius), radius
 
 
 class EventViewSet(viewsets.ViewSet):
     permission_classes = []
     # TODO: should we allow unauthenticated access for view event?
 
+    # max SQL queries per call, independent of data size (see api.querybudget)
+    query_budgets = {
+        "list": 1,
+        "retrieve": 2,
+        "spots": 1,
+        "spots_many": 1,
+        "is_user_in": 1,
+        "joined": 2,
+        "join": 5,
+        "search": 1,
+        "nearby": 2,
+        "trending": 1,
+    }
+
+    def list(self, request):
+        """
+        GET /events/?category=UUID&location=UUID&status=planned,ongoing
+            &is_featured=true&sort=recent|popular&limit=20&cursor=...
+
+        The event feed: newest (default) or most viewed first, keyset-paginated,
+        so every page is one indexed query however deep the client pages.
+        A cursor is only valid for the filters and sort it was issued with.
+        """
+        params = request.query_params
+        ordering = FEED_ORDERINGS.get(params.get("sort", "recent"))
+        if ordering is None:
+            return Response(
+                {"error": f"sort must be one of {', '.join(FEED_ORDERINGS)}"},
+                status=400,
+            )
+        try:
+            filters = _feed_filters(params)
+        except ValidationError:
+            return Response({"error": "Invalid category or location"}, status=400)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        events = EventDetailSerializer.project(
+            EventDetail.objects.all(), request, also=[ordering[0].lstrip("-")]
+        ).filter(*filters)
+        try:
+            events, next_cursor = keyset_page(
+                events,
+                ordering,
+                cursor=params.get("cursor"),
+                limit=page_size(request),
+            )
+        except ValueError:
+            return Response({"error": "Invalid cursor"}, status=400)
+
+        serializer = EventDetailSerializer(
+            events, many=True, context={"request": request}
+        )
+        return Response({"results": serializer.data, "next_cursor": next_cursor})
+
     def retrieve(self, request, pk=None):
         """GET /events/{event_id}/"""
         try:
-            event = EventDetail.objects.get(pk=pk)
-            serializer = EventDetailSerializer(event)
+            events = EventDetailSerializer.project(
+                EventDetail.objects.all(), request, also=["time_updated"]
+            )
+            response = cached_detail(
+                request, "event", pk, lambda: events.get(pk=pk), EventDetailSerializer
+            )
 
-            EventDetail.objects.filter(pk=pk).update(view_count=event.view_count + 1)
+            # buffered; folded into view_count by the flush_event_views beat task
+            EventView.objects.create(event_id_id=pk)
 
-            return Response(serializer.data)
+            return response
 
         except EventDetail.DoesNotExist:
             return Response({"error": "Event not found"}, status=404)
 
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """
+        GET /events/search/?q=...&limit=20&cursor=...
+
+        Events whose name, address or description contain the words of `q`
+        (as word prefixes), or whose name is close to `q` despite typos; most
+        relevant first (see api.search).
+        """
+        q = request.query_params.get("q", "").strip()
+        if not q:
+            return Response({"error": "q required"}, status=400)
+        if not search_terms(q):
+            return Response({"results": [], "next_cursor": None})
+
+        events = search_events(
+            EventDetailSerializer.project(EventDetail.objects.all(), request), q
+        )
+        try:
+            events, next_cursor = keyset_page(
+                events,
+                SEARCH_ORDERING,
+                cursor=request.query_params.get("cursor"),
+                limit=page_size(request),
+            )
+        except ValueError:
+            return Response({"error": "Invalid cursor"}, status=400)
+
+        serializer = EventDetailSerializer(
+            events, many=True, context={"request": request}
+        )
+        return Response({"results": serializer.data, "next_cursor": next_cursor})
+
+    @action(detail=False, methods=["get"])
+    def trending(self, request):
+        """
+        GET /events/trending/?province=Seoul&limit=20&cursor=...
+
+        Trending open events, overall or in a province, read in rank order from
+        the TrendingEvent snapshot (see api.tasks.compute_trending_events).
+        """
+        events = (
+            EventDetailSerializer.project(EventDetail.objects.all(), request)
+            .annotate(
+                trending_province=F("trendingevent__province"),
+                trending_rank=F("trendingevent__rank"),
+                trending_time_computed=F("trendingevent__time_computed"),
+            )
+            .filter(trending_province=request.query_params.get("province", ""))
+        )
+        try:
+            events, next_cursor = keyset_page(
+                events,
+                ["trending_rank"],
+                cursor=request.query_params.get("cursor"),
+                limit=page_size(request),
+            )
+        except ValueError:
+            return Response({"error": "Invalid cursor"}, status=400)
+
+        serializer = EventDetailSerializer(
+            events, many=True, context={"request": request}
+        )
+        return Response(
+            {
+                "results": serializer.data,
+                "next_cursor": next_cursor,
+                "time_computed": events[0].trending_time_computed if events else None,
+            }
+        )
+
+    @action(detail=False, methods=["get"])
+    def nearby(self, request):
+        """
+        GET /events/nearby/?lat=37.56&lon=126.97&radius=5000&limit=20&cursor=...
+        GET /events/nearby/?location_id=UUID&radius=5000
+        GET /events/nearby/?bbox=min_lat,min_lon,max_lat,max_lon (&lat=&lon=)
+
+        Open events with a venue within `radius` meters (default 5000, at most
+        50000) of the point or the location's centre, or inside `bbox`; nearest
+        first (to lat/lon, or the centre of the bbox). Each result carries its
+        `distance` in meters; an event is listed once per venue in range.
+        Candidates come from geohash prefix ranges (see api.geo).
+        """
+        try:
+            (lat, lon), box, radius = _nearby_area(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        except Location.DoesNotExist:
+            return Response({"error": "Location not found"}, status=404)
+
+        in_cells = Q()
+        for cell in covering_cells(*box):
+            in_cells |= Q(venue_geohash__startswith=cell)
+        events = (
+            EventDetailSerializer.project(EventDetail.objects.all(), request)
+            .filter(status__in=OPEN_EVENT_STATUSES)
+            .annotate(
+                venue_id=F("eventlocation__event_location_id"),
+                venue_geohash=F("eventlocation__geohash"),
+                venue_latitude=F("eventlocation__latitude"),
+                venue_longitude=F("eventlocation__longitude"),
+            )
+            .filter(
+                in_cells,
+                venue_latitude__range=(box[0], box[2]),
+                venue_longitude__range=(box[1], box[3]),
+            )
+            .annotate(
+                distance=distance_expression(
+                    "venue_latitude", "venue_longitude", lat, lon
+                )
+            )
+        )
+        if radius is not None:
+            events = events.filter(distance__lte=radius)
+
+        try:
+            events, next_cursor = keyset_page(
+                events,
+                ["distance", "venue_id"],
+                cursor=request.query_params.get("cursor"),
+                limit=page_size(request),
+            )
+        except ValueError:
+            return Response({"error": "Invalid cursor"}, status=400)
+
+        serializer = EventDetailSerializer(
+            events, many=True, context={"request": request}
+        )
+        results = [
+            {**data, "distance": round(event.distance)}
+            for data, event in zip(serializer.data, events)
+        ]
+        return Response({"results": results, "next_cursor": next_cursor})
+
     @action(detail=True, methods=["get"])
     def spots(self, request, pk=None):
         """GET /events/{event_id}/spots/"""
         try:
-            event = EventDetail.objects.get(pk=pk)
-
-            participants_count = UserEvent.objects.filter(event_id=pk).count()
-            spots = event.capacity - participants_count
+            event = EventDetail.objects.only("capacity", "participant_count").get(pk=pk)
+            spots = event.capacity - event.participant_count
 
             return Response({"available_spots": spots})
 
         except EventDetail.DoesNotExist:
             return Response({"error": "Event not found"}, status=404)
 
+    @action(detail=False, methods=["get"], url_path="spots")
+    def spots_many(self, request):
+        """
+        GET /events/spots/?event_ids=UUID,UUID,...
+
+        spots for a whole screen of events, in one query:
+        {"available_spots": {event_id: spots}}. Unknown events are left out.
+        """
+        try:
+            event_ids = _event_ids_param(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        spots = EventDetail.objects.filter(pk__in=event_ids).values_list(
+            "pk", "capacity", "participant_count"
+        )
+        return Response(
+            {
+                "available_spots": {
+                    str(event_id): capacity - participants
+                    for event_id, capacity, participants in spots
+                }
+            }
+        )
+
     @action(detail=True, methods=["get"])
     def is_user_in(self, request, pk=None):
         """GET /events/{event_id}/is-user-in/?user_id=UUID"""
@@ -54,6 +435,27 @@ class EventViewSet(viewsets.ViewSet):
 
         return Response({"is_in_event": exists})
 
+    @action(detail=False, methods=["get"])
+    def joined(self, request):
+        """
+        GET /events/joined/?user_id=UUID&event_ids=UUID,UUID,...
+
+        is_user_in for a whole screen of events: {"is_in_event": {event_id: bool}}.
+        """
+        user_id = request.query_params.get("user_id")
+        if not user_id:
+            return Response({"error": "user_id required"}, status=400)
+        try:
+            user_id = str(uuid.UUID(user_id))
+            event_ids = _event_ids_param(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        joined = _joined_event_ids(user_id, event_ids)
+        return Response(
+            {"is_in_event": {event_id: event_id in joined for event_id in event_ids}}
+        )
+
     @action(detail=True, methods=["post"])
     def join(self, request, pk=None):
         """POST /events/{event_id}/join/ (body: {user_id})"""
@@ -63,19 +465,25 @@ class EventViewSet(viewsets.ViewSet):
 
         try:
             user = UserDetail.objects.get(pk=user_id)
-            event = EventDetail.objects.get(pk=pk)
 
-            if UserEvent.objects.filter(user_id=user, event_id=event).exists():
-                return Response({"message": "Already joined"})
+            with transaction.atomic():
+                # lock the event row so concurrent joins are admitted one at a time
+                event = EventDetail.objects.select_for_update().get(pk=pk)
 
-            participants = UserEvent.objects.filter(event_id=event)
+                if UserEvent.objects.filter(user_id=user, event_id=event).exists():
+                    return Response({"message": "Already joined"})
 
-            if participants.count() >= event.capacity:
-                return Response({"error": "Event is full"}, status=400)
+                # participant_count is current: its trigger needs the row we hold
+                if event.participant_count >= event.capacity:
+                    return Response({"error": "Event is full"}, status=400)
+
+                UserEvent.objects.create(user_id=user, event_id=event)
 
-            UserEvent.objects.create(user_id=user, event_id=event)
             return Response({"message": "Joined successfully"}, status=201)
 
+        except IntegrityError:
+            # (user, event) is unique; a row written outside this path got there first
+            return Response({"message": "Already joined"})
         except (UserDetail.DoesNotExist, EventDetail.DoesNotExist):
             return Response({"error": "User or Event not found"}, status=404)
 
@@ -97,6 +505,37 @@ class EventViewSet(viewsets.ViewSet):
         except UserDetail.DoesNotExist:
             return Response({"error": "User not found"}, status=404)
 
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        permission_classes=[permissions.IsAdminUser],
+    )
+    def bulk_import(self, request):
+        """POST /events/import/ (multipart: file, input_format?, organizer_id?)"""
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"error": "file required"}, status=400)
+
+        fmt = request.data.get("input_format") or input_format(upload.name)
+        if fmt is None:
+            return Response({"error": "input_format required"}, status=400)
+
+        organizer = None
+        if organizer_id := request.data.get("organizer_id"):
+            try:
+                organizer = UserDetail.objects.get(pk=organizer_id)
+            except (UserDetail.DoesNotExist, ValidationError):
+                return Response({"error": "Organizer not found"}, status=404)
+
+        try:
+            with io.TextIOWrapper(upload, encoding="utf-8", newline="") as stream:
+                result = EventImporter(organizer).run(stream, fmt)
+        except (BulkImportError, UnicodeDecodeError) as e:
+            return Response({"error": str(e)}, status=400)
+
+        return Response(result, status=201)
+
     @action(detail=True, methods=["get"])
     def notificaions(self, request, pk=None):
         """GET /events/{event_id}/notifications/"""
@@ -119,16 +558,11 @@ class EventViewSet(viewsets.ViewSet):
                     {"error": "Only organizer can create notification"}, status=403
                 )
 
-            notification = EventNotification.objects.create(
-                event_id=event, detail=request.data.get("detail", "")
-            )
-
-            participants = UserEvent.objects.filter(event_id=event)
-
-            for participant in participants:
-                UserNotification.objects.create(
-                    user_id=participant.user_id,
-                    notification_id=notification.notification_id,
+            # the outbox entry (api.signals) commits with the notification;
+            # participants are notified by the dispatch_notifications command
+            with transaction.atomic():
+                notification = EventNotification.objects.create(
+                    event_id=event, detail=request.data.get("detail", "")
                 )
 
             return Response(
@@ -0,0 +1,103 @@
+# Function-based view serving images from the content-addressed blob store
+import re
+
+from django.http import (
+    FileResponse,
+    HttpRequest,
+    HttpResponse,
+    HttpResponseNotModified,
+    JsonResponse,
+)
+from django.utils.cache import parse_etags
+from django.views.decorators.http import require_safe
+
+from api.blobstore import BlobStore, sniff_image_type
+
+# a blob's content never changes for a given digest
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header, size):
+    """
+    Parse a single-range `Range: bytes=...` header into (start, end) inclusive.
+    Returns None when the header should be ignored (absent, malformed or
+    multi-range), and raises ValueError when the range is unsatisfiable.
+    """
+    match = RANGE_RE.match(header or "")
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:  # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Unsatisfiable range")
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Unsatisfiable range")
+    return start, end
+
+
+@require_safe
+def image(request: HttpRequest, digest: str) -> HttpResponse:
+    """
+    GET /api/images/{digest}/
+
+    Images are addressed by their SHA-256 digest, so the digest is a strong ETag
+    and the response can be cached forever. Supports If-None-Match and single
+    byte ranges (with If-Range).
+    """
+    store = BlobStore()
+    try:
+        blob = store.open(digest)
+    except (FileNotFoundError, ValueError):
+        return JsonResponse({"error": "Image not found"}, status=404)
+
+    etag = f'"{digest}"'
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and (
+        if_none_match.strip() == "*" or etag in parse_etags(if_none_match)
+    ):
+        blob.close()
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        response["Cache-Control"] = IMAGE_CACHE_CONTROL
+        return response
+
+    size = store.path(digest).stat().st_size
+    content_type = sniff_image_type(blob.read(16)) or "application/octet-stream"
+    blob.seek(0)
+
+    byte_range = None
+    if_range = request.headers.get("If-Range")
+    if not if_range or if_range.strip() == etag:
+        try:
+            byte_range = parse_range(request.headers.get("Range"), size)
+        except ValueError:
+            blob.close()
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    if byte_range:
+        start, end = byte_range
+        with blob:
+            blob.seek(start)
+            response = HttpResponse(
+                blob.read(end - start + 1), status=206, content_type=content_type
+            )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    else:
+        response = FileResponse(blob, content_type=content_type)
+
+    response["ETag"] = etag
+    response["Cache-Control"] = IMAGE_CACHE_CONTROL
+    response["Accept-Ranges"] = "bytes"
+    return response
@@ -1,16 +1,22 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Subquery
 from django.shortcuts import render
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
-from api.models.event import UserDetail, EventDetail
-from api.models.notification import UserNotification
+from api.models.event import UserDetail, EventDetail, RecommendedEvent, UserEvent
+from api.models.notification import UnreadNotificationCount, UserNotification
 from api.serializers import (
     UserDetailSerializer,
     SimpleUserDetailSerializer,
     EventDetailSerializer,
     CreateUserSerializer,
+    UserNotificationSerializer,
 )
 from api.models.common import Location
 from api.models.user import UserLocation
+from api.cache import cached_detail
+from api.pagination import keyset_page, page_size
 
 from rest_framework.response import Response
 
@@ -18,12 +24,29 @@ from rest_framework.response import Response
 class UserDetailViewSet(viewsets.ViewSet):
     permission_classes = []
 
+    # max SQL queries per call, independent of data size (see api.querybudget)
+    query_budgets = {
+        "retrieve": 1,
+        "myinfo": 1,
+        "recommended_events": 2,
+        "notifications": 1,
+        "unread_count": 1,
+        "read_all_notifications": 2,
+    }
+
     def retrieve(self, request, pk=None):
         """GET /users/{user_id}/"""
         try:
-            user = UserDetail.objects.get(pk=pk)
-            serializer = SimpleUserDetailSerializer(user)
-            return Response(serializer.data)
+            users = SimpleUserDetailSerializer.project(
+                UserDetail.objects.all(), request, also=["time_updated"]
+            )
+            return cached_detail(
+                request,
+                "user",
+                pk,
+                lambda: users.get(pk=pk),
+                SimpleUserDetailSerializer,
+            )
 
         except UserDetail.DoesNotExist:
             return Response({"error": "User not found"}, status=404)
@@ -47,30 +70,73 @@ class UserDetailViewSet(viewsets.ViewSet):
     def myinfo(self, request, pk=None):
         """GET /users/{user_id}/myinfo/"""
         try:
-            user = UserDetail.objects.get(pk=pk)
-            serializer = UserDetailSerializer(user)
-            return Response(serializer.data)
+            users = UserDetailSerializer.project(
+                UserDetail.objects.all(), request, also=["time_updated"]
+            )
+            return cached_detail(
+                request, "myinfo", pk, lambda: users.get(pk=pk), UserDetailSerializer
+            )
 
         except UserDetail.DoesNotExist:
             return Response({"error": "User not found"}, status=404)
 
     @action(detail=True, methods=["get"])
     def recommended_events(self, request, pk=None):
-        """GET /users/{user_id}/recommended-events/"""
-        try:
-            user = UserDetail.objects.get(pk=pk)
-            if not user.location:
-                return Response({"error": "User has no location"}, status=400)
+        """
+        GET /users/{user_id}/recommended-events/?limit=20&cursor=...
 
-            events = EventDetail.objects.filter(location=user.location).exclude(
-                participants=user
+        Open events in the user's locations that the user has not joined, most
+        popular first, read from the RecommendedEvent index.
+        """
+        try:
+            location_ids = list(
+                UserLocation.objects.filter(user_id=pk).values_list(
+                    "location_id", flat=True
+                )
             )
-
-            serializer = EventDetailSerializer(events, many=True)
-            return Response(serializer.data)
-
-        except UserDetail.DoesNotExist:
+        except ValidationError:
             return Response({"error": "User not found"}, status=404)
+        if not location_ids:
+            if not UserDetail.objects.filter(pk=pk).exists():
+                return Response({"error": "User not found"}, status=404)
+            return Response({"error": "User has no location"}, status=400)
+
+        joined = UserEvent.objects.filter(user_id=pk, event_id=OuterRef("pk"))
+        # an event indexed in several of the user's locations is listed once,
+        # under its best index row
+        best = (
+            RecommendedEvent.objects.filter(
+                event_id=OuterRef("pk"), location_id__in=location_ids
+            )
+            .order_by("-score", "-recommended_event_id")
+            .values("recommended_event_id")[:1]
+        )
+        events = (
+            EventDetailSerializer.project(EventDetail.objects.all(), request)
+            .filter(
+                recommendedevent__location_id__in=location_ids,
+                recommendedevent__recommended_event_id=Subquery(best),
+            )
+            .exclude(Exists(joined))
+            .annotate(
+                rank_score=F("recommendedevent__score"),
+                rank_id=F("recommendedevent__recommended_event_id"),
+            )
+        )
+        try:
+            events, next_cursor = keyset_page(
+                events,
+                ["-rank_score", "-rank_id"],
+                cursor=request.query_params.get("cursor"),
+                limit=page_size(request),
+            )
+        except ValueError:
+            return Response({"error": "Invalid cursor"}, status=400)
+
+        serializer = EventDetailSerializer(
+            events, many=True, context={"request": request}
+        )
+        return Response({"results": serializer.data, "next_cursor": next_cursor})
 
     @action(detail=False, methods=["post"])
     def create_user(self, request):
@@ -93,21 +159,79 @@ class UserDetailViewSet(viewsets.ViewSet):
 
     @action(detail=True, methods=["get"])
     def notifications(self, request, pk=None):
-        """GET /users/{user_id}/notifications/"""
+        """
+        GET /users/{user_id}/notifications/?limit=20&cursor=...&unread=true
+
+        Newest first, keyset-paginated over (time_created, id).
+        """
+        try:
+            notifications = UserNotification.objects.filter(user_id=pk).select_related(
+                "notification_id"
+            )
+        except ValidationError:
+            return Response({"error": "User not found"}, status=404)
+        if request.query_params.get("unread") == "true":
+            notifications = notifications.filter(is_read=False)
+
+        cursor = request.query_params.get("cursor")
         try:
-            user = UserNotification.objects.get(pk=pk)
-            notifications = user.notifications.all().order_by("-time_created")
-            notifications_data = [
-                {
-                    "notification_id": n.notification_id,
-                    "detail": n.notification_id.detail,
-                    "time_created": n.notification_id.time_created,
-                    "is_read": n.is_read,
-                    "from_admin": n.notification_id.from_admin,
-                }
-                for n in notifications
-            ]
-            return Response(notifications_data)
+            notifications, next_cursor = keyset_page(
+                notifications,
+                ["-time_created", "-user_notification_id"],
+                cursor=cursor,
+                limit=page_size(request),
+            )
+        except ValueError:
+            return Response({"error": "Invalid cursor"}, status=400)
 
-        except UserDetail.DoesNotExist:
+        if not notifications and not cursor:
+            if not UserDetail.objects.filter(pk=pk).exists():
+                return Response({"error": "User not found"}, status=404)
+
+        serializer = UserNotificationSerializer(notifications, many=True)
+        return Response({"results": serializer.data, "next_cursor": next_cursor})
+
+    @action(detail=True, methods=["get"])
+    def unread_count(self, request, pk=None):
+        """GET /users/{user_id}/unread_count/ (the app badge; one primary key lookup)"""
+        try:
+            count = (
+                UnreadNotificationCount.objects.filter(pk=pk)
+                .values_list("unread_count", flat=True)
+                .first()
+            )
+        except ValidationError:
             return Response({"error": "User not found"}, status=404)
+        return Response({"unread_count": count or 0})
+
+    @action(detail=True, methods=["post"])
+    def read_notifications(self, request, pk=None):
+        """POST /users/{user_id}/read_notifications/ (body: {user_notification_ids})"""
+        ids = request.data.get("user_notification_ids")
+        if not isinstance(ids, list) or not ids:
+            return Response({"error": "user_notification_ids required"}, status=400)
+
+        try:
+            with transaction.atomic():
+                marked = UserNotification.objects.filter(
+                    user_id=pk, pk__in=ids, is_read=False
+                ).update(is_read=True)
+                UnreadNotificationCount.decrement(pk, marked)
+        except ValidationError:
+            return Response({"error": "Invalid user_notification_ids"}, status=400)
+
+        return Response({"marked_read": marked})
+
+    @action(detail=True, methods=["post"])
+    def read_all_notifications(self, request, pk=None):
+        """POST /users/{user_id}/read_all_notifications/"""
+        try:
+            with transaction.atomic():
+                marked = UserNotification.objects.filter(
+                    user_id=pk, is_read=False
+                ).update(is_read=True)
+                UnreadNotificationCount.decrement(pk, marked)
+        except ValidationError:
+            return Response({"error": "User not found"}, status=404)
+
+        return Response({"marked_read": marked})
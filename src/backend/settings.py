@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 import dj_database_url
 from dotenv import load_dotenv
 import os
@@ -28,6 +29,21 @@ SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY")
 # KAKAO REST API KEY
 KAKAO_REST_API_KEY = os.environ.get("KAKAO_REST_API_KEY")
 KAKAO_REST_API_SECRET = os.environ.get("KAKAO_REST_API_SECRET")
+KAKAO_AUTH_URL = os.environ.get("KAKAO_AUTH_URL", "https://kauth.kakao.com")
+KAKAO_API_URL = os.environ.get("KAKAO_API_URL", "https://kapi.kakao.com")
+# seconds; the whole login callback waits on two Kakao calls
+KAKAO_TIMEOUT = float(os.environ.get("KAKAO_TIMEOUT", "5"))
+KAKAO_CONNECT_TIMEOUT = float(os.environ.get("KAKAO_CONNECT_TIMEOUT", "2"))
+# provider access tokens expiring within TOKEN_REFRESH_AHEAD seconds are refreshed
+# by the refresh-provider-tokens beat task, in pages of TOKEN_REFRESH_BATCH_SIZE
+TOKEN_REFRESH_AHEAD = int(os.environ.get("TOKEN_REFRESH_AHEAD", "3600"))
+TOKEN_REFRESH_BATCH_SIZE = int(os.environ.get("TOKEN_REFRESH_BATCH_SIZE", "100"))
+TOKEN_REFRESH_MAX_IN_FLIGHT = int(os.environ.get("TOKEN_REFRESH_MAX_IN_FLIGHT", "10"))
+
+# Expo push notifications
+EXPO_PUSH_URL = os.environ.get("EXPO_PUSH_URL", "https://exp.host/--/api/v2/push/send")
+EXPO_PUSH_TIMEOUT = float(os.environ.get("EXPO_PUSH_TIMEOUT", "10"))  # seconds
+EXPO_PUSH_MAX_IN_FLIGHT = int(os.environ.get("EXPO_PUSH_MAX_IN_FLIGHT", "4"))
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
@@ -44,6 +60,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # Third-party
     "rest_framework",
     "django_celery_results",
@@ -75,7 +92,7 @@ REST_FRAMEWORK = {
 MIDDLEWARE = [
     # "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "backend.middleware.AsyncWhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -116,6 +133,69 @@ DATABASES = {
     }
 }
 
+# Connection management, shared by the web app and the Celery workers:
+# - "persistent": keep each process's connection open for DB_CONN_MAX_AGE seconds,
+#   checking it is still usable before reuse
+# - "pool": psycopg 3 connection pool per process (psycopg-pool); the pool
+#   is opened on first use, so gunicorn and Celery prefork children each get their own.
+#   Use this when serving with ASGI, where each request runs in its own thread and a
+#   persistent connection would outlive it; connections are returned to the pool
+#   instead of being closed
+# - "none": a new connection (and TLS handshake) for every request / task; only for
+#   debugging connection issues
+DB_CONNECTION_MODE = os.environ.get("DB_CONNECTION_MODE", "persistent")
+
+if DB_CONNECTION_MODE == "persistent":
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.environ.get("DB_CONN_MAX_AGE", "600"))
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+elif DB_CONNECTION_MODE == "pool":
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", "10")),
+            "timeout": int(os.environ.get("DB_POOL_TIMEOUT", "10")),
+        }
+    }
+elif DB_CONNECTION_MODE != "none":
+    raise ImproperlyConfigured(f"Unknown DB_CONNECTION_MODE: {DB_CONNECTION_MODE}")
+
+
+# Cache for serialized API responses (api.cache), chosen with CACHE_BACKEND:
+# - "locmem" (default): per-process memory, for development only: a write in one
+#   process (another web worker, Celery, a management command) does not
+#   invalidate what the others cached, so they serve stale responses until
+#   RESPONSE_CACHE_TIMEOUT. Deployments use "redis" (see render.yaml).
+# - "file": shared by the processes of one host, under CACHE_LOCATION
+# - "redis": shared by all hosts, at CACHE_LOCATION (requires the `redis` package)
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "locmem")
+CACHE_BACKENDS = {
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", "gloda"),
+    "file": (
+        "django.core.cache.backends.filebased.FileBasedCache",
+        str(BASE_DIR / "cache"),
+    ),
+    "redis": ("django.core.cache.backends.redis.RedisCache", "redis://127.0.0.1:6379"),
+}
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(f"Unknown CACHE_BACKEND: {CACHE_BACKEND}")
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND][0],
+        "LOCATION": os.environ.get("CACHE_LOCATION", CACHE_BACKENDS[CACHE_BACKEND][1]),
+    }
+}
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get("RESPONSE_CACHE_TIMEOUT", "300"))  # seconds
+
+# Joined-event sets kept in process memory for GET /events/joined/ (api.cache):
+# at most this many users, and users with more joins are looked up every time.
+# They are invalidated through the response cache above, so across processes
+# only when CACHE_BACKEND is shared
+JOINED_EVENTS_CACHE_SIZE = int(os.environ.get("JOINED_EVENTS_CACHE_SIZE", "10000"))
+JOINED_EVENTS_CACHE_MAX_EVENTS = int(
+    os.environ.get("JOINED_EVENTS_CACHE_MAX_EVENTS", "1000")
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -155,6 +235,12 @@ STATIC_URL = "static/"
 
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# Uploaded images (content-addressed, see api.blobstore). Deployments must point
+# this at persistent storage (render.yaml mounts a disk): the default directory is
+# wiped with the rest of the checkout on every deploy.
+BLOB_STORE_ROOT = Path(os.environ.get("BLOB_STORE_ROOT", BASE_DIR / "blobs"))
+MAX_IMAGE_UPLOAD_SIZE = 10 * 1024 * 1024  # bytes
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -163,3 +249,30 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 CELERY_BROKER_URL = "django://"
 CELERY_RESULT_BACKEND = "django-db"
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
+CELERY_BEAT_SCHEDULE = {
+    # queued by the notification fan-out; retries wait at least OUTBOX_RETRY_DELAY
+    "deliver-pushes": {
+        "task": "api.tasks.deliver_pushes",
+        "schedule": 5.0,  # seconds
+    },
+    "flush-event-views": {
+        "task": "api.tasks.flush_event_views",
+        "schedule": 10.0,  # seconds
+    },
+    "reconcile-unread-counts": {
+        "task": "api.tasks.reconcile_unread_counts",
+        "schedule": 60.0 * 60,
+    },
+    "reconcile-participant-counts": {
+        "task": "api.tasks.reconcile_participant_counts",
+        "schedule": 60.0 * 60,
+    },
+    "compute-trending-events": {
+        "task": "api.tasks.compute_trending_events",
+        "schedule": 60.0 * 5,
+    },
+    "refresh-provider-tokens": {
+        "task": "api.tasks.refresh_provider_tokens",
+        "schedule": 60.0 * 10,  # well within TOKEN_REFRESH_AHEAD
+    },
+}
@@ -12,3 +12,7 @@ class EventStatus(StrEnum):
     ONGOING = "ongoing"
     COMPLETED = "completed"
     CANCELLED = "cancelled"
+
+
+# events that can still be joined, and so are worth recommending
+OPEN_EVENT_STATUSES = (EventStatus.PLANNED, EventStatus.ONGOING)